@@ -0,0 +1,187 @@
+import asyncio
+import functools
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import sso
+from backend import build_payload, format_results
+from pool import worker_credentials
+from runner import ensure_logged_in
+
+
+class Worker:
+    """One backend session and the single thread every call on it runs in, as a driver can't be shared by threads"""
+
+    def __init__(self, index, session_factory):
+        self.index = index
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sso-worker-{index}")
+        self.session_factory = session_factory
+        self.session = None
+
+    def call(self, method, *args):
+        if self.session is None:
+            self.session = self.session_factory(self.index)
+        if method != "login":
+            # the session may be new, or its login may have failed
+            ensure_logged_in(self.session)
+        return getattr(self.session, method)(*args)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+class AsyncSSO:
+    """asyncio front-end of the SSO operations. Calls run on a fixed set of workers, each one owning its chrome,
+    so no more than `workers` operations run at once and the event loop is never blocked.
+
+    A call that times out or is cancelled aborts its worker's browser. The worker is handed to the next call only
+    once the operation has returned, and that call starts a new browser logged in again.
+    """
+
+    def __init__(self, workers=2, timeout=None, session_factory=None, **credentials):
+        """
+        Args:
+            workers (int): sessions, and operations running at once
+            timeout (float): default seconds a call may take, no limit when not provided
+            session_factory (function): builds the backend of the worker with the index given.
+                A sso.SSO with the credentials, and its own profile when profile_dir is set, when not provided
+            credentials: keyword arguments for sso.SSO
+        """
+        self.timeout = timeout
+        self.credentials = credentials
+        factory = session_factory or self._new_session
+        self.workers = [Worker(index, factory) for index in range(workers)]
+        self._idle = None
+        self._login_lock = None
+
+    def _new_session(self, index):
+        return sso.SSO(**worker_credentials(self.credentials, index))
+
+    @property
+    def idle(self):
+        # created on first use, inside the running loop
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for worker in self.workers:
+                self._idle.put_nowait(worker)
+        return self._idle
+
+    async def _call(self, method, *args, timeout=None, worker=None):
+        """Run a backend method on an idle worker, or on the one given
+
+        Raises:
+            asyncio.TimeoutError: the call took longer than its timeout. The browser was aborted
+        """
+        if worker is None:
+            worker = await self.idle.get()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(worker.executor, functools.partial(worker.call, method, *args))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # the recovery must end even if the caller is cancelled again, or the worker would be lost
+            await asyncio.shield(asyncio.ensure_future(self._recover(worker, future)))
+            raise
+        except BaseException:
+            self.idle.put_nowait(worker)
+            raise
+        self.idle.put_nowait(worker)
+        return result
+
+    async def _recover(self, worker, future):
+        """Abort the worker's browser under the running operation, wait for it to return and give the worker back"""
+        try:
+            if worker.session is not None:
+                await asyncio.get_running_loop().run_in_executor(None, worker.session.abort)
+            await asyncio.wait([future])
+            # the aborted operation usually fails, its error was already reported as the timeout or cancellation
+            future.exception()
+        finally:
+            self.idle.put_nowait(worker)
+
+    async def login(self, timeout=None):
+        """Log every worker in
+
+        Returns:
+            list: the login response of each worker
+        """
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        # a login holds every worker it got until it has them all, two of them must not share the pool out
+        async with self._login_lock:
+            workers = [await self.idle.get() for _ in self.workers]
+        return await asyncio.gather(
+            *(self._call("login", timeout=timeout, worker=worker) for worker in workers)
+        )
+
+    async def create_user(self, user_data, timeout=None):
+        return await self._call("create_user", user_data, timeout=timeout)
+
+    async def update_user(self, user_data, timeout=None):
+        return await self._call("update_user", user_data, timeout=timeout)
+
+    async def delete_user(self, user_data, timeout=None):
+        return await self._call("delete_user", user_data, timeout=timeout)
+
+    async def enable_disable_user(self, user_data, timeout=None):
+        return await self._call("enable_disable_user", user_data, timeout=timeout)
+
+    async def sso_group_checker(self, data, timeout=None):
+        return await self._call("sso_group_checker", data, timeout=timeout)
+
+    async def stream(self, method, inputs, timeout=None):
+        """Run a method once per input on the workers, yielding each response as soon as it is done
+
+        Args:
+            method (string): e.g. "enable_disable_user"
+            inputs (list): argument of each call
+            timeout (float): seconds each call may take
+
+        Yields:
+            tuple: the input and its response. Timeouts and errors come as incomplete responses
+        """
+
+        async def run(item):
+            try:
+                return item, await self._call(method, item, timeout=timeout)
+            except asyncio.TimeoutError:
+                error = f"Timed out after {timeout or self.timeout} seconds"
+            except Exception as e:
+                error = f"Erro: {traceback.format_exc()}\n{e}"
+            return item, format_results(
+                {"error": error, "operation_name": method, "operation_status": "incomplete", "data": item}, 0
+            )
+
+        tasks = [asyncio.ensure_future(run(item)) for item in inputs]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def stream_users(self, method, data, timeout=None):
+        """Split a payload in one call per user, e.g. create_user, yielding each user's response as soon as it is done
+
+        Yields:
+            tuple: the user and its response
+        """
+        users = sso.SSO.parse_users(data)
+        async for payload, response in self.stream(method, [build_payload([user]) for user in users], timeout):
+            yield payload["body"]["services"][0]["input"]["users"][0], response
+
+    async def close(self):
+        """Close every session once its running operation returns"""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(worker.executor, worker.close) for worker in self.workers))
+        for worker in self.workers:
+            worker.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        await self.close()
@@ -1,10 +1,69 @@
-import sso
+import json
+import time
 
+# created on the first invocation and reused by the next ones while the container stays warm
+session = None
+startup_timings = {}
+# seconds the invocation waits for its tickets at most
+TICKET_FLUSH_TIMEOUT = 30
 
-sso = sso.SSO()
-login = sso.login()
-if login:
-    result = sso.create_user(user_json)
-print(result)
-if result.get("body").get("execution").get("status") == "incomplete":
-    sso.create_zendesk_ticket(result)
+
+def get_session():
+    """Return the container's SSO session, importing selenium and starting chrome only on a cold start
+
+    Returns:
+        tuple: the session and True if it was already running (warm start)
+    """
+    global session
+    if session is not None:
+        return session, True
+    start_time = time.perf_counter()
+    import sso
+
+    startup_timings["import"] = time.perf_counter() - start_time
+    session = sso.SSO()
+    startup_timings.update(session.timings)
+    return session, False
+
+
+def handler(event, context=None):
+    """Lambda entry point: create the users of the event with the warm session
+
+    Args:
+        event (dict): payload with the users
+        context (object): lambda context, bounding the wait for the tickets
+
+    Returns:
+        dict: execution info
+    """
+    sso_session, warm = get_session()
+    if not sso_session.logged_in:
+        result = sso_session.login()
+        startup_timings["login"] = sso_session.timings.get("login")
+        startup_timings["first_navigation"] = sso_session.timings.get("first_navigation")
+    if sso_session.logged_in:
+        result = sso_session.create_user(event)
+    result["body"]["execution"]["startup"] = {
+        "warm": warm,
+        "timings": dict(startup_timings) if not warm else {},
+    }
+    print(result)
+    if result.get("body").get("execution").get("status") == "incomplete":
+        sso_session.create_zendesk_ticket(result)
+        # the container may be frozen right after returning, so don't leave tickets in the queue
+        timeout = TICKET_FLUSH_TIMEOUT
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            # leave a second to return before lambda's own deadline
+            timeout = max(min(timeout, context.get_remaining_time_in_millis() / 1000 - 1), 0)
+        sso_session.zendesk.flush(timeout)
+    return result
+
+
+if __name__ == "__main__":
+    with open("input.json") as input_file:
+        user_json = json.load(input_file)
+    try:
+        handler(user_json)
+    finally:
+        if session is not None:
+            session.close()
@@ -0,0 +1,625 @@
+import abc
+import time
+import itertools
+import functools
+import contextlib
+
+from store import run_id_of
+from zendesk import ZendeskClient
+
+
+def results_info(f):
+    """ log executions time and better format some result status of the function passed as a parameter
+    Args:
+        f (function): method
+    Returns:
+        function: decorated function
+    """
+    @functools.wraps(f)
+    def wrapper(self, *args, **kwargs):
+        start_time = time.time()
+        self.ensure_session()
+        self.reset_stats()
+        with self.trace_labels(operation=f.__name__):
+            result = f(self, *args, **kwargs)
+        execution_time = time.time() - start_time
+        response = format_results(result, execution_time)
+        response["body"]["execution"].update(self.operation_stats())
+        if self.store is not None:
+            self.store.record_response(f.__name__, args, response)
+        return response
+    return wrapper
+
+
+def format_results(result, execution_time):
+    """Build the response returned by the decorated operations
+
+    Args:
+        result (dict): execution data of the operation
+        execution_time (float): seconds spent on it
+
+    Returns:
+        dict: formatted response
+    """
+    response = {
+        "body": {
+            "execution": {
+                "status": result.get("operation_status"),
+                "execution_time": execution_time,
+                "jobs": {
+                    "status": f"{result.get('operation_name')} with {result.get('data')}",
+                    "result": f"Erros: {result.get('error')}",
+                },
+            }
+        }
+    }
+    if result.get("results") is not None:
+        response["body"]["execution"]["jobs"]["users"] = result.get("results")
+    if result.get("plan") is not None:
+        response["body"]["execution"]["jobs"]["plan"] = result.get("plan")
+    return response
+
+
+def build_payload(users):
+    """Wrap a list of users in the input payload structure
+
+    Args:
+        users (list): user dicts
+
+    Returns:
+        dict: payload accepted by create_user, update_user and delete_user
+    """
+    return {"body": {"services": [{"input": {"users": list(users)}}]}}
+
+
+def plan_group_changes(current, desired):
+    """Minimal membership changes turning the current groups of each user into the desired ones
+
+    Args:
+        current (dict): email -> groups the user belongs to
+        desired (dict): email -> groups the user must belong to
+
+    Returns:
+        dict: email -> {"add": [...], "remove": [...]}, only for the users of both with something to change
+    """
+    plan = {}
+    for username, groups in desired.items():
+        if username not in current:
+            continue
+        add = sorted(set(groups).difference(current[username]))
+        remove = sorted(set(current[username]).difference(groups))
+        if add or remove:
+            plan[username] = {"add": add, "remove": remove}
+    return plan
+
+
+# console actions (page transitions, searches and submits) of each way of assigning groups
+USER_ASSIGNMENT_ACTIONS = 3  # user page, add to groups dialog, submit; plus a search per group
+GROUP_ASSIGNMENT_ACTIONS = 4  # groups search, group page, add users page, submit; plus a search per user
+
+
+def plan_assignments(adds):
+    """Choose between adding each user to its groups and adding each group its users,
+    whichever needs fewer console actions
+
+    Args:
+        adds (dict): email -> groups to add the user to
+
+    Returns:
+        dict: "mode" ("user" or "group"), the actions of both ways, and the adds "by_user" and "by_group"
+    """
+    by_user = {username: sorted(set(groups)) for username, groups in adds.items() if groups}
+    by_group = {}
+    for username, groups in by_user.items():
+        for group in groups:
+            by_group.setdefault(group, []).append(username)
+    user_actions = sum(USER_ASSIGNMENT_ACTIONS + len(groups) for groups in by_user.values())
+    group_actions = sum(GROUP_ASSIGNMENT_ACTIONS + len(usernames) for usernames in by_group.values())
+    return {
+        "mode": "group" if group_actions < user_actions else "user",
+        "user_actions": user_actions,
+        "group_actions": group_actions,
+        "by_user": by_user,
+        "by_group": by_group,
+    }
+
+
+def aggregate_results(results, operation_name):
+    """Merge the per-user results into a single execution data
+
+    Args:
+        results (list): per-user results, as built by SSOBackend.run_users
+        operation_name (string): name of the whole operation
+
+    Returns:
+        dict: execution data, complete only if every user was complete
+    """
+    if results and all(item["status"] == "complete" for item in results):
+        operation_status = "complete"
+    else:
+        operation_status = "incomplete"
+    errors = [item["error"] for item in results if item["error"]]
+    return {
+        "error": errors or None,
+        "operation_name": operation_name,
+        "operation_status": operation_status,
+        "data": [item["email"] for item in results],
+        "results": results,
+    }
+
+class SSOBackend(abc.ABC):
+    """Operations every SSO backend exposes, with the same payloads and results_info-shaped responses.
+
+    Backends implement the single user operations; batching, parsing and formatting live here.
+    """
+
+    # zendesk.ZendeskClient used by create_zendesk_ticket, created on the first ticket when not set
+    zendesk = None
+    # store.ResultStore recording every result, and used to skip the users already done. Nothing is stored when not set
+    store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def ensure_session(self):
+        """Make sure the backend can run the next operation
+
+        Returns:
+            bool: True if the session had to be restarted
+        """
+        return False
+
+    def sample_memory(self):
+        """Called by run_users between users, before ensure_session, so a long payload can recycle its session"""
+
+    def abort(self):
+        """Called from another thread to stop the operation running, leaving the backend ready for the next one"""
+
+    def close(self):
+        """Release whatever the backend holds, sending the tickets still queued"""
+        if self.zendesk is not None:
+            self.zendesk.close()
+            self.zendesk = None
+
+    def trace_labels(self, **labels):
+        """Context manager labelling the traced steps run inside it
+
+        Args:
+            labels: e.g. operation, step or user
+
+        Returns:
+            context manager
+        """
+        return contextlib.nullcontext()
+
+    def reset_stats(self):
+        """Called by results_info before each operation"""
+
+    def operation_stats(self):
+        """Extra execution data results_info adds to the response
+
+        Returns:
+            dict: merged into body.execution
+        """
+        return {}
+
+    @abc.abstractmethod
+    def login(self):
+        """Authenticate the backend, returning a results_info response"""
+
+    @abc.abstractmethod
+    def _create_single_user(self, user):
+        """Create one user, returning its execution data"""
+
+    @abc.abstractmethod
+    def _update_single_user(self, user):
+        """Update one user, returning its execution data"""
+
+    @abc.abstractmethod
+    def _delete_single_user(self, user):
+        """Delete one user, returning its execution data"""
+
+    def _delete_users(self, users):
+        """Delete many users, returning the execution data of each one in the same order.
+        Backends able to delete in bulk override it
+        """
+        results = []
+        for user in users:
+            with self.trace_labels(user=user.get("email")):
+                results.append(self._delete_single_user(user))
+        return results
+
+    @abc.abstractmethod
+    def _enable_disable_user(self, user_data):
+        """Enable or disable one user, returning its execution data"""
+
+    @abc.abstractmethod
+    def _read_memberships(self, usernames):
+        """Current groups of many users
+
+        Returns:
+            dict: email -> set of group names, None if the user doesn't exist, or the error message if it couldn't be read
+        """
+
+    @abc.abstractmethod
+    def _apply_group_changes(self, username, add, remove):
+        """Add the user to the `add` groups and remove it from the `remove` ones, returning its execution data"""
+
+    def _reconcile_user(self, username, groups):
+        """Read the current groups of one user and apply the changes making them the desired ones.
+        Backends able to read and change the groups in a single visit override it
+
+        Returns:
+            tuple: the user's changes ({"add": [...], "remove": [...]}, None if there is nothing to change)
+                and its execution data
+        """
+        found = self._read_memberships([username]).get(username)
+        changes, result = self._plan_user(username, found, groups)
+        if result is None:
+            result = self._apply_group_changes(username, **changes)
+        return changes, result
+
+    @staticmethod
+    def _plan_user(username, found, groups, dry_run=False):
+        """Plan the changes of one user from its current groups
+
+        Args:
+            username (string): exact username
+            found (set || string || None): current groups, the error reading them, or None if the user doesn't exist
+            groups (list): groups the user must belong to
+            dry_run (bool): only plan
+
+        Returns:
+            tuple: the user's changes, None if there is nothing to change, and its execution data,
+                None if the changes have to be applied
+        """
+        if found is None or isinstance(found, str):
+            return None, {
+                "error": found or f"User {username} not found",
+                "operation_name": "Reconcile Groups",
+                "operation_status": "incomplete",
+            }
+        changes = plan_group_changes({username: found}, {username: groups}).get(username)
+        if changes is not None and not dry_run:
+            return changes, None
+        return changes, {
+            "error": None,
+            "operation_name": "Reconcile Groups (planned)" if changes else "Reconcile Groups (no changes)",
+            "operation_status": "complete",
+        }
+
+    def _reconcile_groups(self, desired, dry_run=False):
+        """Plan and apply the group changes user by user. A dry run reads the current groups of every user at once
+
+        Args:
+            desired (dict): email -> groups the user must belong to
+            dry_run (bool): only plan
+
+        Returns:
+            dict: aggregated execution data, with the plan and a result per user
+        """
+        current = self._read_memberships(list(desired)) if dry_run else {}
+        plan = {}
+        results = []
+        for username, groups in desired.items():
+            start_time = time.time()
+            user = {"email": username, "groups": sorted(groups)}
+            with self.trace_labels(user=username):
+                if dry_run:
+                    changes, result = self._plan_user(username, current.get(username), groups, dry_run=True)
+                else:
+                    changes, result = self._reconcile_user(username, groups)
+            if changes:
+                plan[username] = changes
+            results.append(
+                self._user_result(None, user, "reconcile", result, time.time() - start_time, record=not dry_run)
+            )
+        execution = aggregate_results(results, "Reconcile Groups (dry run)" if dry_run else "Reconcile Groups")
+        execution["plan"] = plan
+        return execution
+
+    def _add_users_to_group(self, group, usernames):
+        """Add many users to one group. Backends with a group-centric way of doing it override it
+
+        Returns:
+            dict: email -> execution data
+        """
+        outcomes = {}
+        for username in usernames:
+            with self.trace_labels(user=username):
+                outcomes[username] = self._apply_group_changes(username, [group], [])
+        return outcomes
+
+    def _assign_groups(self, adds, dry_run=False):
+        """Add users to groups the cheapest way, per user or per group
+
+        Args:
+            adds (dict): email -> groups to add the user to
+            dry_run (bool): only plan
+
+        Returns:
+            dict: aggregated execution data, with the plan and a result per user
+        """
+        plan = plan_assignments(adds)
+        errors = {username: [] for username in adds}
+        start_time = time.time()
+        if not dry_run and plan["mode"] == "group":
+            for group, usernames in plan["by_group"].items():
+                with self.trace_labels(group=group):
+                    outcomes = self._add_users_to_group(group, usernames)
+                for username, result in outcomes.items():
+                    if result.get("operation_status") != "complete":
+                        errors[username].append(result.get("error"))
+        elif not dry_run:
+            for username, groups in plan["by_user"].items():
+                with self.trace_labels(user=username):
+                    result = self._apply_group_changes(username, groups, [])
+                if result.get("operation_status") != "complete":
+                    errors[username].append(result.get("error"))
+        execution_time = (time.time() - start_time) / max(len(adds), 1)
+        results = [
+            self._user_result(
+                None,
+                {"email": username, "groups": plan["by_user"].get(username, [])},
+                "assign",
+                {
+                    "error": errors[username] or None,
+                    "operation_name": f"Assign Groups ({plan['mode']})",
+                    "operation_status": "incomplete" if errors[username] else "complete",
+                },
+                execution_time,
+                record=not dry_run,
+            )
+            for username in adds
+        ]
+        execution = aggregate_results(results, "Assign Groups (dry run)" if dry_run else "Assign Groups")
+        execution["plan"] = plan
+        return execution
+
+    def _sso_group_checker(self, data):
+        """Make the groups of one user match the desired ones, returning its execution data"""
+        result = self._reconcile_groups({data["email"]: data["groups"]})["results"][0]
+        return {
+            "error": result["error"],
+            "operation_name": "SSO Group Checker",
+            "operation_status": result["status"],
+            "data": data,
+        }
+
+    @staticmethod
+    def parse_users(data):
+        """Auxiliary method to collect every user of the input data
+
+        Args:
+            data (dict): payload with one or more services, each one with a list of users
+
+        Returns:
+            list: the user dicts of every service, in the order they were sent
+        """
+        try:
+            users = []
+            for service in data["body"]["services"]:
+                users.extend(service.get("input").get("users"))
+            return users
+        except (AttributeError, KeyError, TypeError):
+            print(
+                "Something went wrong while parsing the input json. It  the keys or its structure may have changed\n")
+            return []
+
+    def parse_input_data(self, user):
+        """Auxiliary method to parse the data of a single user
+
+        Args:
+            user (dict): with the user details
+
+        Returns:
+            Tuple: all data separated in its own corresponding variable
+        """
+        email = user.get("email")
+        first_name = user.get("firstname")
+        last_name = user.get("lastname")
+        groups = user.get("groups")
+        return (email, first_name, last_name, groups)
+
+    def _user_result(self, data, user, task, result, execution_time, record=True):
+        """Per-user result of run_users, recorded in the store when there is one"""
+        if record and self.store is not None:
+            self.store.record(
+                task,
+                user,
+                result.get("operation_status"),
+                execution_time,
+                result.get("error"),
+                user=user.get("email"),
+                run_id=run_id_of(data),
+            )
+        return {
+            "email": user.get("email"),
+            "task": task,
+            "status": result.get("operation_status"),
+            "operation_name": result.get("operation_name"),
+            "error": result.get("error"),
+            "execution_time": execution_time,
+        }
+
+    def run_users(self, data, default_task):
+        """Run the task of every user in the payload, one after the other, on the same driver.
+        Consecutive deletes are handed to _delete_users together
+
+        Args:
+            data (dict): payload with the users
+            default_task (string): task used when the user doesn't have one ("create", "update" or "delete")
+
+        Returns:
+            dict: aggregated execution info, with the result of each user under "results"
+        """
+        tasks = {
+            "create": self._create_single_user,
+            "update": self._update_single_user,
+            "delete": self._delete_single_user,
+        }
+        users = list(enumerate(self.parse_users(data)))
+        results = [None] * len(users)
+        ran = False
+
+        def between_users():
+            # results_info checked the session before the first user, and samples it after the last one
+            if ran:
+                self.sample_memory()
+                self.ensure_session()
+
+        for task, batch in itertools.groupby(users, key=lambda item: item[1].get("task") or default_task):
+            pending = []
+            for position, user in batch:
+                if task not in tasks:
+                    result = {
+                        "error": f"Unknown task '{task}'",
+                        "operation_name": "Run Users",
+                        "operation_status": "incomplete",
+                    }
+                    results[position] = self._user_result(data, user, task, result, 0, record=False)
+                elif self.store is not None and self.store.completed(task, user, user.get("email")):
+                    result = {
+                        "error": None,
+                        "operation_name": f"{task.capitalize()} User (already done)",
+                        "operation_status": "complete",
+                    }
+                    results[position] = self._user_result(data, user, task, result, 0, record=False)
+                else:
+                    pending.append((position, user))
+            if task == "delete" and pending:
+                between_users()
+                ran = True
+                start_time = time.time()
+                batch_results = self._delete_users([user for _, user in pending])
+                execution_time = (time.time() - start_time) / len(pending)
+                for (position, user), result in zip(pending, batch_results):
+                    results[position] = self._user_result(data, user, task, result, execution_time)
+                continue
+            for position, user in pending:
+                between_users()
+                ran = True
+                start_time = time.time()
+                with self.trace_labels(user=user.get("email")):
+                    result = tasks[task](user)
+                results[position] = self._user_result(data, user, task, result, time.time() - start_time)
+        return aggregate_results(results, f"{default_task.capitalize()} Users")
+
+    @results_info
+    def create_user(self, user_data):
+        """Create at AWS SSO every user of the payload provided
+
+        Args:
+            user_data (dict): payload with the users data needed to do so
+
+        Returns:
+            dict: execution info
+        """
+        return self.run_users(user_data, "create")
+
+    @results_info
+    def update_user(self, user_data):
+        """Update at AWS SSO the info of every user of the payload provided
+
+        Args:
+            user_data (dict): payload with the users data needed to do so
+
+        Returns:
+            dict: execution info
+        """
+        return self.run_users(user_data, "update")
+
+    @results_info
+    def delete_user(self, user_data):
+        """Delete at AWS SSO every user of the payload provided, in bulk when the backend can
+
+        Args:
+            user_data (dict || list || string): payload with the users, a list of emails or the email of a single user
+
+        Returns:
+            dict: execution info, with a result per user. Users that don't exist are reported as not found
+        """
+        if isinstance(user_data, str):
+            user_data = [user_data]
+        if isinstance(user_data, list):
+            user_data = build_payload([{"email": email} for email in user_data])
+        return self.run_users(user_data, "delete")
+
+    @results_info
+    def enable_disable_user(self, user_data):
+        """Enable or disable a user at AWS SSO
+
+        Args:
+            user_data (dict): with the "username" and the "action" ("Enable" or "Disable")
+
+        Returns:
+            dict: execution info
+        """
+        return self._enable_disable_user(user_data)
+
+    @results_info
+    def sso_group_checker(self, data):
+        """Make the user groups at AWS SSO match the ones provided
+
+        Args:
+            data (dict): with the user "email" and its desired "groups"
+
+        Returns:
+            dict: execution info
+        """
+        return self._sso_group_checker(data)
+
+    @results_info
+    def reconcile_groups(self, data, dry_run=False):
+        """Make the groups of every user of the payload match its "groups", changing only what differs
+
+        Args:
+            data (dict): payload with the users, each with its email and desired groups
+            dry_run (bool): only return the plan, under jobs.plan, without changing anything
+
+        Returns:
+            dict: execution info, with the plan and a result per user
+        """
+        desired = {user.get("email"): user.get("groups") or [] for user in self.parse_users(data)}
+        return self._reconcile_groups(desired, dry_run)
+
+    @results_info
+    def add_users_to_group(self, group, usernames):
+        """Add many users to one group at once
+
+        Args:
+            group (string): group name
+            usernames (list): emails of the users
+
+        Returns:
+            dict: execution info, with a result per user
+        """
+        return self._assign_groups({username: [group] for username in usernames})
+
+    @results_info
+    def assign_groups(self, data, dry_run=False):
+        """Add every user of the payload to its "groups", per user or per group, whichever takes fewer console actions.
+        Groups are only added, use reconcile_groups to also remove the others
+
+        Args:
+            data (dict): payload with the users, each with its email and the groups to add it to
+            dry_run (bool): only return the plan, under jobs.plan
+
+        Returns:
+            dict: execution info, with the plan and a result per user
+        """
+        adds = {user.get("email"): user.get("groups") or [] for user in self.parse_users(data)}
+        return self._assign_groups(adds, dry_run)
+
+    def create_zendesk_ticket(self, message):
+        """queue a zendesk ticket informing what went wrong in the operation, based on the execution result provided by the decorator.
+        The ticket is sent in background by the session zendesk client
+        Args:
+            message (dict): containg the execution status data
+        """
+        if self.zendesk is None:
+            self.zendesk = ZendeskClient()
+        self.zendesk.submit(message)
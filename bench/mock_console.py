@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import argparse
+import threading
+from urllib.parse import parse_qs, unquote, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+SESSION_COOKIE = "mock-console-session"
+CONSOLE_PATH = "/singlesignon/identity/home"
+
+
+class ConsoleState:
+    """Users, groups and memberships of the stand-in console"""
+
+    def __init__(self, users=10, groups=10, page_size=50, latency=0.0):
+        """
+        Args:
+            users (int): users created up front
+            groups (int): groups created up front, named G1, G2, ...
+            page_size (int): rows per page of the users table
+            latency (float): seconds added to every API answer
+        """
+        self.page_size = page_size
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.groups = {f"G{index}": f"group-{index}" for index in range(1, groups + 1)}
+        self.users = {}
+        self.memberships = {}
+        self.otp_count = 0
+        for index in range(users):
+            username = f"user{index:05d}@example.com"
+            self.add_user(username, "User", f"{index:05d}", [f"G{index % groups + 1}"] if groups else [])
+
+    def add_user(self, username, first_name, last_name, groups):
+        self.users[username] = {
+            "UserName": username,
+            "UserId": f"id-{len(self.users)}-{username}",
+            "Name": {"GivenName": first_name, "FamilyName": last_name},
+            "DisplayName": f"{first_name} {last_name}",
+            "Status": "Enabled",
+        }
+        self.memberships[username] = {group for group in groups if group in self.groups}
+
+    def user_json(self, username):
+        return dict(self.users[username], Groups=sorted(self.memberships[username]))
+
+    def group_memberships(self, username):
+        user_id = self.users[username]["UserId"]
+        return [
+            {"GroupId": self.groups[group], "DisplayName": group, "MemberId": {"UserId": user_id}}
+            for group in sorted(self.memberships[username])
+        ]
+
+
+class ConsoleHandler(BaseHTTPRequestHandler):
+    """Serves the sign in page, the console single page app and the JSON API it renders from"""
+
+    state = None
+    # (method, path, X-Amz-Target, request body) -> recorded answer, replayed before anything else
+    fixtures = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data, status=200):
+        self._send(status, json.dumps(data))
+
+    def _static(self, name, content_type="text/html"):
+        with open(os.path.join(STATIC_DIR, name), "rb") as static_file:
+            self._send(200, static_file.read(), content_type)
+
+    def _logged_in(self):
+        return SESSION_COOKIE in self.headers.get("Cookie", "")
+
+    def _body(self):
+        if not hasattr(self, "_raw_body"):
+            length = int(self.headers.get("Content-Length") or 0)
+            self._raw_body = self.rfile.read(length)
+        return json.loads(self._raw_body or b"{}")
+
+    def _replay(self, method, path):
+        """Answer with the recorded response of the same request, if there is one
+
+        Returns:
+            bool: True if it answered
+        """
+        if not self.fixtures:
+            return False
+        body = self._body() if method == "POST" else None
+        key = (method, path, self.headers.get("X-Amz-Target"), json.dumps(body, sort_keys=True))
+        if key not in self.fixtures:
+            return False
+        self._json(self.fixtures[key])
+        return True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if self._replay("GET", url.path):
+            return
+        query = parse_qs(url.query)
+        if url.path == "/console":
+            return self._static("login.html")
+        if url.path == "/console/home":
+            return self._static("home.html" if self._logged_in() else "login.html")
+        if url.path == CONSOLE_PATH:
+            return self._static("console.html" if self._logged_in() else "login.html")
+        if url.path == "/static/app.js":
+            return self._static("app.js", "application/javascript")
+        if url.path.startswith("/api/"):
+            time.sleep(self.state.latency)
+            with self.state.lock:
+                return self._api_get(url.path[len("/api/"):], query)
+        self._send(404, "not found", "text/plain")
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if self._replay("POST", url.path):
+            return
+        if url.path == "/api/login":
+            return self._send(
+                200,
+                json.dumps({"ok": True}),
+                headers={"Set-Cookie": f"{SESSION_COOKIE}=1; Path=/"},
+            )
+        if url.path.startswith("/api/"):
+            time.sleep(self.state.latency)
+            body = self._body()
+            with self.state.lock:
+                return self._api_post(url.path[len("/api/"):], body)
+        self._send(404, "not found", "text/plain")
+
+    def _api_get(self, path, query):
+        state = self.state
+        parts = [unquote(part) for part in path.split("/")]
+        if parts == ["users"]:
+            search = query.get("filter", [""])[0]
+            page = int(query.get("page", ["1"])[0])
+            names = sorted(name for name in state.users if search in name)
+            start = (page - 1) * state.page_size
+            return self._json(
+                {
+                    "Users": [state.users[name] for name in names[start:start + state.page_size]],
+                    "Total": len(names),
+                    "PageSize": state.page_size,
+                }
+            )
+        if parts == ["groups"]:
+            search = query.get("filter", [""])[0]
+            return self._json(
+                {
+                    "Groups": [
+                        {"GroupId": group_id, "DisplayName": name}
+                        for name, group_id in sorted(state.groups.items())
+                        if search in name
+                    ]
+                }
+            )
+        if len(parts) == 2 and parts[0] == "users" and parts[1] in state.users:
+            return self._json({"User": state.user_json(parts[1])})
+        if len(parts) == 3 and parts[0] == "users" and parts[2] == "groups" and parts[1] in state.users:
+            return self._json({"GroupMemberships": state.group_memberships(parts[1])})
+        if len(parts) == 3 and parts[0] == "groups" and parts[2] == "members" and parts[1] in state.groups:
+            return self._json(
+                {
+                    "Users": [
+                        state.users[name]
+                        for name in sorted(state.users)
+                        if parts[1] in state.memberships[name]
+                    ]
+                }
+            )
+        self._json({"message": "not found"}, 404)
+
+    def _api_post(self, path, body):
+        state = self.state
+        parts = [unquote(part) for part in path.split("/")]
+        if parts == ["users"]:
+            username = body["UserName"]
+            if username in state.users:
+                return self._json({"message": "user already exists"}, 409)
+            state.add_user(username, body.get("GivenName", ""), body.get("FamilyName", ""), body.get("Groups", []))
+            state.otp_count += 1
+            return self._json({"User": state.user_json(username), "Password": f"Otp-{state.otp_count:06d}!"})
+        if parts == ["users", "delete"]:
+            deleted = [name for name in body.get("UserNames", []) if state.users.pop(name, None)]
+            for name in deleted:
+                state.memberships.pop(name, None)
+            return self._json({"Deleted": deleted})
+        if len(parts) == 2 and parts[0] == "users" and parts[1] in state.users:
+            user = state.users[parts[1]]
+            user["Name"] = {
+                "GivenName": body.get("GivenName", user["Name"]["GivenName"]),
+                "FamilyName": body.get("FamilyName", user["Name"]["FamilyName"]),
+            }
+            user["DisplayName"] = body.get("DisplayName", user["DisplayName"])
+            return self._json({"User": state.user_json(parts[1])})
+        if len(parts) == 3 and parts[0] == "users" and parts[1] in state.users:
+            username = parts[1]
+            if parts[2] == "status":
+                state.users[username]["Status"] = body["Status"]
+                return self._json({"User": state.user_json(username)})
+            if parts[2] == "password":
+                state.otp_count += 1
+                password = f"Otp-{state.otp_count:06d}!" if body.get("Mode") == "OTP" else None
+                return self._json({"Password": password})
+            if parts[2] == "groups":
+                memberships = state.memberships[username]
+                memberships.difference_update(body.get("remove", []))
+                memberships.update(group for group in body.get("add", []) if group in state.groups)
+                return self._json({"GroupMemberships": state.group_memberships(username)})
+        if len(parts) == 3 and parts[0] == "groups" and parts[2] == "members" and parts[1] in state.groups:
+            added = [name for name in body.get("UserNames", []) if name in state.users]
+            for name in added:
+                state.memberships[name].add(parts[1])
+            return self._json({"Added": added})
+        self._json({"message": "not found"}, 404)
+
+
+def load_fixtures(path):
+    """
+    Returns:
+        dict: ConsoleHandler.fixtures of the recorded exchanges in the file, empty without a file
+    """
+    if not path:
+        return {}
+    with open(path) as fixtures_file:
+        exchanges = json.load(fixtures_file)["exchanges"]
+    return {
+        (
+            exchange["method"],
+            exchange["path"],
+            exchange.get("target"),
+            json.dumps(exchange.get("request"), sort_keys=True),
+        ): exchange["response"]
+        for exchange in exchanges
+    }
+
+
+class MockConsole:
+    """Local HTTP stand-in of the AWS sign in page and of the IAM Identity Center console"""
+
+    def __init__(self, host="127.0.0.1", port=0, fixtures=None, **state_options):
+        """
+        Args:
+            host (string): interface to listen on
+            port (int): port to listen on, 0 for a free one
+            fixtures (string): JSON file of recorded exchanges, answered as recorded
+            state_options: ConsoleState arguments (users, groups, page_size, latency)
+        """
+        self.state = ConsoleState(**state_options)
+        handler = type("Handler", (ConsoleHandler,), {"state": self.state, "fixtures": load_fixtures(fixtures)})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def login_url(self):
+        return f"{self.base_url}/console"
+
+    @property
+    def console_home_url(self):
+        return f"{self.base_url}/console/home"
+
+    @property
+    def user_management_url(self):
+        return f"{self.base_url}{CONSOLE_PATH}?region=us-east-1#!/users"
+
+    def reset(self, **state_options):
+        """Replace the console data, e.g. to benchmark another table size"""
+        self.state = ConsoleState(**state_options)
+        self.server.RequestHandlerClass.state = self.state
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the stand-in SSO console")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--groups", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    console = MockConsole(
+        port=args.port,
+        users=args.users,
+        groups=args.groups,
+        page_size=args.page_size,
+        latency=args.latency,
+    )
+    print(f"Mock console at {console.user_management_url} (sign in at {console.login_url})")
+    try:
+        console.server.serve_forever()
+    except KeyboardInterrupt:
+        console.stop()
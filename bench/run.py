@@ -0,0 +1,180 @@
+"""Time the SSO operations against the local stand-in console and compare them with the stored baseline.
+
+    python -m bench.run --binary /opt/chrome --chromedriver /opt/chromedriver
+    python -m bench.run --sizes 10 --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+import sso
+from backend import build_payload
+from network import BlockingProfile
+from bench.mock_console import MockConsole
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# sizes of the resources the console loads, written by the --no-blocking runs for the bytes saved of the others
+RESOURCE_SIZES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resource_sizes.json")
+SIZES = (10, 1000, 10000)
+OPERATIONS = ("login", "create_user", "update_user", "sso_group_checker", "delete_user")
+BENCH_USER = {
+    "email": "bench-user@example.com",
+    "firstname": "Bench",
+    "lastname": "User",
+    "groups": ["G1", "G2"],
+}
+
+
+def session_class(console, binary_path, chromedriver_path):
+    """SSO pointed at the stand-in console instead of AWS"""
+    return type(
+        "BenchSSO",
+        (sso.SSO,),
+        {
+            "binary_path": binary_path,
+            "chromedriver_path": chromedriver_path,
+            "user_management_url": console.user_management_url,
+            "console_home_url": console.console_home_url,
+        },
+    )
+
+
+def timed(operation, *args):
+    """
+    Returns:
+        tuple: seconds spent and True if the operation completed
+    """
+    start_time = time.perf_counter()
+    result = operation(*args)
+    elapsed = time.perf_counter() - start_time
+    return elapsed, result.get("body").get("execution").get("status") == "complete"
+
+
+def run_round(session):
+    """Run every benchmarked operation once on a fresh browser
+
+    Returns:
+        dict: seconds spent by each operation, None for the ones that failed
+    """
+    updated_user = dict(BENCH_USER, firstname="Benched")
+    steps = {
+        "login": (session.login,),
+        "create_user": (session.create_user, build_payload([BENCH_USER])),
+        "update_user": (session.update_user, build_payload([updated_user])),
+        "sso_group_checker": (
+            session.sso_group_checker,
+            {"email": "user00000@example.com", "groups": ["G2", "G3"]},
+        ),
+        "delete_user": (session.delete_user, BENCH_USER["email"]),
+    }
+    timings = {}
+    for name in OPERATIONS:
+        elapsed, complete = timed(*steps[name])
+        timings[name] = elapsed if complete else None
+    return timings
+
+
+def run_size(console, size, args):
+    """Benchmark the operations with `size` users and `size` groups in the console
+
+    Returns:
+        dict: median seconds of each operation, None if any round failed it
+    """
+    sso_class = session_class(console, args.binary, args.chromedriver)
+    rounds = []
+    for _ in range(args.repeat):
+        console.reset(users=size, groups=size, page_size=args.page_size, latency=args.latency)
+        blocking = BlockingProfile(enabled=not args.no_blocking, sizes_path=args.resource_sizes)
+        with sso_class(
+            login_url=console.login_url, single_process=False, blocking=blocking, capture_network=args.capture
+        ) as session:
+            rounds.append(run_round(session))
+    medians = {}
+    for name in OPERATIONS:
+        values = [timings[name] for timings in rounds]
+        medians[name] = None if None in values else statistics.median(values)
+    return medians
+
+
+def compare(results, baseline, max_regression):
+    """
+    Args:
+        results (dict): seconds by size and operation
+        baseline (dict): stored seconds by size and operation
+        max_regression (float): accepted slow down, 0.2 means 20% slower than the baseline
+
+    Returns:
+        list: description of every failed or regressed operation, and of every one without a baseline to compare with
+    """
+    problems = []
+    for size, timings in results.items():
+        for name, elapsed in timings.items():
+            reference = baseline.get(size, {}).get(name)
+            if elapsed is None:
+                problems.append(f"{name} with {size} users failed")
+            elif not reference:
+                problems.append(f"{name} with {size} users has no baseline, store one with --update-baseline")
+            elif elapsed > reference * (1 + max_regression):
+                problems.append(
+                    f"{name} with {size} users took {elapsed:.2f}s, baseline {reference:.2f}s "
+                    f"(+{(elapsed / reference - 1) * 100:.0f}%)"
+                )
+    return problems
+
+
+def print_table(results, baseline):
+    print(f"{'users':>8} {'operation':<20} {'seconds':>9} {'baseline':>9}")
+    for size, timings in results.items():
+        for name, elapsed in timings.items():
+            reference = baseline.get(size, {}).get(name)
+            print(
+                f"{size:>8} {name:<20} "
+                f"{'failed' if elapsed is None else f'{elapsed:.2f}':>9} "
+                f"{'-' if reference is None else f'{reference:.2f}':>9}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the SSO operations against a local console")
+    parser.add_argument("--binary", default=sso.SSO.binary_path, help="chrome binary")
+    parser.add_argument("--chromedriver", default=sso.SSO.chromedriver_path, help="chromedriver binary")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="users and groups in the console")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per size, the median is kept")
+    parser.add_argument("--page-size", type=int, default=50, help="rows per page of the users table")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every console API answer")
+    parser.add_argument("--no-blocking", action="store_true", help="let chrome load every resource")
+    parser.add_argument("--resource-sizes", default=RESOURCE_SIZES_PATH, help="resource sizes file")
+    parser.add_argument("--capture", action="store_true", help="read console data from the captured API answers")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="accepted slow down over the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="store these timings as the new baseline")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = {}
+    with MockConsole() as console:
+        for size in args.sizes:
+            results[str(size)] = run_size(console, size, args)
+
+    print_table(results, baseline)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline stored at {args.baseline}")
+        return 0
+    problems = compare(results, baseline, args.max_regression)
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
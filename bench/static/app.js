@@ -0,0 +1,488 @@
+// Stand-in of the IAM Identity Center console. It only reproduces the ids, XPaths and flows sso.py relies on,
+// rendering every view from the JSON API of bench/mock_console.py.
+var state = {
+    page: 1, filter: '', selected: new Set(), wizard: null, searchSequence: 0,
+    groupSelection: null, groupLinks: false, userSelection: null
+};
+
+function escapeHtml(text) {
+    return String(text === undefined || text === null ? '' : text).replace(/[&<>"']/g, function (c) {
+        return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+    });
+}
+
+// wraps content in the elements of an XPath like "div/div[3]/span", adding the preceding siblings each position needs
+function nest(path, content) {
+    var html = content;
+    path.split('/').reverse().forEach(function (step) {
+        var match = step.match(/^(\w+)(?:\[(\d+)\])?$/);
+        var tag = match[1];
+        var padding = '';
+        for (var position = 1; position < parseInt(match[2] || '1', 10); position++) {
+            padding += '<' + tag + '></' + tag + '>';
+        }
+        html = padding + '<' + tag + '>' + html + '</' + tag + '>';
+    });
+    return html;
+}
+
+function api(method, path, body) {
+    var options = {method: method, headers: {'content-type': 'application/json'}};
+    if (body !== undefined) { options.body = JSON.stringify(body); }
+    return fetch('/api/' + path, options).then(function (response) { return response.json(); });
+}
+
+function userPath(username) { return 'users/' + encodeURIComponent(username); }
+
+function userRoute(username) { return '#!/users/' + encodeURIComponent(username); }
+
+function renderPage(children) {
+    document.getElementById('app').innerHTML = nest('div/div/div/div/main/div/div[3]/div/div/div', children);
+}
+
+function openModal(html) { document.getElementById('modal-root').innerHTML = html; }
+
+function closeModal() { document.getElementById('modal-root').innerHTML = ''; }
+
+function table(tbodyId, headers) {
+    return '<div><div><table><thead><tr><th></th>' + headers.map(function (header) {
+        return '<th>' + header + '</th>';
+    }).join('') + '</tr></thead><tbody id="' + tbodyId + '"></tbody></table></div></div>';
+}
+
+function groupRoute(group) { return '#!/groups/' + encodeURIComponent(group); }
+
+function groupRows(groups, checked) {
+    return groups.map(function (group, index) {
+        var href = state.groupLinks ? groupRoute(group.DisplayName) : 'javascript:void(0)';
+        return '<tr><td><input type="checkbox" id="group-checkbox-' + index + '" data-group="' +
+            escapeHtml(group.DisplayName) + '"' + (checked && checked.has(group.DisplayName) ? ' checked' : '') +
+            ' onchange="toggleGroup(this)"></td><td><a href="' + href + '">' + escapeHtml(group.DisplayName) + '</a></td></tr>';
+    }).join('');
+}
+
+// the add to groups page keeps the ticked groups while searching
+function toggleGroup(input) {
+    if (!state.groupSelection) { return; }
+    var group = input.getAttribute('data-group');
+    if (input.checked) { state.groupSelection.add(group); } else { state.groupSelection.delete(group); }
+}
+
+function checkedGroups() {
+    return Array.from(document.querySelectorAll('#groups-tbody input:checked')).map(function (input) {
+        return input.getAttribute('data-group');
+    });
+}
+
+// users list, #!/users
+
+function usersView() {
+    renderPage(
+        '<div id="sso-users-main-table">' +
+        '<div><input type="search" placeholder="Find users by username" value="' + escapeHtml(state.filter) + '">' +
+        '<button data-testid="delete-user-button" onclick="openDeleteModal()">Delete users</button>' +
+        '<a data-testid="add-user-button" href="#!/users$addUserWizard">Add user</a></div>' +
+        table('users-tbody', ['Username', 'Display name', 'Status']) +
+        '<div><button aria-label="Previous page" onclick="changePage(-1)">&lt;</button>' +
+        '<span id="users-page"></span>' +
+        '<button aria-label="Next page" onclick="changePage(1)">&gt;</button></div>' +
+        '</div>'
+    );
+    var search = document.querySelector('#sso-users-main-table input[type=search]');
+    search.addEventListener('keydown', function (event) {
+        if (event.key === 'Enter') {
+            state.filter = search.value;
+            state.page = 1;
+            loadUsers();
+        }
+    });
+    loadUsers();
+}
+
+function loadUsers() {
+    api('GET', 'users?page=' + state.page + '&filter=' + encodeURIComponent(state.filter)).then(function (data) {
+        var lastPage = Math.max(1, Math.ceil(data.Total / data.PageSize));
+        document.getElementById('users-tbody').innerHTML = data.Users.map(function (user, index) {
+            return '<tr><td><input type="checkbox" id="user-checkbox-' + index + '" data-username="' +
+                escapeHtml(user.UserName) + '"' + (state.selected.has(user.UserName) ? ' checked' : '') +
+                ' onchange="toggleUser(this)"></td>' +
+                '<td><a href="' + userRoute(user.UserName) + '">' + escapeHtml(user.UserName) + '</a></td>' +
+                '<td>' + escapeHtml(user.DisplayName) + '</td><td>' + escapeHtml(user.Status) + '</td></tr>';
+        }).join('');
+        document.getElementById('users-page').textContent = state.page + ' / ' + lastPage;
+        document.querySelector('button[aria-label="Next page"]').disabled = state.page >= lastPage;
+        document.querySelector('button[aria-label="Previous page"]').disabled = state.page <= 1;
+    });
+}
+
+function changePage(offset) {
+    state.page += offset;
+    loadUsers();
+}
+
+function toggleUser(input) {
+    var username = input.getAttribute('data-username');
+    if (input.checked) { state.selected.add(username); } else { state.selected.delete(username); }
+}
+
+function openDeleteModal() {
+    if (!state.selected.size) { return; }
+    openModal(
+        '<div id="delete-user-modal"><div>Delete ' + state.selected.size + ' user(s)?</div>' +
+        '<div><button onclick="closeModal()">Cancel</button>' +
+        '<button onclick="confirmDelete()"><span>Delete user</span></button></div></div>'
+    );
+}
+
+function confirmDelete() {
+    api('POST', 'users/delete', {UserNames: Array.from(state.selected)}).then(function () {
+        state.selected.clear();
+        closeModal();
+        loadUsers();
+    });
+}
+
+// add user wizard, #!/users$addUserWizard
+
+function wizardView() {
+    state.wizard = {step: 1, profile: {}, groups: new Set()};
+    renderWizard();
+}
+
+function button(label, onclick) {
+    return '<button onclick="' + onclick + '">' + label + '</button>';
+}
+
+function renderWizard() {
+    var wizard = state.wizard;
+    var title, content, second, third = '';
+    if (wizard.step === 1) {
+        title = 'Specify user details';
+        content = '<div id="user-profile-create-edit-form">' +
+            '<input placeholder="Enter username">' +
+            '<label><input type="radio" name="password-mode" value="EMAIL" checked> Send an email</label>' +
+            '<label><input type="radio" name="password-mode" value="OTP"> Generate a one-time password</label>' +
+            '<input placeholder="email@example.com"><input placeholder="email@example.com">' +
+            '<input placeholder="Enter first name"><input placeholder="Enter last name">' +
+            '<div id="wizard-error"></div></div>';
+        second = button('Next', 'wizardNext()');
+    } else if (wizard.step === 2) {
+        title = 'Add user to groups - optional';
+        content = '<div id="sso-groups-main-table"><div></div>' + table('groups-tbody', ['Group name']) + '</div>';
+        second = button('Previous', 'wizardPrevious()');
+        third = button('Next', 'wizardNext()');
+    } else {
+        title = 'Review and add user';
+        content = '<div>' + escapeHtml(wizard.profile.username) + ' - ' +
+            escapeHtml(Array.from(wizard.groups).join(', ')) + '</div>';
+        second = button('Previous', 'wizardPrevious()');
+        third = button('Add user', 'addUser()');
+    }
+    document.getElementById('app').innerHTML =
+        '<div id="add-user-wizard"><div><div><div>Step ' + wizard.step + ' of 3</div><div>' +
+        '<div><h1>' + title + '</h1></div><div>' + content + '</div>' +
+        '<div>' + nest('div/div/div/div', '<div>' + button('Cancel', "location.hash='#!/users'") + '</div>' +
+            '<div>' + second + '</div><div>' + third + '</div>') + '</div>' +
+        '</div></div></div></div>';
+    if (wizard.step === 2) {
+        api('GET', 'groups').then(function (data) {
+            document.getElementById('groups-tbody').innerHTML = groupRows(data.Groups, wizard.groups);
+        });
+    }
+}
+
+function wizardNext() {
+    var wizard = state.wizard;
+    if (wizard.step === 1) {
+        var form = document.getElementById('user-profile-create-edit-form');
+        var emails = form.querySelectorAll('input[placeholder="email@example.com"]');
+        wizard.profile = {
+            username: form.querySelector('input[placeholder="Enter username"]').value,
+            email: emails[0].value,
+            otp: form.querySelector('input[value="OTP"]').checked,
+            firstName: form.querySelector('input[placeholder="Enter first name"]').value,
+            lastName: form.querySelector('input[placeholder="Enter last name"]').value
+        };
+        if (!wizard.profile.username || wizard.profile.email !== emails[1].value) {
+            document.getElementById('wizard-error').textContent = 'Check the username and the emails';
+            return;
+        }
+    } else if (wizard.step === 2) {
+        wizard.groups = new Set(checkedGroups());
+    }
+    wizard.step++;
+    renderWizard();
+}
+
+function wizardPrevious() {
+    state.wizard.step--;
+    renderWizard();
+}
+
+function addUser() {
+    var wizard = state.wizard;
+    api('POST', 'users', {
+        UserName: wizard.profile.username,
+        GivenName: wizard.profile.firstName,
+        FamilyName: wizard.profile.lastName,
+        Groups: Array.from(wizard.groups)
+    }).then(function (data) {
+        if (!data.Password) {
+            openModal('<div id="add-user-error" role="alert">' + escapeHtml(data.message) + '</div>');
+            return;
+        }
+        openPasswordModal(data.Password);
+    });
+}
+
+function openPasswordModal(password) {
+    state.password = password;
+    openModal(
+        '<div id="OTP-generation-modal">' + nest('div[3]/div/div/div[2]/div/div[3]/div/div[1]/div/div',
+            '<div class="otp-clipboard-area-copy"><input type="checkbox" onclick="revealPassword()"> Show password</div>' +
+            '<div></div><div><div>One-time password</div><div id="otp-password">********</div></div>') +
+        '</div>'
+    );
+}
+
+function revealPassword() {
+    document.getElementById('otp-password').innerHTML =
+        '<span>' + escapeHtml(state.password) + '</span><span>Hide password</span>';
+}
+
+// user details, #!/users/<username>
+
+function userView(username) {
+    api('GET', userPath(username)).then(function (data) {
+        var user = data.User;
+        var enabled = user.Status === 'Enabled';
+        renderPage(
+            '<div>' +
+            '<div id="user-overview-card-header"><div><h2>' + escapeHtml(user.UserName) + '</h2></div>' +
+            '<div>' + nest('div/div', button(enabled ? 'Disable user' : 'Enable user', 'openStatusModal()')) + '</div>' +
+            '<button data-testid="reset-password-button" onclick="openResetPasswordModal()">Reset password</button></div>' +
+            '<div id="user-profile-overview-card-header-container"><h2>Profile details</h2>' +
+            '<a href="javascript:void(0)" onclick="editProfile()">Edit</a></div>' +
+            '<div id="user-profile-body">' + escapeHtml(user.Name.GivenName) + ' ' + escapeHtml(user.Name.FamilyName) +
+            ' - ' + escapeHtml(user.DisplayName) + '</div>' +
+            '<div id="user-overview-card">' + nest('div[2]/div/div/div/div[1]/div/div/div[2]/div[2]/span',
+                button('Status', 'toggleStatusPopover()') +
+                '<span id="status-popover" style="display:none">' + nest('div/div[2]', escapeHtml(user.Status)) + '</span>') +
+            '</div></div><div></div><div></div>' +
+            '<div><div><div><span><ul><li>' + button('Profile', 'showProfileTab()') + '</li>' +
+            '<li>' + button('Groups', 'showGroupsTab()') + '</li></ul></span></div>' +
+            '<div id="user-tab-content"></div></div></div>'
+        );
+        state.user = user;
+        if (sessionStorage.getItem('tab:' + username) === 'groups') { showGroupsTab(); }
+    });
+}
+
+function openResetPasswordModal() {
+    openModal('<div id="reset-password-modal">' +
+        '<label><input type="radio" name="reset" value="EMAIL" checked> Send an email with instructions</label>' +
+        '<label><input type="radio" name="reset" value="OTP"> Generate a one-time password</label>' +
+        '<button data-testid="reset-password-submit" onclick="resetPassword()">Reset password</button></div>');
+}
+
+function resetPassword() {
+    var otp = document.querySelector('#reset-password-modal input[value="OTP"]').checked;
+    api('POST', userPath(state.user.UserName) + '/password', {Mode: otp ? 'OTP' : 'EMAIL'}).then(function (data) {
+        closeModal();
+        if (otp) { openPasswordModal(data.Password); }
+    });
+}
+
+function toggleStatusPopover() {
+    var popover = document.getElementById('status-popover');
+    popover.style.display = popover.style.display === 'none' ? 'inline' : 'none';
+}
+
+function openStatusModal() {
+    var disable = state.user.Status === 'Enabled';
+    var id = disable ? 'disable-user-modal' : 'enable-user-modal';
+    openModal('<div id="' + id + '">' + nest('div[3]/div/div/div[3]/div/div/div[2]',
+        '<button onclick="setStatus(\'' + (disable ? 'Disabled' : 'Enabled') + '\')"><span>' +
+        (disable ? 'Disable user' : 'Enable user') + '</span></button>') + '</div>');
+}
+
+function setStatus(status) {
+    api('POST', userPath(state.user.UserName) + '/status', {Status: status}).then(function () {
+        closeModal();
+        userView(state.user.UserName);
+    });
+}
+
+function editProfile() {
+    var user = state.user;
+    document.getElementById('user-profile-body').innerHTML =
+        '<input placeholder="Enter first name" value="' + escapeHtml(user.Name.GivenName) + '">' +
+        '<input placeholder="Enter last name" value="' + escapeHtml(user.Name.FamilyName) + '">' +
+        '<input placeholder="Enter display name" value="' + escapeHtml(user.DisplayName) + '">' +
+        '<button onclick="saveProfile()"><span>Save changes</span></button>';
+}
+
+function saveProfile() {
+    var body = document.getElementById('user-profile-body');
+    api('POST', userPath(state.user.UserName), {
+        GivenName: body.querySelector('input[placeholder="Enter first name"]').value,
+        FamilyName: body.querySelector('input[placeholder="Enter last name"]').value,
+        DisplayName: body.querySelector('input[placeholder="Enter display name"]').value
+    }).then(function () { userView(state.user.UserName); });
+}
+
+function showProfileTab() {
+    sessionStorage.removeItem('tab:' + state.user.UserName);
+    document.getElementById('user-tab-content').innerHTML = '';
+}
+
+function showGroupsTab() {
+    var username = state.user.UserName;
+    sessionStorage.setItem('tab:' + username, 'groups');
+    document.getElementById('user-tab-content').innerHTML =
+        '<div id="sso-groups-main-table"><div>' + nest('div/div[1]/div[2]/div',
+            '<div><button onclick="openRemoveGroupsModal()"><span>Remove from groups</span></button></div>' +
+            '<div><a href="' + userRoute(username) + '$addToGroups"><span>Add user to groups</span></a></div>') +
+        '</div>' + table('groups-tbody', ['Group name']) + '</div>';
+    api('GET', userPath(username) + '/groups').then(function (data) {
+        document.getElementById('groups-tbody').innerHTML = groupRows(data.GroupMemberships);
+    });
+}
+
+function openRemoveGroupsModal() {
+    if (!checkedGroups().length) { return; }
+    openModal(nest('div/div[3]/div/div/div[3]/div/div/div[2]',
+        '<button onclick="confirmRemoveGroups()"><span>Remove groups</span></button>'));
+}
+
+function confirmRemoveGroups() {
+    api('POST', userPath(state.user.UserName) + '/groups', {remove: checkedGroups()}).then(function () {
+        closeModal();
+        showGroupsTab();
+    });
+}
+
+// add user to groups, #!/users/<username>$addToGroups
+
+function addToGroupsView(username) {
+    renderPage(
+        '<div><h1>Add user to groups</h1></div>' +
+        '<div><div id="sso-groups-main-table"><div>' +
+        '<input type="search" placeholder="Find groups by group name" oninput="searchGroups(this.value)"></div>' +
+        table('groups-tbody', ['Group name']) + '</div></div>' +
+        '<div>' + nest('div/div/div[2]', button('Add user to groups', "addToGroups('" + encodeURIComponent(username) + "')")) + '</div>'
+    );
+    state.groupSelection = new Set();
+    searchGroups('');
+}
+
+function searchGroups(filter) {
+    var sequence = ++state.searchSequence;
+    api('GET', 'groups?filter=' + encodeURIComponent(filter)).then(function (data) {
+        if (sequence === state.searchSequence) {
+            document.getElementById('groups-tbody').innerHTML = groupRows(data.Groups, state.groupSelection);
+        }
+    });
+}
+
+function addToGroups(encodedUsername) {
+    var username = decodeURIComponent(encodedUsername);
+    api('POST', userPath(username) + '/groups', {add: Array.from(state.groupSelection)}).then(function () {
+        location.hash = userRoute(username);
+    });
+}
+
+// groups list, #!/groups
+
+function groupsView() {
+    state.groupLinks = true;
+    renderPage(
+        '<div><div id="sso-groups-main-table"><div>' +
+        '<input type="search" placeholder="Find groups by group name" oninput="searchGroups(this.value)"></div>' +
+        table('groups-tbody', ['Group name']) + '</div></div>'
+    );
+    searchGroups('');
+}
+
+// group members, #!/groups/<group>
+
+function groupView(group) {
+    renderPage(
+        '<div><h1>' + escapeHtml(group) + '</h1></div>' +
+        '<div><div id="sso-group-members-table"><div>' +
+        '<a data-testid="add-users-to-group-button" href="' + groupRoute(group) + '$addUsers">Add users</a></div>' +
+        table('group-members-tbody', ['Username']) + '</div></div>'
+    );
+    api('GET', 'groups/' + encodeURIComponent(group) + '/members').then(function (data) {
+        document.getElementById('group-members-tbody').innerHTML = data.Users.map(function (user, index) {
+            return '<tr><td><input type="checkbox" id="member-checkbox-' + index + '"></td>' +
+                '<td><a href="' + userRoute(user.UserName) + '">' + escapeHtml(user.UserName) + '</a></td></tr>';
+        }).join('');
+    });
+}
+
+// add users to a group, #!/groups/<group>$addUsers. Keeps the ticked users while searching
+
+function addUsersView(group) {
+    state.userSelection = new Set();
+    renderPage(
+        '<div><h1>Add users to ' + escapeHtml(group) + '</h1></div>' +
+        '<div><div id="sso-group-add-users-table"><div>' +
+        '<input type="search" placeholder="Find users by username" oninput="searchUsers(this.value)"></div>' +
+        table('add-users-tbody', ['Username']) + '</div></div>' +
+        '<div><button data-testid="add-users-to-group-submit" onclick="addUsersToGroup(\'' +
+        encodeURIComponent(group) + '\')">Add users</button></div>'
+    );
+    searchUsers('');
+}
+
+function searchUsers(filter) {
+    var sequence = ++state.searchSequence;
+    api('GET', 'users?page=1&filter=' + encodeURIComponent(filter)).then(function (data) {
+        if (sequence !== state.searchSequence) { return; }
+        document.getElementById('add-users-tbody').innerHTML = data.Users.map(function (user, index) {
+            return '<tr><td><input type="checkbox" id="add-user-checkbox-' + index + '" data-username="' +
+                escapeHtml(user.UserName) + '"' + (state.userSelection.has(user.UserName) ? ' checked' : '') +
+                ' onchange="toggleUserSelection(this)"></td>' +
+                '<td><a href="javascript:void(0)">' + escapeHtml(user.UserName) + '</a></td></tr>';
+        }).join('');
+    });
+}
+
+function toggleUserSelection(input) {
+    var username = input.getAttribute('data-username');
+    if (input.checked) { state.userSelection.add(username); } else { state.userSelection.delete(username); }
+}
+
+function addUsersToGroup(encodedGroup) {
+    var group = decodeURIComponent(encodedGroup);
+    api('POST', 'groups/' + encodeURIComponent(group) + '/members', {UserNames: Array.from(state.userSelection)})
+        .then(function () { location.hash = groupRoute(group); });
+}
+
+function route() {
+    closeModal();
+    state.groupSelection = null;
+    state.groupLinks = false;
+    state.userSelection = null;
+    var hash = decodeURIComponent(location.hash);
+    var match;
+    if (hash === '#!/users$addUserWizard') {
+        wizardView();
+    } else if ((match = hash.match(/^#!\/users\/(.+)\$addToGroups$/))) {
+        addToGroupsView(match[1]);
+    } else if ((match = hash.match(/^#!\/users\/(.+)$/))) {
+        userView(match[1]);
+    } else if (hash === '#!/groups') {
+        groupsView();
+    } else if ((match = hash.match(/^#!\/groups\/(.+)\$addUsers$/))) {
+        addUsersView(match[1]);
+    } else if ((match = hash.match(/^#!\/groups\/(.+)$/))) {
+        groupView(match[1]);
+    } else {
+        usersView();
+    }
+}
+
+window.addEventListener('hashchange', route);
+route();
@@ -0,0 +1,188 @@
+import json
+import base64
+from urllib.parse import unquote, urlparse
+
+from selenium.common.exceptions import WebDriverException
+
+# resource types of the requests the console app makes to its JSON APIs
+API_RESOURCE_TYPES = ("XHR", "Fetch")
+
+
+def normalize_status(user):
+    """Status of a console user as "Enabled" or "Disabled", from either a Status or an Active field"""
+    if "Status" in user:
+        return {"ENABLED": "Enabled", "DISABLED": "Disabled"}.get(str(user["Status"]).upper(), user["Status"])
+    if "Active" in user:
+        return "Enabled" if user["Active"] else "Disabled"
+    return None
+
+
+class ConsoleData:
+    """Users, groups, memberships and user status taken from the console's JSON API responses"""
+
+    def __init__(self):
+        self.users = {}
+        self.user_ids = {}
+        self.groups = {}
+        self.memberships = {}
+        # answers ingested so far, and the one each user and membership list last came in
+        self.sequence = 0
+        self.user_seen = {}
+        self.memberships_seen = {}
+
+    def _add_user(self, user):
+        username = user.get("UserName")
+        if not username:
+            return
+        self.users[username] = dict(self.users.get(username, {}), **user)
+        self.user_seen[username] = self.sequence
+        if user.get("UserId"):
+            self.user_ids[user["UserId"]] = username
+
+    def _member_of(self, url, post_data):
+        """User id a membership list is about, from the request body or from a username in the URL"""
+        try:
+            member = json.loads(post_data or "{}").get("MemberId") or {}
+        except (ValueError, AttributeError):
+            member = {}
+        if member.get("UserId"):
+            return member["UserId"]
+        for part in urlparse(url).path.split("/"):
+            user = self.users.get(unquote(part))
+            if user is not None and user.get("UserId"):
+                return user["UserId"]
+        return None
+
+    def ingest(self, url, payload, post_data=None):
+        """Merge an API response into the data
+
+        Args:
+            url (string): URL of the request
+            payload (dict): decoded JSON answer
+            post_data (string): body of the request, if any
+        """
+        if not isinstance(payload, dict):
+            return
+        self.sequence += 1
+        for user in payload.get("Users") or []:
+            self._add_user(user)
+        if isinstance(payload.get("User"), dict):
+            self._add_user(payload["User"])
+        for group in payload.get("Groups") or []:
+            if group.get("GroupId"):
+                self.groups[group["GroupId"]] = group.get("DisplayName")
+        if "GroupMemberships" in payload:
+            memberships = payload["GroupMemberships"] or []
+            for membership in memberships:
+                if membership.get("DisplayName"):
+                    self.groups[membership["GroupId"]] = membership["DisplayName"]
+            user_ids = {(membership.get("MemberId") or {}).get("UserId") for membership in memberships}
+            user_ids.discard(None)
+            if not user_ids:
+                user_ids = {self._member_of(url, post_data)} - {None}
+            # the answer lists every group of the member, so it replaces what was known
+            for user_id in user_ids:
+                self.memberships_seen[user_id] = self.sequence
+                self.memberships[user_id] = {
+                    membership["GroupId"]
+                    for membership in memberships
+                    if (membership.get("MemberId") or {}).get("UserId", user_id) == user_id
+                }
+
+    def user(self, username, since=0):
+        """
+        Args:
+            username (string): exact username
+            since (int): only a user answered after this sequence, see ConsoleCapture.mark
+
+        Returns:
+            dict || None: the user as last answered, None if no answer had it
+        """
+        if since and self.user_seen.get(username, 0) <= since:
+            return None
+        return self.users.get(username)
+
+    def status(self, username, since=0):
+        """
+        Returns:
+            string || None: "Enabled" or "Disabled", None if no answer had the user status
+        """
+        user = self.user(username, since)
+        return normalize_status(user) if user else None
+
+    def groups_of(self, username, since=0):
+        """
+        Returns:
+            set || None: names of the user's groups, None if its memberships were never listed
+        """
+        user_id = (self.users.get(username) or {}).get("UserId")
+        if user_id not in self.memberships or (since and self.memberships_seen[user_id] <= since):
+            return None
+        return {self.groups.get(group_id, group_id) for group_id in self.memberships[user_id]}
+
+
+class ConsoleCapture:
+    """Feeds ConsoleData with the bodies of the JSON responses the console app receives, read through CDP
+    as the performance log reports them"""
+
+    def __init__(self, driver, log):
+        """
+        Args:
+            driver (WebDriver): chrome driver, without event listeners
+            log (network.PerformanceLog): events source
+        """
+        self.driver = driver
+        self.log = log
+        self.data = ConsoleData()
+        self.pending = {}
+        self.stats = {"responses": 0, "errors": 0}
+        driver.execute_cdp_cmd("Network.enable", {})
+        log.subscribe("Network.requestWillBeSent", self._request_sent)
+        log.subscribe("Network.responseReceived", self._response_received)
+        log.subscribe("Network.loadingFinished", self._loading_finished)
+        log.subscribe("Network.loadingFailed", self._loading_failed)
+
+    def _request_sent(self, params):
+        if params.get("type") in API_RESOURCE_TYPES:
+            request = params["request"]
+            self.pending[params["requestId"]] = {"url": request["url"], "post_data": request.get("postData")}
+
+    def _response_received(self, params):
+        request = self.pending.get(params["requestId"])
+        if request is not None and "json" not in (params["response"].get("mimeType") or ""):
+            del self.pending[params["requestId"]]
+
+    def _loading_failed(self, params):
+        self.pending.pop(params["requestId"], None)
+
+    def _loading_finished(self, params):
+        request = self.pending.pop(params["requestId"], None)
+        if request is None:
+            return
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": params["requestId"]})
+            body = response["body"]
+            if response.get("base64Encoded"):
+                body = base64.b64decode(body).decode()
+            self.data.ingest(request["url"], json.loads(body), request["post_data"])
+            self.stats["responses"] += 1
+        except (WebDriverException, ValueError, KeyError):
+            # the body is gone once the page navigates away
+            self.stats["errors"] += 1
+
+    def mark(self):
+        """Sequence of the answers received so far, to only read the ones that come after
+
+        Returns:
+            int: pass it as `since` to ConsoleData
+        """
+        return self.refresh().sequence
+
+    def refresh(self):
+        """Read the responses received since the last call
+
+        Returns:
+            ConsoleData: the captured data
+        """
+        self.log.drain()
+        return self.data
@@ -0,0 +1,329 @@
+import json
+import time
+import queue
+import signal
+import argparse
+import itertools
+import threading
+import traceback
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend import format_results
+from runner import BATCH_PROCESSES, SINGLE_USER_PROCESSES, dispatch, ensure_logged_in
+from store import percentile
+
+# target.process_id -> priority, lower runs first. Offboarding goes ahead of everything else
+PRIORITIES = {
+    "SSO.delete_user": 0,
+    "SSO.enable_disable_user": 1,
+    "SSO.reconcile_groups": 2,
+    "SSO.sso_group_checker": 2,
+    "SSO.assign_groups": 2,
+    "SSO.update_user": 3,
+    "SSO.create_user": 4,
+}
+DEFAULT_PRIORITY = 5
+# jobs of this priority or a more urgent one may use the queue capacity reserved for them
+URGENT_PRIORITY = 1
+# finished jobs kept for GET /jobs/<id>
+FINISHED_JOBS = 1000
+# seconds over which the recent throughput is measured
+THROUGHPUT_WINDOW = 60
+
+
+class QueueFull(Exception):
+    """The job queue is at its limit, the client has to retry later"""
+
+
+class JobQueue:
+    """Bounded priority queue of job envelopes, and the state and timings of every job it has seen.
+
+    The last `reserved` places are kept for urgent jobs, so offboarding isn't refused because of a backlog of creates.
+    A job accepted is never dropped.
+    """
+
+    def __init__(self, max_size=100, latency_samples=1000, reserved=None):
+        """
+        Args:
+            max_size (int): jobs waiting at most, more are refused
+            latency_samples (int): finished jobs the latency percentiles are computed on
+            reserved (int): places only jobs of URGENT_PRIORITY or a more urgent one can take.
+                A tenth of max_size when not provided
+        """
+        self.queue = queue.PriorityQueue(maxsize=max_size)
+        self.reserved = min(reserved if reserved is not None else max_size // 10, max_size - 1)
+        self.counter = itertools.count(1)
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.finished = deque(maxlen=latency_samples)
+        self.started_at = time.time()
+        self.stats = {"accepted": 0, "refused": 0, "done": 0, "incomplete": 0, "running": 0}
+
+    def submit(self, envelope, priority=None):
+        """
+        Args:
+            envelope (dict): job envelope, as in input.json
+            priority (int): overrides the priority of the process_id
+
+        Returns:
+            dict: the job, with its id and priority
+
+        Raises:
+            QueueFull: the queue is at its limit, or only has places reserved for more urgent jobs
+        """
+        process_id = (envelope.get("target") or {}).get("process_id")
+        if priority is None:
+            priority = PRIORITIES.get(process_id, DEFAULT_PRIORITY)
+        job_id = next(self.counter)
+        job = {
+            "id": job_id,
+            "process_id": process_id,
+            "run_id": (envelope.get("source") or {}).get("run_id"),
+            "priority": priority,
+            "status": "queued",
+            "queued_at": time.time(),
+        }
+        with self.lock:
+            limit = self.queue.maxsize
+            if priority > URGENT_PRIORITY:
+                limit -= self.reserved
+            try:
+                if self.queue.qsize() >= limit:
+                    raise queue.Full
+                # the id keeps jobs of the same priority in arrival order
+                self.queue.put_nowait((priority, job_id, envelope))
+            except queue.Full:
+                self.stats["refused"] += 1
+                raise QueueFull(f"{self.queue.qsize()} jobs already waiting")
+            self.jobs[job_id] = job
+            self.stats["accepted"] += 1
+        return dict(job)
+
+    def take(self):
+        """Block until a job is waiting
+
+        Returns:
+            tuple: the job and its envelope, (None, None) once the queue is closed
+        """
+        priority, job_id, envelope = self.queue.get()
+        if envelope is None:
+            return None, None
+        with self.lock:
+            job = self.jobs[job_id]
+            job.update(status="running", started_at=time.time())
+            self.stats["running"] += 1
+        return job, envelope
+
+    def finish(self, job, result):
+        with self.lock:
+            status = result.get("body").get("execution").get("status")
+            job.update(status="done" if status == "complete" else "incomplete", finished_at=time.time(), result=result)
+            self.stats["running"] -= 1
+            self.stats["done"] += 1
+            self.stats["incomplete"] += int(status != "complete")
+            self.finished.append(
+                (job["finished_at"], job["started_at"] - job["queued_at"], job["finished_at"] - job["started_at"])
+            )
+            finished_ids = [job_id for job_id, item in self.jobs.items() if "finished_at" in item]
+            for job_id in finished_ids[:-FINISHED_JOBS]:
+                del self.jobs[job_id]
+
+    def job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def close(self, workers):
+        """Wake every worker up so it stops, after the jobs already queued"""
+        for _ in range(workers):
+            self.queue.put((float("inf"), next(self.counter), None))
+
+    def metrics(self):
+        """
+        Returns:
+            dict: queue depth, job counts, throughput and queue wait and run time percentiles
+        """
+        now = time.time()
+        with self.lock:
+            finished = list(self.finished)
+            metrics = dict(
+                self.stats, queue_depth=self.queue.qsize(), queue_limit=self.queue.maxsize, queue_reserved=self.reserved
+            )
+        recent = [item for item in finished if item[0] >= now - THROUGHPUT_WINDOW]
+        metrics["throughput"] = {
+            "jobs_per_minute": len(recent) * 60 / THROUGHPUT_WINDOW,
+            "jobs_per_minute_since_start": metrics["done"] * 60 / max(now - self.started_at, 1),
+        }
+        waits = sorted(item[1] for item in finished)
+        runs = sorted(item[2] for item in finished)
+        metrics["latency"] = {
+            "queue_wait": {f"p{rank}": percentile(waits, rank) for rank in (50, 90, 99)},
+            "run": {f"p{rank}": percentile(runs, rank) for rank in (50, 90, 99)},
+            "count": len(finished),
+        }
+        return metrics
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """POST /jobs queues an envelope, GET /jobs/<id> its state and result, GET /metrics the queue metrics"""
+
+    jobs = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, data, status=200, headers=None):
+        body = json.dumps(data, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            return self._json(self.jobs.metrics())
+        if self.path == "/health":
+            return self._json({"ok": True})
+        parts = self.path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "jobs" and parts[1].isdigit():
+            job = self.jobs.job(int(parts[1]))
+            if job is not None:
+                return self._json(job)
+        self._json({"message": "not found"}, 404)
+
+    def do_POST(self):
+        if self.path.split("?")[0] != "/jobs":
+            return self._json({"message": "not found"}, 404)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            envelope = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            return self._json({"message": f"Invalid JSON: {e}"}, 400)
+        target = envelope.get("target") if isinstance(envelope, dict) else None
+        if not isinstance(target, dict):
+            return self._json({"message": "The envelope has no target"}, 400)
+        process_id = target.get("process_id")
+        if process_id not in BATCH_PROCESSES and process_id not in SINGLE_USER_PROCESSES:
+            return self._json({"message": f"Unknown process_id '{process_id}'"}, 400)
+        try:
+            job = self.jobs.submit(envelope)
+        except QueueFull as e:
+            return self._json({"message": str(e)}, 503, {"Retry-After": "5"})
+        self._json(dict(job, queue_depth=self.jobs.queue.qsize()), 202)
+
+
+class Daemon:
+    """Warm pool of logged in sessions taking job envelopes from a priority queue fed over HTTP"""
+
+    def __init__(self, session_factory, workers=1, max_queue=100, host="127.0.0.1", port=8080):
+        """
+        Args:
+            session_factory (function): builds the backend of the worker with the index given
+            workers (int): sessions, each one running a job at a time
+            max_queue (int): jobs waiting at most, POST /jobs answers 503 above it, and a tenth of it earlier
+                for the jobs that aren't urgent
+            host (string): interface to listen on
+            port (int): port to listen on, 0 for a free one
+        """
+        self.session_factory = session_factory
+        self.workers = workers
+        self.jobs = JobQueue(max_size=max_queue)
+        handler = type("Handler", (DaemonHandler,), {"jobs": self.jobs})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.sessions = []
+        self.threads = []
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start chrome and log in every session before accepting jobs"""
+        for index in range(self.workers):
+            session = self.session_factory(index)
+            self.sessions.append(session)
+            ensure_logged_in(session)
+        for session in self.sessions:
+            thread = threading.Thread(target=self._work, args=(session,), daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.threads.append(server_thread)
+        return self
+
+    def _work(self, session):
+        while True:
+            job, envelope = self.jobs.take()
+            if job is None:
+                return
+            try:
+                ensure_logged_in(session)
+                result = dispatch(session, envelope)
+            except Exception as e:
+                result = format_results(
+                    {
+                        "error": f"Erro: {traceback.format_exc()}\n{e}",
+                        "operation_name": "SSO Daemon",
+                        "operation_status": "incomplete",
+                        "data": job["process_id"],
+                    },
+                    time.time() - job["started_at"],
+                )
+            self.jobs.finish(job, result)
+
+    def stop(self):
+        """Stop accepting jobs, let the workers finish the queued ones and close the sessions"""
+        self.server.shutdown()
+        self.server.server_close()
+        self.jobs.close(len(self.sessions))
+        for thread in self.threads:
+            thread.join()
+        for session in self.sessions:
+            session.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve SSO job envelopes from a warm pool of logged in browsers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1, help="logged in browsers")
+    parser.add_argument("--max-queue", type=int, default=100, help="jobs waiting at most before refusing new ones")
+    parser.add_argument("--store", help="SQLite result store, users already done there are skipped")
+    parser.add_argument("--max-rss-mb", type=float, help="chrome memory, in MB, after which a browser is recycled")
+    parser.add_argument("--max-operations", type=int, help="operations after which a browser is recycled")
+    args = parser.parse_args()
+
+    import sso
+    from store import ResultStore
+    from memory import MemoryGovernor
+
+    store = ResultStore(args.store) if args.store else None
+
+    def new_session(index):
+        memory = MemoryGovernor(max_rss_mb=args.max_rss_mb, max_operations=args.max_operations)
+        session = sso.SSO(memory=memory, single_process=args.workers == 1)
+        session.store = store
+        return session
+
+    daemon = Daemon(new_session, args.workers, args.max_queue, args.host, args.port)
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    daemon.start()
+    print(f"SSO daemon listening at {daemon.url}/jobs")
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    daemon.stop()
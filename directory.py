@@ -0,0 +1,132 @@
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support import expected_conditions as EC
+
+from tables import snapshot_table
+from waits import button_enabled, no_pending_xhr, table_row_count_stable
+
+USERS_TBODY_XPATH = "//*[@id='sso-users-main-table']/div[2]/div[1]/table/tbody"
+NEXT_PAGE_BUTTON_XPATH = "//*[@id='sso-users-main-table']//button[@aria-label='Next page']"
+SEARCH_INPUT_XPATH = "//*[@id='sso-users-main-table']//input[@type='search']"
+
+
+class first_row_changed:
+    """Wait until the first row of the users table is no longer `previous`"""
+
+    def __init__(self, previous):
+        self.previous = previous
+
+    def __call__(self, driver):
+        rows = snapshot_table(driver, USERS_TBODY_XPATH)
+        return bool(rows) and rows[0]["name"] != self.previous
+
+
+class UserDirectory:
+    """Exact username -> user details index of the users table, shared by the operations of a session"""
+
+    def __init__(self, sso, ttl=300):
+        """
+        Args:
+            sso (SSO): logged in session used to read the console
+            ttl (int): seconds the index is trusted before being rebuilt
+        """
+        self.sso = sso
+        self.ttl = ttl
+        self.users = {}
+        self.built_at = None
+
+    def is_fresh(self):
+        return self.built_at is not None and time.monotonic() - self.built_at < self.ttl
+
+    def invalidate(self, username=None):
+        """Forget one user or, without username, the whole index"""
+        if username is None:
+            self.users = {}
+            self.built_at = None
+        else:
+            self.users.pop(username, None)
+
+    def _add_rows(self, rows, page):
+        for row in rows:
+            if row["name"]:
+                self.users[row["name"]] = {
+                    "username": row["name"],
+                    "link": row["link"],
+                    "status": row["status"],
+                    "page": page,
+                }
+
+    def build(self):
+        """Walk every page of the users table once, indexing each user by its exact username"""
+        print("Indexing SSO users...\n")
+        driver = self.sso.driver
+        wait = self.sso.wait
+        # the table has to be the whole unfiltered one
+        self.sso.navigator.go(self.sso.user_management_url, fresh=True)
+        # an empty table only counts as stable once the users answer arrived
+        wait.until(no_pending_xhr(), label="users loaded")
+        wait.until(
+            table_row_count_stable((By.XPATH, USERS_TBODY_XPATH), min_rows=0),
+            label="users table rows stable",
+        )
+        self.users = {}
+        page = 1
+        while True:
+            rows = snapshot_table(driver, USERS_TBODY_XPATH)
+            self._add_rows(rows, page)
+            if not rows or not button_enabled((By.XPATH, NEXT_PAGE_BUTTON_XPATH))(driver):
+                break
+            driver.find_element(By.XPATH, NEXT_PAGE_BUTTON_XPATH).click()
+            wait.until(first_row_changed(rows[0]["name"]), label="users table page changed")
+            page += 1
+        self.built_at = time.monotonic()
+        print(f"{len(self.users)} users indexed\n")
+
+    def search(self, username):
+        """Targeted lookup through the console search box, for when a full index isn't worth it
+
+        Args:
+            username (string): exact username
+
+        Returns:
+            dict || None: user details, None if there is no user with exactly this username
+        """
+        driver = self.sso.driver
+        wait = self.sso.wait
+        self.sso.navigator.go(self.sso.user_management_url)
+        search_field = wait.until(
+            EC.visibility_of_element_located((By.XPATH, SEARCH_INPUT_XPATH))
+        )
+        search_field.clear()
+        search_field.send_keys(username, Keys.ENTER)
+        wait.until(no_pending_xhr(), label="users search finished")
+        wait.until(
+            table_row_count_stable((By.XPATH, USERS_TBODY_XPATH), min_rows=0),
+            label="users search rows stable",
+        )
+        matches = [row for row in snapshot_table(driver, USERS_TBODY_XPATH) if row["name"] == username]
+        if not matches:
+            # removed since it was indexed, e.g. by another session
+            self.invalidate(username)
+            return None
+        self._add_rows(matches, page=None)
+        return self.users[username]
+
+    def lookup(self, username):
+        """Find a user by its exact username, rebuilding the index only when it expired.
+        A user missing from an index still fresh is searched, as another session may have created it since
+
+        Args:
+            username (string): exact username
+
+        Returns:
+            dict || None: username, link, status and page of the user, None if it doesn't exist
+        """
+        if not self.is_fresh():
+            self.build()
+            return self.users.get(username)
+        entry = self.users.get(username)
+        if entry is None:
+            entry = self.search(username)
+        return entry
@@ -0,0 +1,78 @@
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import NoSuchElementException
+
+FILL_SCRIPT = """
+var fields = arguments[0];
+return fields.map(function (field) {
+    var element = document.evaluate(
+        field.xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    ).snapshotItem(field.index || 0);
+    if (!element) { return false; }
+    if (field.value === true) {
+        if (!element.checked) { element.click(); }
+        return element.checked;
+    }
+    // the console's framework tracks the value through the prototype setter and the input/change events
+    var descriptor = Object.getOwnPropertyDescriptor(Object.getPrototypeOf(element), 'value');
+    element.focus();
+    if (descriptor && descriptor.set) {
+        descriptor.set.call(element, field.value);
+    } else {
+        element.value = field.value;
+    }
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+    element.blur();
+    return element.value === field.value;
+});
+"""
+
+
+def field(xpath, value, index=0):
+    """
+    Args:
+        xpath (string): xpath of the input
+        value (string || bool): text to type, or True to tick a checkbox or radio
+        index (int): which of the inputs matching the xpath
+
+    Returns:
+        dict: field for fill_form and type_fields
+    """
+    return {"xpath": xpath, "value": value, "index": index}
+
+
+def fill_form(driver, fields):
+    """Set every field with one execute_script call, dispatching the input and change events, and read them back
+
+    Args:
+        driver (WebDriver): chrome driver
+        fields (list): built with `field`
+
+    Returns:
+        list: fields that are missing or didn't end up with their value, empty if the form is filled
+    """
+    filled = driver.execute_script(FILL_SCRIPT, fields) or []
+    return [item for item, ok in zip(fields, filled) if not ok] + fields[len(filled):]
+
+
+def type_fields(driver, fields):
+    """Per element path: find, clear and type into each field like a user would
+
+    Args:
+        driver (WebDriver): chrome driver
+        fields (list): built with `field`
+
+    Raises:
+        NoSuchElementException: a field is not on the page
+    """
+    for item in fields:
+        elements = driver.find_elements(By.XPATH, item["xpath"])
+        if len(elements) <= item["index"]:
+            raise NoSuchElementException(f"No input {item['index']} at {item['xpath']}")
+        element = elements[item["index"]]
+        if item["value"] is True:
+            if not element.is_selected():
+                element.click()
+            continue
+        element.clear()
+        element.send_keys(item["value"])
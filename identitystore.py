@@ -0,0 +1,248 @@
+import traceback
+
+from backend import SSOBackend, results_info
+
+
+class IdentityStoreBackend(SSOBackend):
+    """SSO backend on top of the Identity Store API.
+
+    Users, groups and memberships are handled with API calls that finish in milliseconds. Steps that only
+    exist in the console (enabling/disabling users, one-time passwords) are delegated to an optional Selenium `console` session.
+    """
+
+    def __init__(
+        self,
+        identity_store_id,
+        region_name="us-east-1",
+        endpoint_url=None,
+        client=None,
+        console=None,
+    ):
+        """
+        Args:
+            identity_store_id (string): id of the IAM Identity Center identity store
+            region_name (string): AWS region of the identity store
+            endpoint_url (string): alternative endpoint, e.g. a local moto server
+            client (object): ready identitystore client. boto3 is only imported when not provided
+            console (sso.SSO): logged in Selenium session used for the console only steps
+        """
+        if client is None:
+            import boto3
+
+            client = boto3.client(
+                "identitystore", region_name=region_name, endpoint_url=endpoint_url
+            )
+        self.client = client
+        self.identity_store_id = identity_store_id
+        self.console = console
+
+    def _client_errors(self):
+        from botocore.exceptions import BotoCoreError, ClientError
+
+        return (BotoCoreError, ClientError)
+
+    def _result(self, operation_name, data, error=None):
+        return {
+            "error": error,
+            "operation_name": operation_name,
+            "operation_status": "incomplete" if error else "complete",
+            "data": data,
+        }
+
+    def _unique_attribute(self, path, value):
+        return {"UniqueAttribute": {"AttributePath": path, "AttributeValue": value}}
+
+    def _user_id(self, username):
+        """
+        Returns:
+            string || None: id of the user with exactly this username, None if there is none
+        """
+        try:
+            return self.client.get_user_id(
+                IdentityStoreId=self.identity_store_id,
+                AlternateIdentifier=self._unique_attribute("userName", username),
+            )["UserId"]
+        except self.client.exceptions.ResourceNotFoundException:
+            return None
+
+    def _group_ids(self, group_names):
+        """
+        Returns:
+            dict: group name -> group id, only for the groups that exist
+        """
+        group_ids = {}
+        for name in group_names or []:
+            try:
+                group_ids[name] = self.client.get_group_id(
+                    IdentityStoreId=self.identity_store_id,
+                    AlternateIdentifier=self._unique_attribute("displayName", name),
+                )["GroupId"]
+            except self.client.exceptions.ResourceNotFoundException:
+                print(f"Group {name} not found\n")
+        return group_ids
+
+    def _memberships(self, user_id):
+        """
+        Returns:
+            dict: group id -> membership id of every group the user belongs to
+        """
+        memberships = {}
+        paginator = self.client.get_paginator("list_group_memberships_for_member")
+        for page in paginator.paginate(
+            IdentityStoreId=self.identity_store_id, MemberId={"UserId": user_id}
+        ):
+            for membership in page["GroupMemberships"]:
+                memberships[membership["GroupId"]] = membership["MembershipId"]
+        return memberships
+
+    @results_info
+    def login(self):
+        """Check that the identity store can be reached with the current credentials
+
+        Returns:
+            dict: execution info
+        """
+        try:
+            self.client.list_users(IdentityStoreId=self.identity_store_id, MaxResults=1)
+        except self._client_errors() as e:
+            return self._result(
+                "Identity Store Login", self.identity_store_id, f"Erro: {traceback.format_exc()}\n{e}"
+            )
+        return self._result("Identity Store Login", self.identity_store_id)
+
+    def _create_single_user(self, user):
+        email, first_name, last_name, groups = self.parse_input_data(user)
+        # if user wasn't created with lastname on GCC, create aws-sso use account with last name as 'colaborador'
+        last_name = last_name or "colaborador"
+        try:
+            user_id = self.client.create_user(
+                IdentityStoreId=self.identity_store_id,
+                UserName=email,
+                DisplayName=f"{first_name} {last_name}".strip(),
+                Name={"GivenName": first_name, "FamilyName": last_name},
+                Emails=[{"Value": email, "Type": "work", "Primary": True}],
+            )["UserId"]
+            group_ids = self._group_ids(groups)
+            for group_id in group_ids.values():
+                self.client.create_group_membership(
+                    IdentityStoreId=self.identity_store_id,
+                    GroupId=group_id,
+                    MemberId={"UserId": user_id},
+                )
+        except self._client_errors() as e:
+            return self._result("Create User", email, f"Erro: {traceback.format_exc()}\n{e}")
+        missing_groups = set(groups or []).difference(group_ids)
+        if missing_groups:
+            return self._result(
+                "Create User - Add User to Groups", email, f"Groups not found: {sorted(missing_groups)}"
+            )
+        # the API creates users without a password, the one-time password is only issued by the console
+        if self.console is not None:
+            password = self.console.issue_user_password(email)
+            if not isinstance(password, str):
+                return self._result("Create User - Get User Password", email, password.get("error"))
+            print("User Password was successfully collected")
+        return self._result("Create User", email)
+
+    def _update_single_user(self, user):
+        username = user.get("email")
+        operations = [
+            {"AttributePath": path, "AttributeValue": value}
+            for path, value in (
+                ("name.givenName", user.get("firstname")),
+                ("name.familyName", user.get("lastname")),
+                ("displayName", user.get("display_name")),
+            )
+            if value
+        ]
+        try:
+            user_id = self._user_id(username)
+            if user_id is None:
+                return self._result("Update User", username, f"User {username} not found")
+            if operations:
+                self.client.update_user(
+                    IdentityStoreId=self.identity_store_id,
+                    UserId=user_id,
+                    Operations=operations,
+                )
+        except self._client_errors() as e:
+            return self._result("Update User", username, f"Erro: {traceback.format_exc()}\n{e}")
+        return self._result("Update User", username)
+
+    def _delete_single_user(self, user):
+        username = user.get("email")
+        try:
+            user_id = self._user_id(username)
+            if user_id is None:
+                return self._result("Delete User", username, f"User {username} not found")
+            self.client.delete_user(IdentityStoreId=self.identity_store_id, UserId=user_id)
+        except self._client_errors() as e:
+            return self._result("Delete User", username, f"Erro: {traceback.format_exc()}\n{e}")
+        return self._result("Delete User", username)
+
+    def _enable_disable_user(self, user_data):
+        # the Identity Store API has no user status, it only exists in the console
+        if self.console is None:
+            return self._result(
+                "Enable/Disable User",
+                user_data.get("username"),
+                "Enabling or disabling users needs a console session",
+            )
+        return self.console._enable_disable_user(user_data)
+
+    def _group_names(self):
+        """
+        Returns:
+            dict: group id -> group name of every group of the identity store
+        """
+        names = {}
+        paginator = self.client.get_paginator("list_groups")
+        for page in paginator.paginate(IdentityStoreId=self.identity_store_id):
+            for group in page["Groups"]:
+                names[group["GroupId"]] = group.get("DisplayName")
+        return names
+
+    def _read_memberships(self, usernames):
+        try:
+            group_names = self._group_names()
+        except self._client_errors() as e:
+            error = f"Erro: {traceback.format_exc()}\n{e}"
+            return {username: error for username in usernames}
+        memberships = {}
+        for username in usernames:
+            try:
+                user_id = self._user_id(username)
+                memberships[username] = None if user_id is None else {
+                    group_names.get(group_id, group_id) for group_id in self._memberships(user_id)
+                }
+            except self._client_errors() as e:
+                memberships[username] = f"Erro: {traceback.format_exc()}\n{e}"
+        return memberships
+
+    def _apply_group_changes(self, username, add, remove):
+        data = {"email": username, "add": add, "remove": remove}
+        try:
+            user_id = self._user_id(username)
+            if user_id is None:
+                return self._result("Apply Group Changes", data, f"User {username} not found")
+            memberships = self._memberships(user_id)
+            group_ids = self._group_ids(list(add) + list(remove))
+            for name in remove:
+                membership_id = memberships.get(group_ids.get(name))
+                if membership_id is not None:
+                    self.client.delete_group_membership(
+                        IdentityStoreId=self.identity_store_id, MembershipId=membership_id
+                    )
+            for name in add:
+                if name in group_ids and group_ids[name] not in memberships:
+                    self.client.create_group_membership(
+                        IdentityStoreId=self.identity_store_id,
+                        GroupId=group_ids[name],
+                        MemberId={"UserId": user_id},
+                    )
+        except self._client_errors() as e:
+            return self._result("Apply Group Changes", data, f"Erro: {traceback.format_exc()}\n{e}")
+        missing_groups = set(add).difference(group_ids)
+        if missing_groups:
+            return self._result("Apply Group Changes", data, f"Groups not found: {sorted(missing_groups)}")
+        return self._result("Apply Group Changes", data)
@@ -0,0 +1,125 @@
+import os
+
+from urllib3.exceptions import HTTPError as TransportError
+from selenium.common.exceptions import WebDriverException
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_rss(pid):
+    """Resident memory of a process, read from /proc
+
+    Returns:
+        int || None: bytes, None if the process is gone or /proc is not available
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def descendants(pid):
+    """Pids of every process started by pid, its children's children included
+
+    Returns:
+        list: pids, empty if /proc is not available
+    """
+    children = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as stat:
+                # the command name may hold spaces and parentheses, the fields after it don't
+                parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+    found, pending = [], [pid]
+    while pending:
+        for child in children.get(pending.pop(), []):
+            found.append(child)
+            pending.append(child)
+    return found
+
+
+def js_heap(driver):
+    """Used and total JS heap of the current page, through CDP
+
+    Returns:
+        dict: "used" and "total" bytes, None values if chrome didn't answer
+    """
+    try:
+        usage = driver.execute_cdp_cmd("Runtime.getHeapUsage", {})
+        return {"used": int(usage["usedSize"]), "total": int(usage["totalSize"])}
+    except (WebDriverException, TransportError, OSError, KeyError, TypeError, ValueError):
+        return {"used": None, "total": None}
+
+
+class MemoryGovernor:
+    """Samples chromedriver and chrome RSS and the JS heap after each operation, and tells when the browser
+    has to be recycled before the container runs out of memory"""
+
+    def __init__(self, max_rss_mb=None, max_operations=None):
+        """
+        Args:
+            max_rss_mb (float): chrome plus chromedriver resident memory, in MB, that triggers a recycle
+            max_operations (int): operations run by a browser before it is recycled
+        """
+        self.max_rss_mb = max_rss_mb
+        self.max_operations = max_operations
+        self.operations = 0
+        self.recycles = 0
+        self.peak_rss = 0
+        self.last = None
+
+    def sample(self, driver_pid, driver=None):
+        """Measure the browser after an operation
+
+        Args:
+            driver_pid (int): chromedriver pid, chrome runs as its descendants
+            driver (WebDriver): chrome driver the JS heap is read from
+
+        Returns:
+            dict: RSS of chromedriver and chrome in bytes, JS heap, operations since the last recycle and recycles
+        """
+        self.operations += 1
+        driver_rss = process_rss(driver_pid) if driver_pid else None
+        chrome_rss = None
+        if driver_pid:
+            chrome_rss = sum(rss for rss in map(process_rss, descendants(driver_pid)) if rss)
+        total = (driver_rss or 0) + (chrome_rss or 0)
+        self.peak_rss = max(self.peak_rss, total)
+        self.last = {
+            "chromedriver_rss": driver_rss,
+            "chrome_rss": chrome_rss,
+            "total_rss": total if driver_rss is not None else None,
+            "peak_rss": self.peak_rss,
+            "js_heap": js_heap(driver) if driver is not None else None,
+            "operations": self.operations,
+            "recycles": self.recycles,
+        }
+        return self.last
+
+    def should_recycle(self):
+        """
+        Returns:
+            string || None: why the browser must be recycled, None while it's under every threshold
+        """
+        if self.max_operations and self.operations >= self.max_operations:
+            return f"{self.operations} operations"
+        rss = (self.last or {}).get("total_rss")
+        if self.max_rss_mb and rss and rss >= self.max_rss_mb * 1024 * 1024:
+            return f"RSS {rss / 1024 / 1024:.0f} MB"
+        return None
+
+    def recycled(self):
+        """Start counting again for a new browser"""
+        self.operations = 0
+        self.recycles += 1
+        self.last = None
@@ -0,0 +1,144 @@
+import re
+import contextlib
+from urllib.parse import unquote
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from waits import TimedWait
+
+# hash routes of the console app, most specific first
+ROUTES = (
+    ("add_user_wizard", re.compile(r"^#!/users\$addUserWizard$")),
+    ("user_add_to_groups", re.compile(r"^#!/users/(?P<name>.+)\$addToGroups$")),
+    ("user", re.compile(r"^#!/users/(?P<name>.+)$")),
+    ("users", re.compile(r"^#!/users$")),
+    ("group_add_users", re.compile(r"^#!/groups/(?P<name>.+)\$addUsers$")),
+    ("group", re.compile(r"^#!/groups/(?P<name>.+)$")),
+    ("groups", re.compile(r"^#!/groups$")),
+)
+# element each route renders, replaced when the app renders another route
+LANDMARKS = {
+    "users": "//*[@id='sso-users-main-table']",
+    "add_user_wizard": "//*[@id='add-user-wizard']",
+    "user": "//*[@id='user-overview-card']",
+    "user_add_to_groups": "//*[@id='sso-groups-main-table']",
+    "groups": "//*[@id='sso-groups-main-table']",
+    "group": "//*[@id='sso-group-members-table']",
+    "group_add_users": "//*[@id='sso-group-add-users-table']",
+}
+
+
+def parse_route(url):
+    """
+    Returns:
+        tuple: route name and the user or group it is about, (None, None) if the URL is not a console route
+    """
+    fragment = unquote(url.partition("#")[2])
+    for name, pattern in ROUTES:
+        match = pattern.match(f"#{fragment}")
+        if match:
+            return name, match.groupdict().get("name")
+    return None, None
+
+
+class ConsoleNavigator:
+    """Moves between the routes of the console single page app by changing its hash, as its own links do,
+    instead of loading the whole app again. Going to the rendered route the app is on does nothing unless fresh data
+    is asked for. A hard load is only done then, when the browser isn't on a rendered route of the app,
+    or when the app doesn't render the new route in time
+    """
+
+    def __init__(self, driver, wait, settle_timeout=5):
+        """
+        Args:
+            driver (WebDriver): chrome driver
+            wait (waits.TimedWait): waiter whose stats and tracer the navigation waits share
+            settle_timeout (int): seconds the app has to render the new route before falling back to a reload
+        """
+        self.driver = driver
+        self.tracer = wait.tracer
+        self.settle = TimedWait(driver, settle_timeout, stats=wait.stats, tracer=wait.tracer)
+        self.reset()
+
+    def reset(self):
+        self.stats = {"in_app": 0, "stayed": 0, "reloads": 0, "fallbacks": 0}
+
+    def summary(self):
+        """
+        Returns:
+            dict: in-app navigations, navigations to the route already shown, reloads done,
+                in-app tries that had to reload and the full reloads avoided
+        """
+        return dict(self.stats, reloads_avoided=self.stats["in_app"] + self.stats["stayed"])
+
+    def _span(self, url):
+        """Navigation span of the moves the driver's event listener doesn't see: hash changes and refreshes"""
+        if self.tracer is None:
+            return contextlib.nullcontext()
+        return self.tracer.span("navigation", url)
+
+    @property
+    def route(self):
+        """
+        Returns:
+            tuple: name of the current route and the user or group it is about
+        """
+        return parse_route(self.driver.current_url)
+
+    def _landmark(self, route_name):
+        """The rendered landmark of a route, None if the app doesn't show it"""
+        if route_name not in LANDMARKS:
+            return None
+        elements = self.driver.find_elements(By.XPATH, LANDMARKS[route_name])
+        return elements[0] if elements else None
+
+    def go(self, url, reload=False, fresh=False):
+        """Show the page at url, in-app when the browser is already on a rendered route of the console app
+
+        Args:
+            url (string): console URL, with its hash route
+            reload (bool): load the page even if it could be reached in-app
+            fresh (bool): reload the route if the app is already on it, for callers that need its data again
+        """
+        current = self.driver.current_url
+        base, _, fragment = url.partition("#")
+        target, _ = parse_route(url)
+        if not reload and target and current.partition("#")[0] == base:
+            # the app state is only known when the current route is rendered
+            landmark = self._landmark(parse_route(current)[0])
+            if landmark is not None and current == url and not fresh:
+                self.stats["stayed"] += 1
+                return
+            if landmark is not None and current != url:
+                with self._span(url):
+                    rendered = self._go_in_app(landmark, fragment, target)
+                if rendered:
+                    self.stats["in_app"] += 1
+                    return
+                print("Console app didn't render the route, loading it again...\n")
+                self.stats["fallbacks"] += 1
+        if current == url:
+            # a get of the same URL with a hash is a same document navigation, not a reload
+            with self._span(url):
+                self.driver.refresh()
+        else:
+            self.driver.get(url)
+        self.stats["reloads"] += 1
+
+    def _go_in_app(self, landmark, fragment, target):
+        """Change the route and wait for the app to replace the current page with the target's landmark
+
+        Returns:
+            bool: True if the app rendered the route
+        """
+        self.driver.execute_script("window.location.hash = arguments[0];", fragment)
+        try:
+            self.settle.until(EC.staleness_of(landmark), label="console route left")
+            self.settle.until(
+                EC.presence_of_element_located((By.XPATH, LANDMARKS[target])), label="console route rendered"
+            )
+        except TimeoutException:
+            return False
+        return True
@@ -0,0 +1,199 @@
+import os
+import json
+
+from urllib3.exceptions import HTTPError as TransportError
+from selenium.common.exceptions import WebDriverException
+
+# telemetry, cookie banner and marketing requests of the AWS console
+DEFAULT_URL_PATTERNS = (
+    "*panorama*",
+    "*analytics.console.aws.a2z.com*",
+    "*/shortbread/*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+)
+DEFAULT_RESOURCE_TYPES = ("Image", "Font", "Media")
+# Network.setBlockedURLs only matches URLs, so the resource types are blocked by file extension
+RESOURCE_TYPE_PATTERNS = {
+    "Image": ("*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.svg*", "*.webp*", "*.ico*"),
+    "Font": ("*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"),
+    "Media": ("*.mp4*", "*.webm*", "*.mp3*", "*.ogg*"),
+    "Stylesheet": ("*.css*",),
+}
+# loadingFailed error of the requests cancelled by Network.setBlockedURLs
+BLOCKED_ERRORS = ("net::ERR_BLOCKED_BY_CLIENT",)
+
+
+class BlockingProfile:
+    """Requests chrome must not make, applied through the DevTools protocol when the driver starts"""
+
+    def __init__(
+        self,
+        url_patterns=DEFAULT_URL_PATTERNS,
+        resource_types=DEFAULT_RESOURCE_TYPES,
+        page_load_strategy="eager",
+        enabled=True,
+        sizes_path=None,
+    ):
+        """
+        Args:
+            url_patterns (tuple): URL patterns to block, "*" matching any characters
+            resource_types (tuple): DevTools resource types to block, keys of RESOURCE_TYPE_PATTERNS
+            page_load_strategy (string): "eager" makes driver.get return on DOMContentLoaded, "normal" on load
+            enabled (bool): block at all. The page load strategy is applied anyway
+            sizes_path (string): JSON file of the sizes of the resources loaded, written by runs without blocking
+                and read by the blocking ones to report the bytes saved. Not reported when not provided
+        """
+        unknown = set(resource_types) - set(RESOURCE_TYPE_PATTERNS)
+        if unknown:
+            raise ValueError(f"Cannot block the resource types {sorted(unknown)}")
+        self.url_patterns = tuple(url_patterns)
+        self.resource_types = tuple(resource_types)
+        self.page_load_strategy = page_load_strategy
+        self.enabled = enabled
+        self.sizes_path = sizes_path
+
+    @property
+    def patterns(self):
+        patterns = list(self.url_patterns)
+        for resource_type in self.resource_types:
+            patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        return patterns
+
+    def configure(self, options):
+        """Set the chrome options the profile needs, before the driver is created"""
+        options.page_load_strategy = self.page_load_strategy
+
+    def apply(self, driver):
+        """Start blocking on the driver's page, for every navigation from now on"""
+        if not self.enabled:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+
+
+class PerformanceLog:
+    """Hands the DevTools events of chrome's performance log out to every consumer subscribed.
+
+    chromedriver returns each log entry only once, so readers subscribe here instead of calling get_log.
+    The driver must be started with the "goog:loggingPrefs" capability set to {"performance": "ALL"}.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.handlers = {}
+
+    def subscribe(self, method, handler):
+        """
+        Args:
+            method (string): DevTools event, e.g. "Network.loadingFinished"
+            handler (function): called with the event params
+        """
+        self.handlers.setdefault(method, []).append(handler)
+
+    def drain(self):
+        """Dispatch the events logged since the previous drain
+
+        Returns:
+            int: number of log entries read
+        """
+        try:
+            entries = self.driver.get_log("performance")
+        except (WebDriverException, TransportError, OSError):
+            # chromedriver gone, the events are lost with it
+            return 0
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            for handler in self.handlers.get(message["method"], ()):
+                handler(message.get("params", {}))
+        return len(entries)
+
+
+class NetworkStats:
+    """Requests made, bytes downloaded and requests blocked by the page, from the performance log.
+
+    The bytes saved are those of the blocked resources whose size was seen when they were not blocked,
+    in a run with the blocking disabled that wrote them to the sizes file, so they are a lower bound.
+    """
+
+    def __init__(self, log, max_known_sizes=5000, sizes_path=None):
+        """
+        Args:
+            log (PerformanceLog): events source
+            max_known_sizes (int): resources whose size is remembered
+            sizes_path (string): file the known sizes are read from and saved to. Without it the bytes saved
+                are not reported
+        """
+        self.log = log
+        self.max_known_sizes = max_known_sizes
+        self.sizes_path = sizes_path
+        self.known_sizes = {}
+        if sizes_path and os.path.exists(sizes_path):
+            with open(sizes_path) as sizes_file:
+                self.known_sizes = json.load(sizes_file)
+        self.pending = {}
+        self.reset()
+        log.subscribe("Network.requestWillBeSent", self._request_sent)
+        log.subscribe("Network.loadingFinished", self._loading_finished)
+        log.subscribe("Network.loadingFailed", self._loading_failed)
+
+    def save(self):
+        """Write the known sizes to the sizes file, keeping the ones other runs wrote"""
+        if not self.sizes_path:
+            return
+        self.log.drain()
+        sizes = {}
+        if os.path.exists(self.sizes_path):
+            with open(self.sizes_path) as sizes_file:
+                sizes = json.load(sizes_file)
+        sizes.update(self.known_sizes)
+        temporary_path = f"{self.sizes_path}.tmp"
+        with open(temporary_path, "w") as sizes_file:
+            json.dump(sizes, sizes_file)
+        os.replace(temporary_path, self.sizes_path)
+
+    def reset(self):
+        """Forget the requests of the previous operation"""
+        self.log.drain()
+        self.pending.clear()
+        self.requests = 0
+        self.bytes_loaded = 0
+        self.blocked = {}
+        self.bytes_saved = 0
+
+    def _request_sent(self, params):
+        self.requests += 1
+        # cache busting query strings would make every load of a resource a new one
+        self.pending[params["requestId"]] = params["request"]["url"].split("?")[0]
+
+    def _loading_finished(self, params):
+        url = self.pending.pop(params["requestId"], None)
+        size = int(params.get("encodedDataLength") or 0)
+        self.bytes_loaded += size
+        if url is not None and (url in self.known_sizes or len(self.known_sizes) < self.max_known_sizes):
+            self.known_sizes[url] = size
+
+    def _loading_failed(self, params):
+        url = self.pending.pop(params["requestId"], None)
+        if params.get("blockedReason") != "inspector" and params.get("errorText") not in BLOCKED_ERRORS:
+            return
+        resource_type = params.get("type", "Other")
+        self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+        self.bytes_saved += self.known_sizes.get(url, 0)
+
+    def summary(self):
+        """
+        Returns:
+            dict: network usage since the last reset
+        """
+        self.log.drain()
+        summary = {
+            "requests": self.requests,
+            "bytes_loaded": self.bytes_loaded,
+            "requests_blocked": sum(self.blocked.values()),
+            "blocked_by_type": dict(self.blocked),
+        }
+        if self.sizes_path:
+            summary["bytes_saved"] = self.bytes_saved
+        return summary
@@ -0,0 +1,128 @@
+import os
+import time
+import zlib
+import multiprocessing
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import sso
+from backend import aggregate_results, build_payload, format_results
+
+
+def shard_users(users, workers):
+    """Split the users in at most `workers` shards by email, so every task of a user runs in order on one worker
+
+    Args:
+        users (list): user dicts
+        workers (int): number of chrome instances available
+
+    Returns:
+        list: non empty lists of users
+    """
+    shards = [[] for _ in range(workers)]
+    for user in users:
+        # crc32 rather than hash(), which changes between interpreters
+        email = (user.get("email") or "").strip().lower()
+        shards[zlib.crc32(email.encode()) % workers].append(user)
+    return [shard for shard in shards if shard]
+
+
+def worker_credentials(credentials, worker_index):
+    """sso.SSO keyword arguments of one worker of many
+
+    Args:
+        credentials (dict): keyword arguments shared by the workers
+        worker_index (int): index of the worker
+
+    Returns:
+        dict: the credentials, with a profile_dir of the worker's own when one is set
+    """
+    if credentials.get("profile_dir"):
+        # chrome locks its profile, so each worker keeps its own one
+        credentials = dict(
+            credentials,
+            profile_dir=os.path.join(credentials["profile_dir"], f"worker-{worker_index}"),
+        )
+    return credentials
+
+
+def _failed_results(users, default_task, operation_name, error):
+    return [
+        {
+            "email": user.get("email"),
+            "task": user.get("task") or default_task,
+            "status": "incomplete",
+            "operation_name": operation_name,
+            "error": error,
+            "execution_time": 0,
+        }
+        for user in users
+    ]
+
+
+def run_shard(credentials, users, default_task, worker_index=0):
+    """Worker entry point: start its own chrome, log in and run the users of its shard
+
+    Args:
+        credentials (dict): keyword arguments for sso.SSO
+        users (list): user dicts of the shard
+        default_task (string): task used when the user doesn't have one
+        worker_index (int): index of the worker, used to give it its own persistent profile
+
+    Returns:
+        list: per-user results
+    """
+    try:
+        with sso.SSO(**worker_credentials(credentials, worker_index)) as session:
+            login = session.login()
+            execution = login.get("body").get("execution")
+            if execution.get("status") != "complete":
+                return _failed_results(
+                    users, default_task, "AWS SSO Login", execution.get("jobs").get("result")
+                )
+            return session.run_users(build_payload(users), default_task).get("results")
+    except Exception as e:
+        error = f"Erro: {traceback.format_exc()}\n{e}"
+        print("Something went wrong while starting the worker\n")
+        return _failed_results(users, default_task, "SSO Worker", error)
+
+
+class SSOPool:
+    """Pool of isolated chrome instances, each one with its own port, profile and logged in session"""
+
+    def __init__(self, workers=None, **credentials):
+        """
+        Args:
+            workers (int): number of chrome instances. Defaults to the number of cpus
+            credentials: keyword arguments for sso.SSO
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+        self.credentials = credentials
+
+    def run(self, data, default_task="create"):
+        """Shard the users of the payload across the workers and merge their results
+
+        Args:
+            data (dict): payload with the users
+            default_task (string): task used when the user doesn't have one
+
+        Returns:
+            dict: response in the same format of the decorated SSO operations
+        """
+        start_time = time.time()
+        users = sso.SSO.parse_users(data)
+        shards = shard_users(users, self.workers)
+        results = []
+        if shards:
+            # spawn, so each worker gets a clean interpreter instead of a copy of the parent driver state
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=len(shards), mp_context=context) as executor:
+                futures = [
+                    executor.submit(run_shard, self.credentials, shard, default_task, index)
+                    for index, shard in enumerate(shards)
+                ]
+                for future in futures:
+                    results.extend(future.result())
+        result = aggregate_results(
+            results, f"{default_task.capitalize()} Users")
+        return format_results(result, time.time() - start_time)
@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+
+from backend import aggregate_results, format_results
+
+# target.process_id -> backend method taking the whole envelope
+BATCH_PROCESSES = {
+    "SSO.create_user": "create_user",
+    "SSO.update_user": "update_user",
+    "SSO.delete_user": "delete_user",
+    "SSO.reconcile_groups": "reconcile_groups",
+    "SSO.assign_groups": "assign_groups",
+}
+# target.process_id -> backend method called once per user of the envelope, with the input built from the user
+SINGLE_USER_PROCESSES = {
+    "SSO.enable_disable_user": (
+        "enable_disable_user",
+        lambda user: {"username": user.get("email"), "action": user.get("action")},
+    ),
+    "SSO.sso_group_checker": (
+        "sso_group_checker",
+        lambda user: {"email": user.get("email"), "groups": user.get("groups") or []},
+    ),
+}
+
+
+def read_envelopes(source):
+    """Lazily parse a JSON lines stream of job envelopes
+
+    Args:
+        source (file): text file like object, one envelope per line
+
+    Yields:
+        tuple: line number, starting at 1, and the envelope, or the ValueError of a line that isn't a JSON object
+    """
+    for line_number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            envelope = json.loads(line)
+        except ValueError as e:
+            envelope = e
+        if not isinstance(envelope, (dict, ValueError)):
+            envelope = ValueError(f"Expected a JSON object, got {type(envelope).__name__}")
+        yield line_number, envelope
+
+
+def last_line(path, block_size=65536):
+    """Last complete line of a file, read from the end so the file is never loaded whole
+
+    Returns:
+        tuple: the line (None if there is no complete line) and the size of the file up to its end.
+            A crash while writing may leave a partial line after it
+    """
+    if not os.path.exists(path):
+        return None, 0
+    with open(path, "rb") as lines_file:
+        lines_file.seek(0, os.SEEK_END)
+        end = lines_file.tell()
+        position = end
+        while position > 0:
+            position = max(0, position - block_size)
+            lines_file.seek(position)
+            tail = lines_file.read(end - position)
+            if b"\n" not in tail:
+                continue
+            complete = tail[:tail.rfind(b"\n")]
+            if b"\n" in complete or position == 0:
+                return complete[complete.rfind(b"\n") + 1:].decode(), position + len(complete) + 1
+    return None, 0
+
+
+def ensure_logged_in(session):
+    """Log the backend in unless it already is
+
+    Raises:
+        RuntimeError: the login failed
+    """
+    if getattr(session, "logged_in", False):
+        return
+    login = session.login()
+    execution = login.get("body").get("execution")
+    if execution.get("status") != "complete":
+        raise RuntimeError(f"Login failed: {execution.get('jobs').get('result')}")
+
+
+def dispatch(session, envelope):
+    """Run the operation named by the envelope's target.process_id
+
+    Args:
+        session (backend.SSOBackend): logged in backend
+        envelope (dict): job envelope, as in input.json
+
+    Returns:
+        dict: response of the operation
+    """
+    process_id = (envelope.get("target") or {}).get("process_id")
+    if process_id in BATCH_PROCESSES:
+        return getattr(session, BATCH_PROCESSES[process_id])(envelope)
+    if process_id in SINGLE_USER_PROCESSES:
+        method_name, build_input = SINGLE_USER_PROCESSES[process_id]
+        start_time = time.time()
+        results = []
+        for user in session.parse_users(envelope):
+            execution = getattr(session, method_name)(build_input(user)).get("body").get("execution")
+            results.append(
+                {
+                    "email": user.get("email"),
+                    "task": method_name,
+                    "status": execution.get("status"),
+                    "operation_name": execution.get("jobs").get("status"),
+                    "error": None if execution.get("status") == "complete" else execution.get("jobs").get("result"),
+                    "execution_time": execution.get("execution_time"),
+                }
+            )
+        return format_results(aggregate_results(results, process_id), time.time() - start_time)
+    return format_results(
+        {
+            "error": f"Unknown process_id '{process_id}'",
+            "operation_name": "Job Runner",
+            "operation_status": "incomplete",
+            "data": [],
+        },
+        0,
+    )
+
+
+class Checkpoint:
+    """Line of the last job done of each run_id, in a JSON file replaced atomically after every job"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (string): checkpoint file, created on the first job done
+        """
+        self.path = path
+        self.lines = {}
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.lines = json.load(checkpoint_file)
+
+    def is_done(self, run_id, line_number):
+        return line_number <= self.lines.get(str(run_id), 0)
+
+    def mark(self, run_id, line_number):
+        self.lines[str(run_id)] = line_number
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as checkpoint_file:
+            json.dump(self.lines, checkpoint_file)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary_path, self.path)
+
+
+class JobRunner:
+    """Run a stream of job envelopes on one logged in backend, writing each result as soon as it is done.
+
+    The result is written before the checkpoint moves. If the process dies between both, the last result
+    written is used to catch the checkpoint up on resume, so no finished job runs twice.
+    """
+
+    def __init__(self, session, output_path, checkpoint_path):
+        """
+        Args:
+            session (backend.SSOBackend): backend the jobs run on, logged in on the first job
+            output_path (string): JSON lines file the results are appended to
+            checkpoint_path (string): checkpoint file
+        """
+        self.session = session
+        self.output_path = output_path
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.stats = {"done": 0, "skipped": 0, "incomplete": 0}
+        self._recover()
+
+    def _recover(self):
+        line, size = last_line(self.output_path)
+        if os.path.exists(self.output_path) and os.path.getsize(self.output_path) > size:
+            # drop the partial result of a crash, its job wasn't checkpointed and runs again
+            with open(self.output_path, "r+b") as output:
+                output.truncate(size)
+        if not line:
+            return
+        result = json.loads(line)
+        if not self.checkpoint.is_done(result["run_id"], result["line"]):
+            self.checkpoint.mark(result["run_id"], result["line"])
+
+    def dispatch(self, envelope):
+        return dispatch(self.session, envelope)
+
+    def run(self, source):
+        """Run every envelope of the stream not done yet
+
+        Args:
+            source (file): JSON lines stream of envelopes
+
+        Returns:
+            dict: number of jobs done, skipped because already done, and incomplete
+        """
+        with open(self.output_path, "a") as output:
+            for line_number, envelope in read_envelopes(source):
+                if isinstance(envelope, ValueError):
+                    run_id, process_id = None, None
+                else:
+                    run_id = (envelope.get("source") or {}).get("run_id")
+                    process_id = (envelope.get("target") or {}).get("process_id")
+                if self.checkpoint.is_done(run_id, line_number):
+                    self.stats["skipped"] += 1
+                    continue
+                # a failed login stops the run before any job is marked done, the others fail on their own
+                ensure_logged_in(self.session)
+                start_time = time.time()
+                try:
+                    if isinstance(envelope, ValueError):
+                        raise envelope
+                    result = self.dispatch(envelope)
+                except Exception as e:
+                    result = format_results(
+                        {
+                            "error": f"Erro: {traceback.format_exc()}\n{e}",
+                            "operation_name": "Job Runner",
+                            "operation_status": "incomplete",
+                            "data": process_id,
+                        },
+                        time.time() - start_time,
+                    )
+                output.write(
+                    json.dumps(
+                        {
+                            "run_id": run_id,
+                            "line": line_number,
+                            "process_id": process_id,
+                            "result": result,
+                        }
+                    )
+                    + "\n"
+                )
+                output.flush()
+                os.fsync(output.fileno())
+                self.checkpoint.mark(run_id, line_number)
+                self.stats["done"] += 1
+                if result.get("body").get("execution").get("status") != "complete":
+                    self.stats["incomplete"] += 1
+        return self.stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a JSON lines stream of SSO job envelopes")
+    parser.add_argument("input", help="JSON lines file of envelopes, - for stdin")
+    parser.add_argument("--output", default="results.jsonl", help="JSON lines file the results are appended to")
+    parser.add_argument("--checkpoint", default="checkpoint.json", help="checkpoint file used to resume")
+    parser.add_argument("--store", help="SQLite result store, users already done there are skipped")
+    parser.add_argument("--max-rss-mb", type=float, help="chrome memory, in MB, after which the browser is recycled")
+    parser.add_argument("--max-operations", type=int, help="operations after which the browser is recycled")
+    args = parser.parse_args()
+
+    import sso
+    from store import ResultStore
+    from memory import MemoryGovernor
+
+    memory = MemoryGovernor(max_rss_mb=args.max_rss_mb, max_operations=args.max_operations)
+    with sso.SSO(memory=memory) as session:
+        if args.store:
+            session.store = ResultStore(args.store)
+        runner = JobRunner(session, args.output, args.checkpoint)
+        if args.input == "-":
+            print(runner.run(sys.stdin))
+        else:
+            with open(args.input) as input_file:
+                print(runner.run(input_file))
@@ -1,66 +1,157 @@
 import time
-import requests
 import json
 import traceback
-import functools
+import os
+import socket
 from tempfile import mkdtemp
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support.events import EventFiringWebDriver
 from selenium.common.exceptions import (
     NoSuchElementException,
     WebDriverException,
     TimeoutException,
 )
+from urllib3.exceptions import HTTPError as TransportError
+from waits import (
+    TimedWait,
+    button_enabled,
+    install_xhr_tracker,
+    no_pending_xhr,
+    table_row_count_stable,
+    wizard_step_changed,
+)
+from tables import select_rows, snapshot_table
+from forms import field, fill_form, type_fields
+from directory import NEXT_PAGE_BUTTON_XPATH, USERS_TBODY_XPATH, UserDirectory, first_row_changed
+from backend import SSOBackend, results_info
+from tracing import Tracer, TracingListener
+from network import BlockingProfile, NetworkStats, PerformanceLog
+from capture import ConsoleCapture
+from memory import MemoryGovernor
+from navigator import ConsoleNavigator
+from steps import StepCheckpoints, run_step
+
+GROUPS_TBODY_XPATH = '//*[@id="sso-groups-main-table"]/div[2]/div[1]/table/tbody'
+WIZARD_PRIMARY_BUTTON_XPATH = '//*[@id="add-user-wizard"]/div/div/div[2]/div[3]/div/div/div/div/div[3]/button'
+USER_GROUPS_TAB_XPATH = '//*[@id="app"]/div/div/div/div/main/div/div[3]/div/div/div/div[4]/div/div[1]/span/ul/li[2]/button'
+REMOVE_GROUPS_BUTTON_XPATH = '//*[@id="sso-groups-main-table"]/div[1]/div/div[1]/div[2]/div/div[1]/button/span'
+REMOVE_GROUPS_CONFIRM_XPATH = "/html/body/div[5]/div/div[3]/div/div/div[3]/div/div/div[2]/button/span"
+ADD_TO_GROUPS_LINK_XPATH = '//*[@id="sso-groups-main-table"]/div[1]/div/div[1]/div[2]/div/div[2]/a/span'
+ADD_TO_GROUPS_BUTTON_XPATH = '//*[@id="app"]/div/div/div/div/main/div/div[3]/div/div/div/div[3]/div/div/div[2]/button'
+GROUPS_SEARCH_XPATH = "//input[@placeholder='Find groups by group name']"
+GROUP_MEMBERS_TBODY_XPATH = "//*[@id='sso-group-members-table']/div[2]/div[1]/table/tbody"
+ADD_USERS_TO_GROUP_LINK_XPATH = "//a[@data-testid='add-users-to-group-button']"
+ADD_USERS_TBODY_XPATH = "//*[@id='sso-group-add-users-table']/div[2]/div[1]/table/tbody"
+ADD_USERS_SEARCH_XPATH = "//*[@id='sso-group-add-users-table']//input[@type='search']"
+ADD_USERS_SUBMIT_XPATH = "//button[@data-testid='add-users-to-group-submit']"
+RESET_PASSWORD_BUTTON_XPATH = "//button[@data-testid='reset-password-button']"
+RESET_PASSWORD_OTP_XPATH = "//*[@id='reset-password-modal']//input[@value='OTP']"
+RESET_PASSWORD_SUBMIT_XPATH = "//button[@data-testid='reset-password-submit']"
+# a stopped chromedriver fails with connection errors instead of WebDriverExceptions
+DRIVER_ERRORS = (WebDriverException, TransportError, OSError)
+
 
+def free_port():
+    """Ask the OS for a port nobody is listening to
 
-def results_info(f):
-    """ log executions time and better format some result status of the function passed as a parameter
-    Args:
-        f (function): method
     Returns:
-        function: decorated function
+        int: port number
     """
-    @functools.wraps
-    def wrapper(self, *args, **kwargs):
-        start_time = time.time()
-        result = f(self, *args, **kwargs)
-        execution_time = time.time() - start_time
-        response = {
-            "body": {
-                "execution": {
-                    "status": result.get("operation_status"),
-                    "execution_time": execution_time,
-                    "jobs": {
-                        "status": f"{result.get('operation_name')} with {result.get('data')}",
-                        "result": f"Erros: {result.get('error')}",
-                    },
-                }
-            }
-        }
-        self.driver.close()
-        return response
-    return wrapper
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
 
 
-class SSO:
-    user_management_url = "https://us-east-1.console.aws.amazon.com/singlesignon/identity/home?region=us-east-1#!/users",
-    binary_path = r"/opt/chrome",
-    chromedriver_path = r"/opt/chromedriver",
+class SSO(SSOBackend):
+    user_management_url = "https://us-east-1.console.aws.amazon.com/singlesignon/identity/home?region=us-east-1#!/users"
+    console_home_url = "https://us-east-1.console.aws.amazon.com/console/home?region=us-east-1"
+    binary_path = r"/opt/chrome"
+    chromedriver_path = r"/opt/chromedriver"
+    # users ticked before each delete confirmation
+    delete_batch_size = 50
+    # tries of each step of the user creation, and seconds before the first retry, doubled before each next one
+    step_attempts = 3
+    step_backoff = 2.0
 
     def __init__(
         self,
         username="username",
         password="password",
         account_id="account_id",
+        remote_debugging_port=None,
+        single_process=True,
+        directory_ttl=300,
+        profile_dir=None,
+        tracer=None,
+        login_url=None,
+        blocking=None,
+        capture_network=False,
+        memory=None,
     ):
+        """
+        Args:
+            username (string): AWS console user
+            password (string): AWS console password
+            account_id (string): AWS account id
+            remote_debugging_port (int): chrome debugging port. A free one is picked when not provided, so several instances can share the host
+            single_process (bool): run chrome with --single-process, as needed in lambda containers
+            directory_ttl (int): seconds the users index is reused before walking the users table again
+            profile_dir (string): opt-in directory where the chrome profile, disk cache and console cookies are kept between runs,
+                so a still valid session skips the login. Temporary dirs are used when not provided
+            tracer (tracing.Tracer): receives a span for each navigation, wait, find, click, send_keys and script.
+                A new one is created when not provided
+            login_url (string): sign in page. Defaults to the account console sign in, override it to target a stand-in console
+            blocking (network.BlockingProfile): requests chrome doesn't make and page load strategy.
+                Images, fonts, media and telemetry are blocked when not provided
+            capture_network (bool): read users, groups, memberships and status from the JSON answers the console
+                app receives instead of from the rendered tables, wherever an operation has the answer
+            memory (memory.MemoryGovernor): samples chrome memory after each operation and sets when the browser is
+                recycled between operations. Only samples when not provided
+        """
+        self.remote_debugging_port = remote_debugging_port
+        self.single_process = single_process
+        self.profile_dir = profile_dir
+        self.session_cache = {"hits": 0, "misses": 0}
+        self.tracer = tracer or Tracer()
         self.__username = username
         self.__password = password
         self.__account_id = account_id
-        self.__url = f"https://{self.__account_id}.signin.aws.amazon.com/console",
+        self.__url = login_url or f"https://{self.__account_id}.signin.aws.amazon.com/console"
+        self.blocking = blocking or BlockingProfile()
+        self.form_stats = {"scripted": 0, "fallback": 0}
+        self.capture_network = capture_network
+        self.capture = None
+        self._checkpoints = None
+        self.memory = memory or MemoryGovernor()
+        self.driver = None
+        self.aborted = False
+        self.logged_in = False
+        self.directory = UserDirectory(self, ttl=directory_ttl)
+        self._start_driver()
+
+    def trace_labels(self, **labels):
+        return self.tracer.labels(**labels)
+
+    def reset_stats(self):
+        self.wait.stats.reset()
+        self.network.reset()
+        self.navigator.reset()
+        self.form_stats = {"scripted": 0, "fallback": 0}
+
+    def operation_stats(self):
+        return {
+            "waits": self.wait.stats.summary(),
+            "network": self.network.summary(),
+            "forms": dict(self.form_stats),
+            "navigation": self.navigator.summary(),
+            "memory": self.memory.sample(self.chromedriver_pid, self.driver.wrapped_driver),
+        }
 
+    def _start_driver(self):
+        """Launch chrome and the waiter used by every operation"""
         print("Configuring chrome options... \n")
 
         options = Options()
@@ -69,34 +160,216 @@ class SSO:
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-gpu")
         options.add_argument("--window-size=1280x1696")
-        options.add_argument("--single-process")
+        if self.single_process:
+            options.add_argument("--single-process")
         options.add_argument("--disable-dev-shm-usage")
         options.add_argument("--disable-dev-tools")
         options.add_argument("--no-zygote")
         options.add_argument("--lang=en")
         options.add_argument("--start-maximized")
-        options.add_argument(f"--user-data-dir={mkdtemp()}")
-        options.add_argument(f"--data-path={mkdtemp()}")
-        options.add_argument(f"--disk-cache-dir={mkdtemp()}")
-        options.add_argument("--remote-debugging-port=9222")
+        options.add_argument(f"--user-data-dir={self._profile_path('user-data')}")
+        options.add_argument(f"--data-path={self._profile_path('data')}")
+        options.add_argument(f"--disk-cache-dir={self._profile_path('cache')}")
+        port = self.remote_debugging_port or free_port()
+        options.add_argument(f"--remote-debugging-port={port}")
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        self.blocking.configure(options)
 
         print("Options configured...\nStarting chrome...\n")
-        self.driver = webdriver.Chrome(
+        start_time = time.perf_counter()
+        driver = webdriver.Chrome(
             executable_path=self.chromedriver_path, options=options
         )
-        self.wait = WebDriverWait(self.driver, 30)
+        self.timings = {"chrome_spawn": time.perf_counter() - start_time}
+        self.chromedriver_pid = driver.service.process.pid
+        install_xhr_tracker(driver)
+        self.blocking.apply(driver)
+        self.driver = EventFiringWebDriver(driver, TracingListener(self.tracer))
+        self.aborted = False
+        performance_log = PerformanceLog(driver)
+        self.network = NetworkStats(performance_log, sizes_path=self.blocking.sizes_path)
+        if self.capture_network:
+            self.capture = ConsoleCapture(driver, performance_log)
+        self.wait = TimedWait(self.driver, 30, tracer=self.tracer)
+        self.navigator = ConsoleNavigator(self.driver, self.wait)
         print("Chrome started!\n")
 
+    def captured(self):
+        """
+        Returns:
+            capture.ConsoleData || None: console data received so far, None when not capturing
+        """
+        if self.capture is None:
+            return None
+        return self.capture.refresh()
+
+    def _profile_path(self, name):
+        """Directory inside the persistent profile, or a throwaway one when there is no profile"""
+        if not self.profile_dir:
+            return mkdtemp()
+        path = os.path.join(self.profile_dir, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @property
+    def cookies_path(self):
+        return os.path.join(self.profile_dir, "cookies.json")
+
+    def save_session(self):
+        """Store every console cookie in the profile, including the session ones chrome doesn't keep on disk"""
+        if not self.profile_dir:
+            return
+        cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies")
+        # the cookies are the console session, readable by the owner only
+        descriptor = os.open(self.cookies_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # the mode of os.open only applies to new files
+        os.fchmod(descriptor, 0o600)
+        with os.fdopen(descriptor, "w") as cookies_file:
+            json.dump(cookies, cookies_file)
+
+    def restore_session(self):
+        """Reuse the stored console session if the console still accepts it
+
+        Returns:
+            bool: True if the browser is logged in without going through the login form
+        """
+        if not self.profile_dir or not os.path.exists(self.cookies_path):
+            return False
+        print("Restoring previous AWS session...\n")
+        try:
+            with open(self.cookies_path) as cookies_file:
+                cookies = json.load(cookies_file)
+            self.driver.execute_cdp_cmd("Network.setCookies", {"cookies": cookies})
+            self._navigate(self.console_home_url)
+            self.wait.until(
+                EC.any_of(
+                    EC.title_is("AWS Management Console"),
+                    EC.presence_of_element_located((By.ID, "username")),
+                ),
+                label="session restore check",
+            )
+            return self.driver.title == "AWS Management Console"
+        except (ValueError, TimeoutException, WebDriverException):
+            print("Stored session could not be restored\n")
+            return False
+
+    def is_alive(self):
+        """Check if chrome and chromedriver still answer to commands
+
+        Returns:
+            bool: True if the browser is responsive
+        """
+        if self.driver is None or self.aborted:
+            return False
+        try:
+            self.driver.current_url
+        except DRIVER_ERRORS:
+            return False
+        return True
+
+    def sample_memory(self):
+        if self.driver is not None:
+            self.memory.sample(self.chromedriver_pid, self.driver.wrapped_driver)
+
+    def ensure_session(self):
+        """Restart chrome if it has died or the memory governor asks for a fresh one,
+        logging in again if the previous session was authenticated
+
+        Returns:
+            bool: True if the browser was restarted
+        """
+        if not self.is_alive():
+            print("Chrome is not responding. Restarting...\n")
+        else:
+            reason = self.memory.should_recycle()
+            if reason is None:
+                return False
+            print(f"Recycling chrome after {reason}...\n")
+            if self.logged_in:
+                try:
+                    self.save_session()
+                except DRIVER_ERRORS:
+                    pass
+        self._quit_driver()
+        self._start_driver()
+        self.memory.recycled()
+        if self.logged_in:
+            self.logged_in = False
+            self._login()
+        return True
+
+    def abort(self):
+        """Shut chrome down under the running operation, which then fails with a WebDriverException.
+        The next operation starts a new browser and logs in again
+        """
+        self.aborted = True
+        driver = self.driver
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except DRIVER_ERRORS:
+            pass
+
+    def close(self):
+        """Log out of the session by shutting chrome and chromedriver down"""
+        self._quit_driver()
+        self.logged_in = False
+        super().close()
+
+    def _quit_driver(self):
+        if self.driver is None:
+            return
+        # the sizes are read from the performance log, which goes away with chrome
+        self.network.save()
+        try:
+            self.driver.quit()
+        except DRIVER_ERRORS:
+            print("Chrome was already closed\n")
+        self.driver = None
+
     @results_info
     def login(self):
-        """Log in to AWS console"
+        """Log in to AWS console
 
         Returns:
-            bool || dict: True if successfully logged in, and a dict with execution data otherwise
+            dict: execution info
         """
+        return self._login()
+
+    def _login(self):
+        """Log in to AWS console, keeping the authenticated session for the next operations
+
+        Returns:
+            dict: execution data
+        """
+        start_time = time.perf_counter()
+        result = self._authenticate()
+        self.timings["login"] = time.perf_counter() - start_time
+        return result
+
+    def _navigate(self, url):
+        """driver.get that records how long the first navigation of the browser took"""
+        start_time = time.perf_counter()
+        self.navigator.go(url)
+        self.timings.setdefault("first_navigation", time.perf_counter() - start_time)
+
+    def _authenticate(self):
         print("___________logging in at AWS_________\n")
+        if self.restore_session():
+            self.session_cache["hits"] += 1
+            self.logged_in = True
+            print("logged in at AWS SSO with the stored session\n")
+            return {
+                "error": None,
+                "operation_name": "AWS SSO Login (session restored)",
+                "operation_status": "complete",
+                "data": [self.__username, self.console_home_url],
+            }
+        if self.profile_dir:
+            self.session_cache["misses"] += 1
         try:
-            self.driver.get(self.__url)
+            self._navigate(self.__url)
             username_input_element = self.wait.until(
                 EC.element_to_be_clickable((By.ID, "username"))
             )
@@ -121,9 +394,15 @@ class SSO:
                 "operation_status": "incomplete",
                 "data": [self.__username, self.__password, self.__url],
             }
-        else:
-            print("logged in at AWS SSO\n")
-            return True
+        print("logged in at AWS SSO\n")
+        self.logged_in = True
+        self.save_session()
+        return {
+            "error": None,
+            "operation_name": "AWS SSO Login",
+            "operation_status": "complete",
+            "data": [self.__username, self.__url],
+        }
 
     def get_user_password(self):
         """retrieve the AWS SSO generated password 
@@ -131,20 +410,8 @@ class SSO:
         Returns:
             string || dict: return the user password if nothing goes wrong. Otherwise, returns a dict with some execution info.
         """
-        print("retrieving user password...\n")
         try:
-            clipboard_area_element = self.wait.until(
-                EC.element_to_be_clickable(
-                    (By.CLASS_NAME, "otp-clipboard-area-copy"))
-            )
-            show_password_input_element = clipboard_area_element.find_element(
-                By.TAG_NAME, "input"
-            )
-            show_password_input_element.click()
-            user_sso_password = self.driver.find_element(
-                By.XPATH,
-                "//*[@id='OTP-generation-modal']/div[3]/div/div/div[2]/div/div[3]/div/div[1]/div/div/div[3]/div[2]",
-            ).text
+            return self._read_password()
         except (NoSuchElementException, TimeoutException) as e:
             error = f"Erro: {traceback.format_exc()}\n{e}"
             print("Something went wrong while retrieving user password")
@@ -153,10 +420,63 @@ class SSO:
                 "error": error,
                 "operation_name": "Get User Password",
             }
+
+    def _read_password(self):
+        """Reveal and read the password of the one-time password modal"""
+        print("retrieving user password...\n")
+        clipboard_area_element = self.wait.until(
+            EC.element_to_be_clickable(
+                (By.CLASS_NAME, "otp-clipboard-area-copy"))
+        )
+        show_password_input_element = clipboard_area_element.find_element(
+            By.TAG_NAME, "input"
+        )
+        show_password_input_element.click()
+        user_sso_password = self.driver.find_element(
+            By.XPATH,
+            "//*[@id='OTP-generation-modal']/div[3]/div/div/div[2]/div/div[3]/div/div[1]/div/div/div[3]/div[2]",
+        ).text
         user_sso_password = user_sso_password.replace("Hide password", "")
         print(f"password : {user_sso_password}")
         return user_sso_password
 
+    def issue_user_password(self, username):
+        """Give an existing user a new one-time password, through the console's reset password flow
+
+        Args:
+            username (string): exact username
+
+        Returns:
+            string || dict: the password if nothing goes wrong. Otherwise, returns a dict with some execution info.
+        """
+        try:
+            return self._issue_password(username)
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            print("Something went wrong while issuing the user password")
+            return {
+                "operation_status": "incomplete",
+                "error": f"Erro: {traceback.format_exc()}\n{e}",
+                "operation_name": "Issue User Password",
+            }
+
+    def _issue_password(self, username):
+        """Reset the password of an existing user to a new one-time password and read it
+
+        Args:
+            username (string): exact username
+
+        Returns:
+            string: the password
+        """
+        entry = self.directory.search(username)
+        if entry is None:
+            raise NoSuchElementException(f"User {username} not found")
+        self.navigator.go(entry["link"])
+        self.wait.until(EC.element_to_be_clickable((By.XPATH, RESET_PASSWORD_BUTTON_XPATH))).click()
+        self.wait.until(EC.element_to_be_clickable((By.XPATH, RESET_PASSWORD_OTP_XPATH))).click()
+        self.wait.until(button_enabled((By.XPATH, RESET_PASSWORD_SUBMIT_XPATH)), label="reset password enabled").click()
+        return self._read_password()
+
     def add_user_to_groups(self, user_groups):
         """Add user to AWS SSO groups
 
@@ -166,40 +486,8 @@ class SSO:
         Returns:
             boll || dict: True if groups are add to user successfully. Otherwise, returns a dict with some execution info.
         """
-        print("Adding user to groups...\n")
         try:
-            if user_groups:
-                time.sleep(3)
-                available_groups_table_element = self.wait.until(
-                    EC.element_to_be_clickable(
-                        (
-                            By.XPATH,
-                            '//*[@id="sso-groups-main-table"]/div[2]/div[1]/table/tbody',
-                        )
-                    )
-                )
-                time.sleep(3)
-                table_rows = available_groups_table_element.find_elements(
-                    By.TAG_NAME, "tr"
-                )
-                for line in table_rows:
-                    group = line.find_element(By.TAG_NAME, "a").text
-                    if group in user_groups:
-                        line.find_element(By.TAG_NAME, "input").click()
-            else:
-                print(" No groups Provided! Adding user without groups...")
-
-            nextPage_button_element = self.driver.find_element(
-                By.XPATH,
-                '//*[@id="add-user-wizard"]/div/div/div[2]/div[3]/div/div/div/div/div[3]/button',
-            )
-            nextPage_button_element.click()
-            time.sleep(4)
-            addUser_button_element = self.driver.find_element(
-                By.XPATH,
-                '//*[@id="add-user-wizard"]/div/div/div[2]/div[3]/div/div/div/div/div[3]/button',
-            )
-            addUser_button_element.click()
+            self._select_wizard_groups(user_groups).click()
             return True
         except (NoSuchElementException, TimeoutException) as e:
             error = f"Erro: {traceback.format_exc()}\n{e}"
@@ -210,199 +498,303 @@ class SSO:
                 "operation_name": "Add User to Groups",
             }
 
-    def parse_input_data(self, data):
-        """Auxiliary method to parse the input data
+    def _select_wizard_groups(self, user_groups):
+        """Tick the groups of the add user wizard and go to its review step
+
+        Returns:
+            WebElement: the add user button, whose click creates the user
+        """
+        print("Adding user to groups...\n")
+        if user_groups:
+            self.wait.until(
+                table_row_count_stable((By.XPATH, GROUPS_TBODY_XPATH)),
+                label="groups table rows stable",
+            )
+            table_rows = snapshot_table(self.driver, GROUPS_TBODY_XPATH)
+            select_rows(
+                self.driver,
+                GROUPS_TBODY_XPATH,
+                [row["index"] for row in table_rows if row["name"] in user_groups],
+            )
+        else:
+            print(" No groups Provided! Adding user without groups...")
+
+        nextPage_button_element = self.wait.until(
+            button_enabled((By.XPATH, WIZARD_PRIMARY_BUTTON_XPATH)),
+            label="wizard next button enabled",
+        )
+        step_changed = wizard_step_changed(self.driver)
+        nextPage_button_element.click()
+        self.wait.until(step_changed, label="wizard step changed")
+        addUser_button_element = self.wait.until(
+            button_enabled((By.XPATH, WIZARD_PRIMARY_BUTTON_XPATH)),
+            label="wizard add user button enabled",
+        )
+        return addUser_button_element
+
+    def fill_fields(self, fields):
+        """Fill a form in one scripted round trip, typing into the fields the script couldn't set
+
+        Args:
+            fields (list): built with forms.field. Fields whose value is None are left as they are
+        """
+        fields = [item for item in fields if item["value"] is not None]
+        try:
+            failed = fill_form(self.driver, fields)
+        except WebDriverException:
+            failed = fields
+        if not failed:
+            self.form_stats["scripted"] += 1
+            return
+        print("Scripted form fill didn't stick, typing the fields...\n")
+        self.form_stats["fallback"] += 1
+        type_fields(self.driver, failed)
+
+    def fill_user_profile(self, email, first_name, last_name):
+        """Fill the first step of the add user wizard with the user profile
 
         Args:
-            data (dict): with the user details
+            email (string): user email, also used as username
+            first_name (string): user first name
+            last_name (string): user last name
 
         Returns:
-            Tuple: all data separated in its own corresponding variable
+            bool || dict: True if the profile was submitted. Otherwise, returns a dict with some execution info.
         """
         try:
-            user_data = data["body"]["services"]
-            email = user_data[0].get("input").get("users")[0].get("email")
-            first_name = user_data[0].get("input").get("users")[
-                0].get("firstname")
-            last_name = user_data[0].get("input").get("users")[
-                0].get("lastname")
-            groups = user_data[0].get("input").get("users")[0].get("groups")
-            parsed_data = (email, first_name, last_name, groups)
-            return parsed_data
-        except (AttributeError, KeyError):
-            print(
-                "Something went wrong while parsing the input json. It  the keys or its structure may have changed\n")
+            self._submit_user_profile(email, first_name, last_name)
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            return {
+                "operation_status": "incomplete",
+                "error": f"Erro: {traceback.format_exc()}\n{e}",
+                "operation_name": "Fill User Profile",
+            }
+        return True
 
-    @results_info
-    def create_user(self, user_data):
-        """Create user at AWS SSO with de data provided
+    def _submit_user_profile(self, email, first_name, last_name):
+        """Open the add user wizard, fill its profile step and go to the groups step"""
+        print("Navigating to user management console...\n")
+        self.navigator.go(self.user_management_url)
+        add_user_button = self.wait.until(
+            EC.visibility_of_element_located(
+                (By.XPATH, "//a[@data-testid='add-user-button']")
+            )
+        )
+        add_user_button.click()
+        self.wait.until(
+            EC.url_to_be(f"{self.user_management_url}$addUserWizard")
+        )
+        self.wait.until(
+            EC.visibility_of_element_located(
+                (By.ID, "user-profile-create-edit-form")
+            )
+        )
+        self.fill_fields(
+            [
+                field("//input[@placeholder='Enter username']", email),
+                field("//input[@value='OTP']", True),
+                field("//input[@placeholder='email@example.com']", email),
+                field("//input[@placeholder='email@example.com']", email, index=1),
+                field("//input[@placeholder='Enter first name']", first_name),
+                # if user wasn't created with lastname on GCC, create aws-sso use account with last name as 'colaborador'
+                field("//input[@placeholder='Enter last name']", last_name or "colaborador"),
+            ]
+        )
+        self.driver.find_element(
+            By.XPATH,
+            '//*[@id="add-user-wizard"]/div/div/div[2]/div[3]/div/div/div/div/div[2]/button',
+        ).click()
+
+    @property
+    def checkpoints(self):
+        """steps.StepCheckpoints of the multi-step operations, persisted in the result store when there is one"""
+        if self._checkpoints is None or self._checkpoints.store is not self.store:
+            self._checkpoints = StepCheckpoints(self.store)
+        return self._checkpoints
+
+    def _run_create_step(self, email, step, function, before_retry=None, record=True):
+        """Run a step of the user creation with retries, recording its outcome unless `record` is False
+
+        Returns:
+            object || dict: what the step returned, or the execution info of the failure
+        """
+        with self.trace_labels(step=step):
+            try:
+                outcome = run_step(
+                    step, function, self.step_attempts, self.step_backoff, before_retry=before_retry
+                )
+            except WebDriverException as e:
+                error = f"Erro: {traceback.format_exc()}\n{e}"
+                if record:
+                    self.checkpoints.mark("create", email, step, "incomplete", error)
+                return {
+                    "error": error,
+                    "operation_name": f"Create User - {step.capitalize()}",
+                    "operation_status": "incomplete",
+                    "data": email,
+                }
+        if record:
+            self.checkpoints.mark("create", email, step, "complete")
+        return outcome
+
+    def _create_single_user(self, user):
+        """Create a single user at AWS SSO with de data provided.
+
+        Each step (created, grouped, password) is checkpointed. When a previous try failed after submitting
+        the wizard, the user's actual state is checked and the creation resumes from the first step not complete
 
         Args:
-            message (dict): user data needed to do so
+            user (dict): user data needed to do so
 
         Returns:
             dict: execution info
         """
         print("---------creating user----------\n")
-        parsed_data = self.parse_input_data(user_data)
-        email, first_name, last_name, groups = parsed_data
-        print("Navigating to user management console...\n")
-        try:
-            self.driver.get(self.user_management_url)
-            add_user_button = self.wait.until(
-                EC.visibility_of_element_located(
-                    (By.XPATH, "//a[@data-testid='add-user-button']")
-                )
+        email, first_name, last_name, groups = self.parse_input_data(user)
+        steps = self.checkpoints.steps("create", email)
+        submitted = [steps.get("submitted") == "complete"]
+        if steps.get("created") == "complete":
+            resumed = True
+        else:
+            # before our wizard is submitted, a user found is one that already existed and is never taken as ours.
+            # After it, a user found is the one our submit created before the try failed
+            found = self._run_create_step(
+                email, "lookup", lambda: self.directory.search(email) is not None, record=False
             )
+            if isinstance(found, dict):
+                return found
+            if found and not submitted[0]:
+                return {
+                    "error": f"User {email} already exists",
+                    "operation_name": "Create User",
+                    "operation_status": "incomplete",
+                    "data": email,
+                }
+            resumed = found
+
+        def created_meanwhile():
+            return True if submitted[0] and self.directory.search(email) is not None else None
+
+        def wizard():
+            self._submit_user_profile(email, first_name, last_name)
+            add_user_button = self._select_wizard_groups(groups)
+            self.checkpoints.mark("create", email, "submitted", "complete")
+            submitted[0] = True
             add_user_button.click()
             self.wait.until(
-                EC.url_to_be(
-                    "https://us-east-1.console.aws.amazon.com/singlesignon/identity/home?region=us-east-1#!/users$addUserWizard"
-                )
-            )
-            root_div_element = self.wait.until(
-                EC.visibility_of_element_located(
-                    (By.ID, "user-profile-create-edit-form")
-                )
-            )
-            username_element = root_div_element.find_element(
-                By.XPATH, "//input[@placeholder='Enter username']"
-            )
-            generate_password_checkbox = root_div_element.find_element(
-                By.XPATH, "//input[@value='OTP']"
-            )
-            email_elements = root_div_element.find_elements(
-                By.XPATH, "//input[@placeholder='email@example.com']"
-            )
-            first_name_element = root_div_element.find_element(
-                By.XPATH, "//input[@placeholder='Enter first name']"
-            )
-            last_name_element = root_div_element.find_element(
-                By.XPATH, "//input[@placeholder='Enter last name']"
+                EC.visibility_of_element_located((By.CLASS_NAME, "otp-clipboard-area-copy")),
+                label="user created",
             )
-            next_button_element = self.driver.find_element(
-                By.XPATH,
-                '//*[@id="add-user-wizard"]/div/div/div[2]/div[3]/div/div/div/div/div[2]/button',
-            )
-            email_element = email_elements[0]
-            confirm_email_element = email_elements[1]
-            username_element.clear()
-            email_element.clear()
-            confirm_email_element.clear()
-            first_name_element.clear()
-            last_name_element.clear()
-            generate_password_checkbox.click()
-            email_element.send_keys(email)
-            username_element.send_keys(email)
-            confirm_email_element.send_keys(email)
-            first_name_element.send_keys(first_name)
-            if last_name:
-                last_name_element.send_keys(last_name)
-            else:
-                # if user wasn't created with lastname on GCC, create aws-sso use account with last name as 'colaborador'
-                last_name_element.send_keys("colaborador")
-            next_button_element.click()
-        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
-            error = f"Erro: {traceback.format_exc()}\n{e}"
-            operation_status = "incomplete"
-            operation_name = "Create User"
-        result_add_user_to_groups = self.add_user_to_groups(groups)
-        if result_add_user_to_groups:
-            result_get_user_password = self.get_user_password()
-            if type(result_get_user_password) == str:
-                print("User Password was successfully collected")
+            return False
+
+        if not resumed:
+            # True if the user turned out to exist after a failed try, False if this try created it
+            outcome = self._run_create_step(email, "created", wizard, before_retry=created_meanwhile)
+            if isinstance(outcome, dict):
+                return outcome
+            resumed = outcome
+            if not resumed:
+                # the wizard added the groups and the one-time password modal is open
+                self.checkpoints.mark("create", email, "grouped", "complete")
         else:
-            error = result_add_user_to_groups.get("error")
-            operation_name = "Create User - Add User to Groups"
-            operation_status = result_add_user_to_groups.get(
-                "operation_status")
+            print(f"User {email} already exists, resuming its creation...\n")
+            self.checkpoints.mark("create", email, "created", "complete")
+
+        if resumed and steps.get("grouped") != "complete":
+            def add_missing_groups():
+                missing = sorted(set(groups or []).difference(self._user_groups(email) or set()))
+                if missing:
+                    result = self._apply_group_changes(email, missing, [])
+                    if result.get("operation_status") != "complete":
+                        raise WebDriverException(result.get("error"))
+
+            outcome = self._run_create_step(email, "grouped", add_missing_groups)
+            if isinstance(outcome, dict):
+                return outcome
+
+        if steps.get("password") != "complete":
+            tries = []
+
+            def password():
+                tries.append(True)
+                if not resumed and len(tries) == 1:
+                    return self._read_password()
+                # the modal of the wizard is gone, a new one-time password is issued from the user page
+                return self._issue_password(email)
+
+            outcome = self._run_create_step(email, "password", password)
+            if isinstance(outcome, dict):
+                return outcome
+            print("User Password was successfully collected")
+
+        self.checkpoints.clear("create", email)
+        self.directory.invalidate()
         return {
-            "error": error,
-            "operation_name": operation_name,
-            "operation_status": operation_status,
-            "data": user_data,
+            "error": None,
+            "operation_name": "Create User (resumed)" if resumed else "Create User",
+            "operation_status": "complete",
+            "data": email,
         }
 
-    @results_info
-    def update_user(self, user_data):
-        """Update user info at AWS SSo
+    def _update_single_user(self, user):
+        """Update a single user info at AWS SSo
 
         Args:
-            user_data (dict): User data needed to do so
+            user (dict): User data needed to do so
 
         Returns:
             dict: execution info
         """
         try:
-            self.driver.get(self.user_management_url)
-            username = user_data[0][0].get("input").get("users")[
-                0].get("email")
-            first_name = user_data[0][0].get("input").get("users")[
-                0].get("firstname")
-            last_name = user_data[0][0].get("input").get("users")[
-                0].get("lastname")
-            display_name = (
-                user_data[0][0].get("input").get("users")[
-                    0].get("display_name")
+            username = user.get("email")
+            first_name = user.get("firstname")
+            last_name = user.get("lastname")
+            display_name = user.get("display_name")
+            # Procura o usuário pelo username exato e, se achar, edita os campos com os novos valores
+            directory_entry = self.directory.lookup(username)
+            if directory_entry is None:
+                print("Usuário não cadastrado no SSO")
+                return {
+                    "error": f"User {username} not found",
+                    "operation_name": "Update User",
+                    "operation_status": "incomplete",
+                    "data": username,
+                }
+            self.navigator.go(directory_entry["link"])
+            profile_details_div_element = self.wait.until(
+                EC.element_to_be_clickable(
+                    (By.ID, "user-profile-overview-card-header-container")
+                )
+            )
+            editButton_element = profile_details_div_element.find_element(
+                By.TAG_NAME, "a"
             )
-            # Pega todos os usernames
-            users_tbody_element = self.wait.until(
+            editButton_element.click()
+            self.wait.until(
                 EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        "//*[@id='sso-users-main-table']/div[2]/div[1]/table/tbody",
-                    )
+                    (By.XPATH,
+                     "//input[@placeholder='Enter first name']")
                 )
             )
-            users = users_tbody_element.find_elements(
-                By.PARTIAL_LINK_TEXT, "@mapia.ai")
-            # Procura o usuário e se achar, clica em editar e edita o campo desejado com o novo valor
-            for user in users:
-                if username in user.text:
-                    user.click()
-                    profile_details_div_element = self.wait.until(
-                        EC.element_to_be_clickable(
-                            (By.ID, "user-profile-overview-card-header-container")
-                        )
-                    )
-                    editButton_element = profile_details_div_element.find_element(
-                        By.TAG_NAME, "a"
-                    )
-                    editButton_element.click()
-                    firstName_input_element = self.wait.until(
-                        EC.element_to_be_clickable(
-                            (By.XPATH,
-                             "//input[@placeholder='Enter first name']")
-                        )
-                    )
-                    lastName_input_element = self.wait.until(
-                        EC.element_to_be_clickable(
-                            (By.XPATH,
-                             "//input[@placeholder='Enter last name']")
-                        )
-                    )
-                    displayName_input_element = self.wait.until(
-                        EC.element_to_be_clickable(
-                            (By.XPATH,
-                             "//input[@placeholder='Enter display name']")
-                        )
-                    )
-                    firstName_input_element.clear()
-                    lastName_input_element.clear()
-                    displayName_input_element.clear()
-                    firstName_input_element.send_keys(first_name)
-                    lastName_input_element.send_keys(last_name)
-                    displayName_input_element.send_keys(display_name)
-                    submitButton_element = self.driver.find_element(
-                        By.XPATH, "//span[text()='Save changes']"
-                    )
-                    submitButton_element.click()
-
-                print("Usuário atualizado")
-            else:
-                print("Usuário não cadastrado no SSO")
-            operation_status = "complete"
+            self.fill_fields(
+                [
+                    field("//input[@placeholder='Enter first name']", first_name),
+                    field("//input[@placeholder='Enter last name']", last_name),
+                    field("//input[@placeholder='Enter display name']", display_name),
+                ]
+            )
+            submitButton_element = self.driver.find_element(
+                By.XPATH, "//span[text()='Save changes']"
+            )
+            mark = self.capture.mark() if self.capture is not None else None
+            submitButton_element.click()
             error = None
+            if self.capture is not None:
+                self.wait.until(no_pending_xhr(), label="user profile saved")
+                error = self._check_saved_profile(username, first_name, last_name, display_name, mark)
+            operation_status = "incomplete" if error else "complete"
+            if not error:
+                print("Usuário atualizado")
         except (TimeoutException, NoSuchElementException, WebDriverException) as e:
             error = f"Erro: {traceback.format_exc()}\n{e}"
             operation_status = "incomplete"
@@ -410,73 +802,143 @@ class SSO:
             "error": error,
             "operation_name": "Update User",
             "operation_status": operation_status,
-            "data": user_data,
+            "data": user.get("email"),
         }
 
-    @results_info
-    def delete_user(self, username):
-        """Delete user at AWS SSO
+    def _check_saved_profile(self, username, first_name, last_name, display_name, since):
+        """Compare the profile the console answered with after saving with the one sent
+
+        Args:
+            since (int): capture mark taken before saving, older answers are not the saved profile
+
+        Returns:
+            string || None: what differs, None if the profile was saved or no answer after saving had it
+        """
+        saved = self.captured().user(username, since)
+        if saved is None:
+            return None
+        expected = {
+            "GivenName": (first_name, (saved.get("Name") or {}).get("GivenName")),
+            "FamilyName": (last_name, (saved.get("Name") or {}).get("FamilyName")),
+            "DisplayName": (display_name, saved.get("DisplayName")),
+        }
+        differences = [
+            f"{name} is {actual!r} instead of {wanted!r}"
+            for name, (wanted, actual) in expected.items()
+            if wanted is not None and actual != wanted
+        ]
+        return f"Profile not saved: {', '.join(differences)}" if differences else None
+
+    def _delete_single_user(self, user):
+        """Delete a single user at AWS SSO
 
         Args:
-            username (string): email of the user you want to delete
+            user (dict): user data, with the email of the user you want to delete
 
         Returns:
             dict: execution info
         """
-        print("Deleting user....\n")
-        try:
-            self.driver.get(self.user_management_url)
-            users_tbody_element = self.wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        "//*[@id='sso-users-main-table']/div[2]/div[1]/table/tbody",
-                    )
-                )
+        return self._delete_users([user])[0]
+
+    def _select_users(self, usernames):
+        """Tick the rows of the users in the users table, walking its pages once
+
+        Args:
+            usernames (list): exact usernames
+
+        Returns:
+            list: usernames whose row got ticked
+        """
+        if len(usernames) == 1:
+            # filtra a tabela pelo username para achar a linha mesmo fora da primeira página
+            self.directory.search(usernames[0])
+        else:
+            # a table filtered by an earlier search would hide users
+            self.navigator.go(self.user_management_url, fresh=True)
+            self.wait.until(no_pending_xhr(), label="users loaded")
+            self.wait.until(
+                table_row_count_stable((By.XPATH, USERS_TBODY_XPATH), min_rows=0),
+                label="users table rows stable",
             )
-            table_rows_elements = users_tbody_element.find_elements(
-                By.TAG_NAME, "tr")
-            for row in table_rows_elements:
-                if username in row.text:
-                    check_box_element = row.find_element(By.TAG_NAME, "input")
-                    check_box_element.click()
-                else:
-                    print("usuário não está no SSO\n")
-            # deleta e confirma a remoção
-            delete_button_element = self.driver.find_element(
-                By.XPATH, "//button[@data-testid='delete-user-button']"
+        remaining = set(usernames)
+        selected = []
+        while True:
+            table_rows = snapshot_table(self.driver, USERS_TBODY_XPATH)
+            matches = [row for row in table_rows if row["name"] in remaining]
+            ticked = set(select_rows(self.driver, USERS_TBODY_XPATH, [row["index"] for row in matches]))
+            for row in matches:
+                if row["index"] in ticked:
+                    selected.append(row["name"])
+                    remaining.discard(row["name"])
+            # the console keeps the selection while paging
+            if not remaining or not table_rows or not button_enabled((By.XPATH, NEXT_PAGE_BUTTON_XPATH))(self.driver):
+                return selected
+            self.driver.find_element(By.XPATH, NEXT_PAGE_BUTTON_XPATH).click()
+            self.wait.until(
+                first_row_changed(table_rows[0]["name"]), label="users table page changed"
             )
-            delete_button_element.click()
 
-            confirm_delete_span_element = self.wait.until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//span[text()='Delete user']"))
-            )
-            confirm_delete_span_element.click()
-            print("usuário deletado\n")
-            operation_status = "complete"
-            error = None
-        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
-            print("Something went wrong while deleting user\n")
-            error = f"Error {traceback.format_exc()}\n{e}"
-            operation_status = "incomplete"
-        return {
-            "error": error,
-            "operation_name": "Delete User",
-            "operation_status": operation_status,
-            "data": username,
-        }
+    def _delete_users(self, users):
+        """Delete many users with a single selection and confirmation per batch of `delete_batch_size`
 
-    def enable_disable_user(self, user_data):
-        # self.driver.get(url)
-        username = user_data["username"]
+        Args:
+            users (list): user data, with the email of the users you want to delete
 
-        self.driver.get(self.user_management_url)
-        user = self.wait.until(
-            EC.element_to_be_clickable((By.LINK_TEXT, username))
-        ).click()
+        Returns:
+            list: execution info of each user, in the same order
+        """
+        print(f"Deleting {len(users)} user(s)....\n")
+        usernames = [user.get("email") for user in users]
+        outcomes = {}
+        # users missing from the table are reported by the selection itself
+        wanted = list(dict.fromkeys(usernames))
+        for start in range(0, len(wanted), self.delete_batch_size):
+            batch = wanted[start:start + self.delete_batch_size]
+            try:
+                selected = self._select_users(batch)
+                for username in batch:
+                    if username not in selected:
+                        outcomes[username] = (f"User {username} not found", "incomplete")
+                if not selected:
+                    continue
+                # deleta e confirma a remoção
+                delete_button_element = self.driver.find_element(
+                    By.XPATH, "//button[@data-testid='delete-user-button']"
+                )
+                delete_button_element.click()
+                confirm_delete_span_element = self.wait.until(
+                    EC.element_to_be_clickable(
+                        (By.XPATH, "//span[text()='Delete user']"))
+                )
+                confirm_delete_span_element.click()
+                self.wait.until(
+                    EC.invisibility_of_element_located((By.XPATH, "//span[text()='Delete user']")),
+                    label="delete confirmation closed",
+                )
+                self.wait.until(no_pending_xhr(), label="users deleted")
+                for username in selected:
+                    self.directory.invalidate(username)
+                    outcomes[username] = (None, "complete")
+                print(f"{len(selected)} usuário(s) deletado(s)\n")
+            except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+                print("Something went wrong while deleting users\n")
+                error = f"Error {traceback.format_exc()}\n{e}"
+                for username in batch:
+                    if username not in outcomes:
+                        outcomes[username] = (error, "incomplete")
+        return [
+            {
+                "error": outcomes[username][0],
+                "operation_name": "Delete User",
+                "operation_status": outcomes[username][1],
+                "data": username,
+            }
+            for username in usernames
+        ]
 
-        status_button = self.wait.until(
+    def _read_status_popover(self):
+        """Status of the open user page, from its status popover"""
+        self.wait.until(
             EC.element_to_be_clickable(
                 (
                     By.XPATH,
@@ -484,7 +946,6 @@ class SSO:
                 )
             )
         ).click()
-
         status_text = self.wait.until(
             EC.visibility_of_element_located(
                 (
@@ -493,176 +954,401 @@ class SSO:
                 )
             )
         ).text
-        status = status_text.split()[0]
+        return status_text.split()[0]
 
-        if (
-            status == "Disabled"
-            and action == "Disable"
-            or status == "Enabled"
-            and action == "Enable"
-        ):
-            print("Nenhuma ação necessária.")
+    def _enable_disable_user(self, user_data):
+        """Enable or disable a single user at AWS SSO
 
-        elif status == "Enabled" or "Habilitado" and action == "Disable":
-
-            disable_button = self.wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        '//*[@id="user-overview-card-header"]/div[2]/div/div/button',
-                    )
-                )
-            ).click()
-
-            confirm_disable_button = self.wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        '//*[@id="disable-user-modal"]/div[3]/div/div/div[3]/div/div/div[2]/button',
-                    )
-                )
-            ).click()
+        Args:
+            user_data (dict): with the "username" and the "action" ("Enable" or "Disable")
 
-        elif status == "Disabled" or "Desabilitado" and action == "Enable":
-            disable_button = self.wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        '//*[@id="user-overview-card-header"]/div[2]/div/div/button',
-                    )
-                )
-            ).click()
+        Returns:
+            dict: execution info
+        """
+        username = user_data.get("username")
+        action = user_data.get("action")
+        try:
+            self.navigator.go(self.user_management_url)
+            user_link = self.wait.until(
+                EC.element_to_be_clickable((By.LINK_TEXT, username))
+            )
+            mark = self.capture.mark() if self.capture is not None else None
+            user_link.click()
 
-            confirm_enable_button = self.wait.until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        '//*[@id="enable-user-modal"]/div[3]/div/div/div[3]/div/div/div[2]/button/span',
-                    )
-                )
-            ).click()
+            status = None
+            if self.capture is not None:
+                self.wait.until(no_pending_xhr(), label="user details loaded")
+                status = self.captured().status(username, mark)
+            if status is None:
+                status = self._read_status_popover()
 
-    def sso_group_checker(self, data):
-        modules = data["groups"]
-        username = data["email"]
-        self.driver.get(self.user_management_url)
+            if (
+                status == "Disabled"
+                and action == "Disable"
+                or status == "Enabled"
+                and action == "Enable"
+            ):
+                print("Nenhuma ação necessária.")
 
-        self.driver.get(
-            "https://us-east-1.console.aws.amazon.com/singlesignon/identity/home?region=us-east-1#!/users"
-        )
-        user = self.wait.until(
-            EC.element_to_be_clickable((By.LINK_TEXT, username))
-        ).click()
-        groups_button = self.wait.until(
-            EC.element_to_be_clickable(
-                (
-                    By.XPATH,
-                    '//*[@id="app"]/div/div/div/div/main/div/div[3]/div/div/div/div[4]/div/div[1]/span/ul/li[2]/button',
-                )
-            )
-        ).click()
-        user_groups = self.driver.find_element(
-            By.XPATH, '//*[@id="sso-groups-main-table"]/div[2]/div[1]/table/tbody'
-        )
+            elif status in ("Enabled", "Habilitado") and action == "Disable":
 
-        current_groups = []
-        time.sleep(1)
-        for line in user_groups.find_elements(By.TAG_NAME, "tr"):
-            current_groups.append(line.find_element(By.TAG_NAME, "a").text)
-        for user_groups in current_groups:
-            if current_groups not in modules:
-                line.find_element(By.TAG_NAME, "input").click()
-                remove_button = self.wait.until(
+                disable_button = self.wait.until(
                     EC.element_to_be_clickable(
                         (
                             By.XPATH,
-                            '//*[@id="sso-groups-main-table"]/div[1]/div/div[1]/div[2]/div/div[1]/button/span',
+                            '//*[@id="user-overview-card-header"]/div[2]/div/div/button',
                         )
                     )
                 ).click()
-                confirm_remove_button = self.wait.until(
+
+                confirm_disable_button = self.wait.until(
                     EC.element_to_be_clickable(
                         (
                             By.XPATH,
-                            "/html/body/div[5]/div/div[3]/div/div/div[3]/div/div/div[2]/button/span",
+                            '//*[@id="disable-user-modal"]/div[3]/div/div/div[3]/div/div/div[2]/button',
                         )
                     )
                 ).click()
-        self.driver.refresh()
-        updated_page_user_groups = self.wait.until(
-            EC.visibility_of_element_located(
-                (By.XPATH,
-                 '//*[@id="sso-groups-main-table"]/div[2]/div[1]/table/tbody')
-            )
-        )
-        updated_current_groups = []
-        time.sleep(1)
-        for line in updated_page_user_groups.find_elements(By.TAG_NAME, "tr"):
-            updated_current_groups.append(
-                line.find_element(By.TAG_NAME, "a").text)
-        missing_groups = set(modules).difference(updated_current_groups)
-        if missing_groups:
-            for element in missing_groups:
-                all_groups_page = self.wait.until(
+
+            elif status in ("Disabled", "Desabilitado") and action == "Enable":
+                disable_button = self.wait.until(
                     EC.element_to_be_clickable(
                         (
                             By.XPATH,
-                            '//*[@id="sso-groups-main-table"]/div[1]/div/div[1]/div[2]/div/div[2]/a/span',
+                            '//*[@id="user-overview-card-header"]/div[2]/div/div/button',
                         )
                     )
                 ).click()
-                search_field = self.wait.until(
-                    EC.visibility_of_element_located(
-                        (By.XPATH,
-                         "//input[@placeholder='Find groups by group name']")
-                    )
-                )
-                search_field.clear()
-                search_field.send_keys(element)
-                group_field = self.wait.until(
-                    EC.visibility_of_element_located(
-                        (
-                            By.XPATH,
-                            '//*[@id="sso-groups-main-table"]/div[2]/div[1]/table/tbody',
-                        )
-                    )
-                )
-                time.sleep(1)
-                group_field.find_element(By.TAG_NAME, "input").click()
 
-                add_user_to_group = self.wait.until(
+                confirm_enable_button = self.wait.until(
                     EC.element_to_be_clickable(
                         (
                             By.XPATH,
-                            '//*[@id="app"]/div/div/div/div/main/div/div[3]/div/div/div/div[3]/div/div/div[2]/button',
+                            '//*[@id="enable-user-modal"]/div[3]/div/div/div[3]/div/div/div[2]/button/span',
                         )
                     )
                 ).click()
-                time.sleep(1)
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            return {
+                "error": f"Erro: {traceback.format_exc()}\n{e}",
+                "operation_name": "Enable/Disable User",
+                "operation_status": "incomplete",
+                "data": username,
+            }
+        return {
+            "error": None,
+            "operation_name": "Enable/Disable User",
+            "operation_status": "complete",
+            "data": username,
+        }
+
+    def _open_user_groups(self, username):
+        """Open the groups tab of the user's page
+
+        Args:
+            username (string): exact username
+
+        Returns:
+            list || None: rows of the user's groups, None if the user doesn't exist
+        """
+        entry = self.directory.lookup(username)
+        if entry is None:
+            return None
+        # the navigator only returns once the app rendered the user page, so no tab of the previous one is left
+        self.navigator.go(entry["link"])
+        return self._show_user_groups()
+
+    def _show_user_groups(self):
+        """Read the groups tab of the user page the browser is on, opening it unless the app kept it open
+
+        Returns:
+            list: rows of the user's groups
+        """
+        groups_tab = self.wait.until(
+            EC.element_to_be_clickable((By.XPATH, USER_GROUPS_TAB_XPATH))
+        )
+        if not self.driver.find_elements(By.XPATH, ADD_TO_GROUPS_LINK_XPATH):
+            groups_tab.click()
+        self.wait.until(no_pending_xhr(), label="user groups loaded")
+        self.wait.until(
+            table_row_count_stable((By.XPATH, GROUPS_TBODY_XPATH), min_rows=0),
+            label="user groups rows stable",
+        )
+        return snapshot_table(self.driver, GROUPS_TBODY_XPATH)
+
+    def _groups_shown(self, username, table_rows, mark):
+        """Groups of the user from the captured answer newer than mark when there is one, else from the table rows"""
+        captured = self.captured()
+        groups = captured.groups_of(username, mark) if captured is not None else None
+        return groups if groups is not None else {row["name"] for row in table_rows}
+
+    def _user_groups(self, username):
+        """Open the user's groups tab and read its groups, from the captured answer when there is one
+
+        Returns:
+            set || None: group names, None if the user doesn't exist
+        """
+        mark = self.capture.mark() if self.capture is not None else None
+        table_rows = self._open_user_groups(username)
+        if table_rows is None:
+            return None
+        return self._groups_shown(username, table_rows, mark)
+
+    def _reconcile_user(self, username, groups):
+        """Read the user's groups, plan and apply the changes on the same visit of the user page
+
+        Returns:
+            tuple: the user's changes, None if there is nothing to change, and its execution data
+        """
+        table_rows = None
+        try:
+            mark = self.capture.mark() if self.capture is not None else None
+            table_rows = self._open_user_groups(username)
+            found = self._groups_shown(username, table_rows, mark) if table_rows is not None else None
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            found = f"Erro: {traceback.format_exc()}\n{e}"
+        changes, result = self._plan_user(username, found, groups)
+        if result is None:
+            result = self._apply_group_changes(username, table_rows=table_rows, **changes)
+        return changes, result
+
+    def _read_memberships(self, usernames):
+        """Current groups of many users, read from the groups tab of each user page
+
+        Args:
+            usernames (list): exact usernames
+
+        Returns:
+            dict: email -> set of group names, None if the user doesn't exist, or the error message if it couldn't be read
+        """
+        memberships = {}
+        for username in usernames:
+            try:
+                with self.trace_labels(user=username):
+                    memberships[username] = self._user_groups(username)
+            except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+                memberships[username] = f"Erro: {traceback.format_exc()}\n{e}"
+        return memberships
+
+    def _tick_rows(self, tbody_xpath, search_xpath, names, label):
+        """Tick the rows of a selection table, searching only for the names not listed.
+        The console selection tables keep the ticked rows while searching
+
+        Args:
+            tbody_xpath (string): xpath of the table body
+            search_xpath (string): xpath of the table search box
+            names (list): exact names of the rows to tick
+            label (string): what the rows are, for the wait stats
+
+        Returns:
+            set: names ticked
+        """
+        ticked = set()
+        wanted = set(names)
+        table_rows = snapshot_table(self.driver, tbody_xpath)
+        matches = [row for row in table_rows if row["name"] in wanted]
+        selected = set(select_rows(self.driver, tbody_xpath, [row["index"] for row in matches]))
+        ticked.update(row["name"] for row in matches if row["index"] in selected)
+        for name in sorted(wanted - ticked):
+            search_field = self.wait.until(
+                EC.visibility_of_element_located((By.XPATH, search_xpath))
+            )
+            search_field.clear()
+            search_field.send_keys(name)
+            self.wait.until(no_pending_xhr(), label=f"{label} search finished")
+            self.wait.until(
+                table_row_count_stable((By.XPATH, tbody_xpath), min_rows=0),
+                label=f"{label} search rows stable",
+            )
+            table_rows = snapshot_table(self.driver, tbody_xpath)
+            if select_rows(
+                self.driver,
+                tbody_xpath,
+                [row["index"] for row in table_rows if row["name"] == name][:1],
+            ):
+                ticked.add(name)
+        return ticked
+
+    def _apply_group_changes(self, username, add, remove, table_rows=None):
+        """Remove the user from every `remove` group with one confirmation, add it to every `add` group
+        in a single add to groups dialog, and check the result on the groups tab the user page is back to
+
+        Args:
+            username (string): exact username
+            add (list): group names to add the user to
+            remove (list): group names to remove the user from
+            table_rows (list): rows of the groups tab the browser is on, the user page is opened when not given
+
+        Returns:
+            dict: execution info
+        """
+        data = {"email": username, "add": add, "remove": remove}
+        try:
+            if table_rows is None:
+                table_rows = self._open_user_groups(username)
+            if table_rows is None:
+                return {
+                    "error": f"User {username} not found",
+                    "operation_name": "Apply Group Changes",
+                    "operation_status": "incomplete",
+                    "data": data,
+                }
+            add = [group for group in add if group not in {row["name"] for row in table_rows}]
+            mark = self.capture.mark() if self.capture is not None else None
+            # seleciona de uma vez todos os grupos que o usuário não deveria ter
+            if select_rows(
+                self.driver,
+                GROUPS_TBODY_XPATH,
+                [row["index"] for row in table_rows if row["name"] in remove],
+            ):
+                self.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, REMOVE_GROUPS_BUTTON_XPATH))
+                ).click()
+                self.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, REMOVE_GROUPS_CONFIRM_XPATH))
+                ).click()
+                self.wait.until(
+                    EC.invisibility_of_element_located((By.XPATH, REMOVE_GROUPS_CONFIRM_XPATH)),
+                    label="remove confirmation closed",
+                )
+                self.wait.until(no_pending_xhr(), label="groups removed")
+            if add:
+                self.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, ADD_TO_GROUPS_LINK_XPATH))
+                ).click()
+                self.wait.until(
+                    EC.visibility_of_element_located((By.XPATH, GROUPS_SEARCH_XPATH))
+                )
+                self.wait.until(no_pending_xhr(), label="groups list loaded")
+                self.wait.until(
+                    table_row_count_stable((By.XPATH, GROUPS_TBODY_XPATH), min_rows=0),
+                    label="groups list rows stable",
+                )
+                if self._tick_rows(GROUPS_TBODY_XPATH, GROUPS_SEARCH_XPATH, add, "group"):
+                    add_button = self.wait.until(
+                        EC.element_to_be_clickable((By.XPATH, ADD_TO_GROUPS_BUTTON_XPATH))
+                    )
+                    add_button.click()
+                    self.wait.until(EC.staleness_of(add_button), label="add to groups closed")
+                    self.wait.until(no_pending_xhr(), label="groups added")
+            current_groups = self._groups_shown(username, self._show_user_groups(), mark)
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            return {
+                "error": f"Erro: {traceback.format_exc()}\n{e}",
+                "operation_name": "Apply Group Changes",
+                "operation_status": "incomplete",
+                "data": data,
+            }
+        missing_groups = set(add).difference(current_groups)
+        extra_groups = current_groups.intersection(remove)
+        if missing_groups or extra_groups:
+            return {
+                "error": f"Groups not added: {sorted(missing_groups)}, groups not removed: {sorted(extra_groups)}",
+                "operation_name": "Apply Group Changes",
+                "operation_status": "incomplete",
+                "data": data,
+            }
+        return {
+            "error": None,
+            "operation_name": "Apply Group Changes",
+            "operation_status": "complete",
+            "data": data,
+        }
+
+    @property
+    def groups_management_url(self):
+        return self.user_management_url.rsplit("#!/", 1)[0] + "#!/groups"
+
+    def _open_group_members(self, group):
+        """Open the members page of a group, found through the groups search
 
-    def create_zendesk_ticket(self, message):
-        """create a zendesk ticket informing what went wrong in the operation, based on the execution result provided by the decorator
         Args:
-            message (dict): containg the execution status data
-        """
-        # request params
-        url = "url"
-        user = "user"
-        pwd = "pwd"
-        headers = {"content-type": "application/json"}
-        # ticket infos
-        subject = f"SSO automation Failed"
-        body = (
-            f" Erro na operação: \n"
-            + f"{message.get('body').get('execution').get('jobs').get('status')} \n"
-            + f"Com a mensagem :\n {message.get('body').get('execution').get('jobs').get('result')}"
+            group (string): exact group name
+
+        Returns:
+            list || None: rows of the group members, None if the group doesn't exist
+        """
+        self.navigator.go(self.groups_management_url)
+        search_field = self.wait.until(
+            EC.visibility_of_element_located((By.XPATH, GROUPS_SEARCH_XPATH))
+        )
+        search_field.clear()
+        search_field.send_keys(group)
+        self.wait.until(no_pending_xhr(), label="group search finished")
+        self.wait.until(
+            table_row_count_stable((By.XPATH, GROUPS_TBODY_XPATH), min_rows=0),
+            label="group search rows stable",
         )
-        data = {"ticket": {"subject": subject, "comment": {"body": body}}}
-        payload = json.dumps(data)
-        response = requests.post(
-            url, data=payload, auth=(user, pwd), headers=headers)
-        if response.status_code != 201:
-            print("Status:", response.status_code,
-                  "Problem with the request. Exiting.")
-            exit()
-        print("Successfully created the ticket.")
+        links = [row["link"] for row in snapshot_table(self.driver, GROUPS_TBODY_XPATH) if row["name"] == group]
+        if not links:
+            return None
+        self.navigator.go(links[0])
+        self.wait.until(
+            EC.element_to_be_clickable((By.XPATH, ADD_USERS_TO_GROUP_LINK_XPATH))
+        )
+        self.wait.until(no_pending_xhr(), label="group members loaded")
+        self.wait.until(
+            table_row_count_stable((By.XPATH, GROUP_MEMBERS_TBODY_XPATH), min_rows=0),
+            label="group members rows stable",
+        )
+        return snapshot_table(self.driver, GROUP_MEMBERS_TBODY_XPATH)
+
+    def _add_users_to_group(self, group, usernames):
+        """Add many users to a group from its "add users" page, with a single selection and submit
+
+        Args:
+            group (string): exact group name
+            usernames (list): exact usernames
+
+        Returns:
+            dict: username -> execution info
+        """
+        def result(username, error=None):
+            return {
+                "error": error,
+                "operation_name": "Add Users To Group",
+                "operation_status": "incomplete" if error else "complete",
+                "data": {"email": username, "group": group},
+            }
+
+        try:
+            table_rows = self._open_group_members(group)
+            if table_rows is None:
+                return {username: result(username, f"Group {group} not found") for username in usernames}
+            members = {row["name"] for row in table_rows}
+            missing = [username for username in usernames if username not in members]
+            if missing:
+                self.wait.until(
+                    EC.element_to_be_clickable((By.XPATH, ADD_USERS_TO_GROUP_LINK_XPATH))
+                ).click()
+                self.wait.until(
+                    EC.visibility_of_element_located((By.XPATH, ADD_USERS_SEARCH_XPATH))
+                )
+                self.wait.until(no_pending_xhr(), label="users list loaded")
+                self.wait.until(
+                    table_row_count_stable((By.XPATH, ADD_USERS_TBODY_XPATH), min_rows=0),
+                    label="users list rows stable",
+                )
+                if self._tick_rows(ADD_USERS_TBODY_XPATH, ADD_USERS_SEARCH_XPATH, missing, "user"):
+                    submit_button = self.wait.until(
+                        EC.element_to_be_clickable((By.XPATH, ADD_USERS_SUBMIT_XPATH))
+                    )
+                    submit_button.click()
+                    self.wait.until(EC.staleness_of(submit_button), label="add users closed")
+                    self.wait.until(no_pending_xhr(), label="users added")
+                    self.wait.until(
+                        EC.element_to_be_clickable((By.XPATH, ADD_USERS_TO_GROUP_LINK_XPATH))
+                    )
+                    self.wait.until(no_pending_xhr(), label="group members loaded")
+                    self.wait.until(
+                        table_row_count_stable((By.XPATH, GROUP_MEMBERS_TBODY_XPATH), min_rows=0),
+                        label="group members rows stable",
+                    )
+                    members = {row["name"] for row in snapshot_table(self.driver, GROUP_MEMBERS_TBODY_XPATH)}
+        except (TimeoutException, NoSuchElementException, WebDriverException) as e:
+            error = f"Erro: {traceback.format_exc()}\n{e}"
+            return {username: result(username, error) for username in usernames}
+        return {
+            username: result(username, None if username in members else f"User {username} not added to {group}")
+            for username in usernames
+        }
@@ -0,0 +1,75 @@
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+# failures worth another attempt of the same step: timeouts, missing elements and lost browsers are all WebDriverExceptions
+TRANSIENT_ERRORS = (WebDriverException,)
+
+
+def run_step(name, function, attempts=3, backoff=2.0, before_retry=None, sleep=time.sleep):
+    """Run a step, retrying transient failures with exponential backoff
+
+    Args:
+        name (string): step name, for the logs
+        function (function): the step, raising on failure
+        attempts (int): tries at most
+        backoff (float): seconds before the second try, doubled before each next one
+        before_retry (function): called before each retry. If it returns something other than None,
+            the step is considered done with that value, e.g. when the failed try got further than it seemed
+        sleep (function): waits the backoff
+
+    Returns:
+        object: what the step or before_retry returned
+
+    Raises:
+        WebDriverException: the last failure, once every try failed
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return function()
+        except TRANSIENT_ERRORS as e:
+            if attempt == attempts:
+                raise
+            delay = backoff * 2 ** (attempt - 1)
+            print(f"Step {name} failed ({type(e).__name__}), retrying in {delay:.0f}s...\n")
+            sleep(delay)
+        if before_retry is not None:
+            outcome = before_retry()
+            if outcome is not None:
+                return outcome
+
+
+class StepCheckpoints:
+    """Last outcome of each step of a multi-step task per user, so a retry resumes from the first step not complete.
+    Kept in memory, and in the result store when there is one so they outlive the process
+    """
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store (store.ResultStore): where the checkpoints are persisted
+        """
+        self.store = store
+        self.outcomes = {}
+
+    def steps(self, task, user):
+        """
+        Returns:
+            dict: step -> "complete" or "incomplete", for the steps tried since the task last completed
+        """
+        if self.store is not None:
+            return self.store.steps(task, user)
+        return dict(self.outcomes.get((task, user), {}))
+
+    def mark(self, task, user, step, status, error=None):
+        if self.store is not None:
+            self.store.record_step(task, user, step, status, error)
+        else:
+            self.outcomes.setdefault((task, user), {})[step] = status
+
+    def clear(self, task, user):
+        """Forget the steps once the whole task completed, so running it again starts over"""
+        if self.store is not None:
+            self.store.clear_steps(task, user)
+        else:
+            self.outcomes.pop((task, user), None)
@@ -0,0 +1,245 @@
+import json
+import math
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    run_id TEXT,
+    operation TEXT NOT NULL,
+    user TEXT,
+    request_key TEXT NOT NULL,
+    status TEXT,
+    execution_time REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS results_request ON results (request_key, status);
+CREATE INDEX IF NOT EXISTS results_user ON results (user, status);
+CREATE INDEX IF NOT EXISTS results_operation ON results (operation, recorded_at);
+CREATE TABLE IF NOT EXISTS steps (
+    id INTEGER PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    task TEXT NOT NULL,
+    user TEXT NOT NULL,
+    step TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS steps_user ON steps (task, user);
+"""
+
+# tasks whose results decide together whether a user's request is still done, e.g. a delete undoes a create
+OPERATION_FAMILIES = {
+    "create": ("create", "delete"),
+    "delete": ("create", "delete"),
+}
+
+
+def request_key(operation, request):
+    """Identity of a request: same operation with the same input
+
+    Args:
+        operation (string): operation or task name
+        request (object): JSON serializable input of the operation
+
+    Returns:
+        string: hex digest
+    """
+    payload = json.dumps([operation, request], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def run_id_of(data):
+    """run_id of a job envelope, None for any other input"""
+    if isinstance(data, dict):
+        return (data.get("source") or {}).get("run_id")
+    return None
+
+
+def percentile(values, rank):
+    """Nearest rank percentile of sorted values"""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(rank / 100 * len(values)) - 1))
+    return values[index]
+
+
+class ResultStore:
+    """SQLite record of every operation and user result, used to skip requests already completed
+    and to query failure rates and latencies over time"""
+
+    def __init__(self, path="results.db"):
+        """
+        Args:
+            path (string): database file, ":memory:" for a throwaway store
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # lets the pool workers write to the same file
+            self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def record(self, operation, request, status, execution_time=None, error=None, user=None, run_id=None):
+        """
+        Args:
+            operation (string): operation or task name
+            request (object): input of the operation, identifies the request
+            status (string): "complete" or "incomplete"
+            execution_time (float): seconds spent on it
+            error (object): error reported, stored as text
+            user (string): email of the user the result is about, if any
+            run_id (string): run the request belongs to
+        """
+        if error is not None and not isinstance(error, str):
+            error = json.dumps(error, default=str)
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO results (recorded_at, run_id, operation, user, request_key, status, execution_time, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time.time(),
+                    run_id,
+                    operation,
+                    user,
+                    request_key(operation, request),
+                    status,
+                    execution_time,
+                    error,
+                ),
+            )
+
+    def record_response(self, operation, request, response):
+        """Record a results_info response
+
+        Args:
+            operation (string): name of the decorated method
+            request (object): arguments it was called with
+            response (dict): its response
+        """
+        execution = response.get("body").get("execution")
+        self.record(
+            operation,
+            request,
+            execution.get("status"),
+            execution.get("execution_time"),
+            None if execution.get("status") == "complete" else execution.get("jobs").get("result"),
+            run_id=run_id_of(request[0] if request else None),
+        )
+
+    def completed(self, operation, request, user=None):
+        """
+        Args:
+            operation (string): operation or task name
+            request (object): input of the operation
+            user (string): email the request is about. The request then only counts as done if it is the last
+                one completed for the user among the operations of its family (OPERATION_FAMILIES),
+                so create, delete, create runs the second create again, while a reconcile in between changes nothing
+
+        Returns:
+            dict: the last complete result of the same request, None if it must run
+        """
+        key = request_key(operation, request)
+        if user is None:
+            query, parameters = "WHERE request_key = ? AND status = 'complete'", (key,)
+        else:
+            family = OPERATION_FAMILIES.get(operation, (operation,))
+            query = f"WHERE user = ? AND status = 'complete' AND operation IN ({', '.join('?' * len(family))})"
+            parameters = (user, *family)
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT recorded_at, run_id, execution_time, request_key FROM results {query} ORDER BY id DESC LIMIT 1",
+                parameters,
+            ).fetchone()
+        if row is None or row[3] != key:
+            return None
+        return {"recorded_at": row[0], "run_id": row[1], "execution_time": row[2]}
+
+    def record_step(self, task, user, step, status, error=None):
+        """Checkpoint of one step of a multi-step task, see steps.StepCheckpoints"""
+        if error is not None and not isinstance(error, str):
+            error = json.dumps(error, default=str)
+        with self._lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO steps (recorded_at, task, user, step, status, error) VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), task, user, step, status, error),
+            )
+
+    def steps(self, task, user):
+        """
+        Returns:
+            dict: step -> last status recorded
+        """
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT step, status FROM steps WHERE task = ? AND user = ? ORDER BY id", (task, user)
+            ).fetchall()
+        return dict(rows)
+
+    def clear_steps(self, task, user):
+        with self._lock, self.connection:
+            self.connection.execute("DELETE FROM steps WHERE task = ? AND user = ?", (task, user))
+
+    def _select(self, columns, since, until, operation=None):
+        query = f"SELECT {columns} FROM results WHERE recorded_at >= ? AND recorded_at < ?"
+        parameters = [since or 0, until or float("inf")]
+        if operation is not None:
+            query += " AND operation = ?"
+            parameters.append(operation)
+        with self._lock:
+            return self.connection.execute(query, parameters).fetchall()
+
+    def failure_rates(self, since=None, until=None, bucket=None):
+        """
+        Args:
+            since (float): start timestamp, everything when not provided
+            until (float): end timestamp, up to now when not provided
+            bucket (int): seconds per time bucket, e.g. 3600 for hourly rates. One bucket when not provided
+
+        Returns:
+            dict: {operation: {"total", "failed", "failure_rate"}}, or {operation: {bucket start: ...}} with a bucket
+        """
+        counts = {}
+        for operation, recorded_at, status in self._select("operation, recorded_at, status", since, until):
+            key = (operation, int(recorded_at // bucket * bucket) if bucket else None)
+            total, failed = counts.get(key, (0, 0))
+            counts[key] = (total + 1, failed + int(status != "complete"))
+        rates = {}
+        for (operation, bucket_start), (total, failed) in sorted(counts.items()):
+            rate = {"total": total, "failed": failed, "failure_rate": failed / total}
+            if bucket:
+                rates.setdefault(operation, {})[bucket_start] = rate
+            else:
+                rates[operation] = rate
+        return rates
+
+    def latency_percentiles(self, percentiles=(50, 90, 99), since=None, until=None, operation=None):
+        """
+        Args:
+            percentiles (tuple): ranks to compute
+            since (float): start timestamp, everything when not provided
+            until (float): end timestamp, up to now when not provided
+            operation (string): only this operation
+
+        Returns:
+            dict: {operation: {"p50": seconds, ...}} over the results with an execution time
+        """
+        times = {}
+        for name, execution_time in self._select("operation, execution_time", since, until, operation):
+            if execution_time is not None:
+                times.setdefault(name, []).append(execution_time)
+        latencies = {}
+        for name, values in times.items():
+            values.sort()
+            latencies[name] = {f"p{rank}": percentile(values, rank) for rank in percentiles}
+            latencies[name]["count"] = len(values)
+        return latencies
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
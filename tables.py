@@ -0,0 +1,84 @@
+SNAPSHOT_SCRIPT = """
+var tbody = document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (!tbody) { return null; }
+var table = tbody.closest('table');
+var headers = table ? Array.from(table.querySelectorAll('thead th')).map(function (th) {
+    return th.innerText.trim();
+}) : [];
+var rows = Array.from(tbody.querySelectorAll(':scope > tr')).map(function (row, index) {
+    var link = row.querySelector('a');
+    var checkbox = row.querySelector('input');
+    return {
+        index: index,
+        name: link ? link.innerText.trim() : null,
+        link: link ? link.href : null,
+        checkbox_id: checkbox ? checkbox.id : null,
+        checked: checkbox ? checkbox.checked : null,
+        cells: Array.from(row.querySelectorAll(':scope > td')).map(function (td) {
+            return td.innerText.trim();
+        }),
+        text: row.innerText
+    };
+});
+return {headers: headers, rows: rows};
+"""
+
+SELECT_SCRIPT = """
+var tbody = document.evaluate(
+    arguments[0], document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue;
+if (!tbody) { return null; }
+var rows = tbody.querySelectorAll(':scope > tr');
+var checked = arguments[2];
+var selected = [];
+arguments[1].forEach(function (index) {
+    var checkbox = rows[index] && rows[index].querySelector('input');
+    if (!checkbox) { return; }
+    if (checkbox.checked !== checked) { checkbox.click(); }
+    if (checkbox.checked === checked) { selected.push(index); }
+});
+return selected;
+"""
+
+
+def snapshot_table(driver, tbody_xpath):
+    """Pull every rendered row of a table into python with one execute_script call
+
+    Args:
+        driver (WebDriver): chrome driver
+        tbody_xpath (string): xpath of the table body
+
+    Returns:
+        list: one dict per row with index, name, link, checkbox_id, checked, cells, columns (cells by header), status and text.
+        Empty if the table is not rendered
+    """
+    snapshot = driver.execute_script(SNAPSHOT_SCRIPT, tbody_xpath)
+    if not snapshot:
+        return []
+    headers = snapshot["headers"]
+    rows = snapshot["rows"]
+    for row in rows:
+        row["columns"] = {
+            header: cell for header, cell in zip(headers, row["cells"]) if header
+        }
+        row["status"] = row["columns"].get("Status")
+    return rows
+
+
+def select_rows(driver, tbody_xpath, indexes, checked=True):
+    """Tick (or untick) the checkbox of many rows with one execute_script call
+
+    Args:
+        driver (WebDriver): chrome driver
+        tbody_xpath (string): xpath of the table body
+        indexes (list): row indexes, as returned by snapshot_table
+        checked (bool): desired state of the checkboxes
+
+    Returns:
+        list: indexes whose checkbox ended up in the desired state
+    """
+    if not indexes:
+        return []
+    return driver.execute_script(SELECT_SCRIPT, tbody_xpath, list(indexes), checked) or []
@@ -0,0 +1,91 @@
+import os
+import json
+import urllib.request
+
+import pytest
+
+from bench.mock_console import MockConsole
+from capture import ConsoleData
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "console_responses.json")
+ANA = "ana.souza@example.com"
+BRUNO = "bruno.lima@example.com"
+
+
+def exchanges():
+    with open(FIXTURES) as fixtures_file:
+        return json.load(fixtures_file)["exchanges"]
+
+
+def fetch(console, exchange):
+    """Make the recorded request to the local console, as the app would"""
+    body = json.dumps(exchange.get("request")).encode()
+    request = urllib.request.Request(
+        f"{console.base_url}{exchange['path']}",
+        data=body,
+        method=exchange["method"],
+        headers={"X-Amz-Target": exchange["target"], "Content-Type": "application/x-amz-json-1.1"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return request.full_url, json.load(response), body.decode()
+
+
+@pytest.fixture
+def console():
+    with MockConsole(fixtures=FIXTURES) as console:
+        yield console
+
+
+def ingest_all(console, data, targets=None):
+    for exchange in exchanges():
+        if targets is None or exchange["target"] in targets:
+            data.ingest(*fetch(console, exchange))
+
+
+def test_served_answers_match_the_recording(console):
+    for exchange in exchanges():
+        assert fetch(console, exchange)[1] == exchange["response"]
+
+
+def test_ingest_users(console):
+    data = ConsoleData()
+    ingest_all(console, data, {"AWSIdentityStore.ListUsers"})
+    assert set(data.users) == {ANA, BRUNO}
+    assert data.user(BRUNO)["Name"] == {"FamilyName": "Lima", "GivenName": "Bruno"}
+    assert data.user("nobody@example.com") is None
+
+
+def test_status(console):
+    data = ConsoleData()
+    ingest_all(console, data, {"AWSIdentityStore.ListUsers"})
+    # the list has no status, the user page's answer does
+    assert data.status(ANA) is None
+    ingest_all(console, data, {"AWSIdentityStore.DescribeUser"})
+    assert data.status(ANA) == "Disabled"
+
+
+def test_groups_of(console):
+    data = ConsoleData()
+    ingest_all(console, data)
+    assert data.groups_of(ANA) == {"Developers", "ReadOnly"}
+    # an empty list is about the member of the request
+    assert data.groups_of(BRUNO) == set()
+    assert data.groups_of("nobody@example.com") is None
+
+
+def test_groups_of_before_the_group_names(console):
+    data = ConsoleData()
+    ingest_all(console, data, {"AWSIdentityStore.ListUsers", "AWSIdentityStore.ListGroupMembershipsForMember"})
+    assert data.groups_of(ANA) == {"54e8c4a8-e0a1-70d6-1a1b-0c3f2b1d7e55", "f4f89478-5011-70ab-44c2-8d5a1e0f3c10"}
+
+
+def test_since_skips_older_answers(console):
+    data = ConsoleData()
+    ingest_all(console, data, {"AWSIdentityStore.ListUsers", "AWSIdentityStore.ListGroupMembershipsForMember"})
+    mark = data.sequence
+    # UpdateUser answers with an empty body, so nothing newer is known about the user
+    ingest_all(console, data, {"AWSIdentityStore.UpdateUser"})
+    assert data.user(ANA, since=mark) is None
+    assert data.groups_of(ANA, since=mark) is None
+    ingest_all(console, data, {"AWSIdentityStore.DescribeUser"})
+    assert data.user(ANA, since=mark)["Active"] is False
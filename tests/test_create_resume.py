@@ -0,0 +1,53 @@
+import sso
+from tracing import Tracer
+
+EMAIL = "carla.dias@example.com"
+
+
+class FakeDirectory:
+    """Users index of a console where the user exists"""
+
+    def __init__(self, users):
+        self.users = users
+
+    def search(self, username):
+        return {"name": username} if username in self.users else None
+
+    def invalidate(self, username=None):
+        pass
+
+
+def resumable_session(monkeypatch):
+    """SSO without chrome whose previous create of the user failed after submitting the wizard"""
+    session = sso.SSO.__new__(sso.SSO)
+    session.store = None
+    session._checkpoints = None
+    session.tracer = Tracer()
+    session.directory = FakeDirectory({EMAIL})
+    session.checkpoints.mark("create", EMAIL, "submitted", "complete")
+    monkeypatch.setattr(sso.SSO, "step_attempts", 1)
+    monkeypatch.setattr(session, "_user_groups", lambda username: set())
+    monkeypatch.setattr(session, "_issue_password", lambda username: "one-time-password")
+    return session
+
+
+def test_resumed_create_without_groups(monkeypatch):
+    session = resumable_session(monkeypatch)
+    result = session._create_single_user({"email": EMAIL, "firstname": "Carla", "lastname": "Dias"})
+    assert result["operation_status"] == "complete"
+    assert result["operation_name"] == "Create User (resumed)"
+    assert session.checkpoints.steps("create", EMAIL) == {}
+
+
+def test_resumed_create_adds_missing_groups(monkeypatch):
+    session = resumable_session(monkeypatch)
+    changes = []
+
+    def apply_group_changes(username, add, remove):
+        changes.append((username, add, remove))
+        return {"error": None, "operation_status": "complete"}
+
+    monkeypatch.setattr(session, "_apply_group_changes", apply_group_changes)
+    result = session._create_single_user({"email": EMAIL, "groups": ["G2", "G1"]})
+    assert result["operation_status"] == "complete"
+    assert changes == [(EMAIL, ["G1", "G2"], [])]
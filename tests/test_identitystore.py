@@ -0,0 +1,198 @@
+import itertools
+
+import pytest
+
+from backend import build_payload
+from identitystore import IdentityStoreBackend
+
+STORE_ID = "d-1234567890"
+
+
+class ResourceNotFoundException(Exception):
+    pass
+
+
+class Paginator:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def paginate(self, **kwargs):
+        return self.pages(**kwargs)
+
+
+class FakeIdentityStore:
+    """In-memory stand-in of the boto3 identitystore client, for the calls the backend makes"""
+
+    class exceptions:
+        ResourceNotFoundException = ResourceNotFoundException
+
+    def __init__(self, groups=()):
+        self.ids = itertools.count(1)
+        self.users = {}
+        self.groups = {f"group-{name}": name for name in groups}
+        self.memberships = {}
+
+    def _check_store(self, identity_store_id):
+        assert identity_store_id == STORE_ID
+
+    def list_users(self, IdentityStoreId, MaxResults):
+        self._check_store(IdentityStoreId)
+        return {"Users": list(self.users.values())[:MaxResults]}
+
+    def create_user(self, IdentityStoreId, UserName, DisplayName, Name, Emails):
+        self._check_store(IdentityStoreId)
+        user_id = f"user-{next(self.ids)}"
+        self.users[user_id] = {"UserId": user_id, "UserName": UserName, "DisplayName": DisplayName, "Name": Name}
+        return {"UserId": user_id}
+
+    def update_user(self, IdentityStoreId, UserId, Operations):
+        for operation in Operations:
+            self.users[UserId][operation["AttributePath"]] = operation["AttributeValue"]
+
+    def delete_user(self, IdentityStoreId, UserId):
+        del self.users[UserId]
+
+    def get_user_id(self, IdentityStoreId, AlternateIdentifier):
+        username = AlternateIdentifier["UniqueAttribute"]["AttributeValue"]
+        for user_id, user in self.users.items():
+            if user["UserName"] == username:
+                return {"UserId": user_id}
+        raise ResourceNotFoundException(username)
+
+    def get_group_id(self, IdentityStoreId, AlternateIdentifier):
+        name = AlternateIdentifier["UniqueAttribute"]["AttributeValue"]
+        for group_id, group_name in self.groups.items():
+            if group_name == name:
+                return {"GroupId": group_id}
+        raise ResourceNotFoundException(name)
+
+    def create_group_membership(self, IdentityStoreId, GroupId, MemberId):
+        membership_id = f"membership-{next(self.ids)}"
+        self.memberships[membership_id] = (GroupId, MemberId["UserId"])
+        return {"MembershipId": membership_id}
+
+    def delete_group_membership(self, IdentityStoreId, MembershipId):
+        del self.memberships[MembershipId]
+
+    def get_paginator(self, operation):
+        if operation == "list_groups":
+            return Paginator(
+                lambda IdentityStoreId: [
+                    {"Groups": [{"GroupId": group_id, "DisplayName": name} for group_id, name in self.groups.items()]}
+                ]
+            )
+        assert operation == "list_group_memberships_for_member"
+        return Paginator(
+            lambda IdentityStoreId, MemberId: [
+                {
+                    "GroupMemberships": [
+                        {"GroupId": group_id, "MembershipId": membership_id}
+                        for membership_id, (group_id, user_id) in self.memberships.items()
+                        if user_id == MemberId["UserId"]
+                    ]
+                }
+            ]
+        )
+
+    def groups_of(self, username):
+        user_id = self.get_user_id(STORE_ID, {"UniqueAttribute": {"AttributeValue": username}})["UserId"]
+        return {self.groups[group_id] for group_id, member in self.memberships.values() if member == user_id}
+
+
+def execution(response):
+    return response["body"]["execution"]
+
+
+def user_results(response):
+    return {result["email"]: result for result in execution(response)["jobs"]["users"]}
+
+
+@pytest.fixture
+def client():
+    return FakeIdentityStore(groups=("G1", "G2", "G3"))
+
+
+@pytest.fixture
+def backend(client):
+    return IdentityStoreBackend(STORE_ID, client=client)
+
+
+def test_create_user(backend, client):
+    response = backend.create_user(
+        build_payload([{"email": "ana@example.com", "firstname": "Ana", "lastname": "Souza", "groups": ["G1", "G2"]}])
+    )
+    assert execution(response)["status"] == "complete"
+    assert client.groups_of("ana@example.com") == {"G1", "G2"}
+
+
+def test_create_user_with_missing_group(backend, client):
+    response = backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana", "groups": ["G9"]}]))
+    result = user_results(response)["ana@example.com"]
+    assert result["status"] == "incomplete"
+    assert "G9" in str(result["error"])
+    assert client.groups_of("ana@example.com") == set()
+
+
+def test_update_user(backend, client):
+    backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana"}]))
+    response = backend.update_user(
+        build_payload([{"email": "ana@example.com", "lastname": "Lima"}, {"email": "nobody@example.com", "lastname": "X"}])
+    )
+    results = user_results(response)
+    assert results["ana@example.com"]["status"] == "complete"
+    assert results["nobody@example.com"]["status"] == "incomplete"
+    assert "not found" in str(results["nobody@example.com"]["error"])
+    assert [user["name.familyName"] for user in client.users.values()] == ["Lima"]
+
+
+def test_delete_user(backend, client):
+    backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana"}]))
+    response = backend.delete_user(build_payload([{"email": "ana@example.com"}, {"email": "nobody@example.com"}]))
+    results = user_results(response)
+    assert results["ana@example.com"]["status"] == "complete"
+    assert "not found" in str(results["nobody@example.com"]["error"])
+    assert client.users == {}
+
+
+def test_reconcile_groups(backend, client):
+    backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana", "groups": ["G1", "G2"]}]))
+    desired = [
+        {"email": "ana@example.com", "groups": ["G2", "G3", "G9"]},
+        {"email": "nobody@example.com", "groups": ["G1"]},
+    ]
+    dry_run = backend.reconcile_groups(build_payload(desired), dry_run=True)
+    assert execution(dry_run)["jobs"]["plan"] == {"ana@example.com": {"add": ["G3", "G9"], "remove": ["G1"]}}
+    assert client.groups_of("ana@example.com") == {"G1", "G2"}
+
+    response = backend.reconcile_groups(build_payload(desired))
+    results = user_results(response)
+    # the groups that exist are changed, the missing one is reported
+    assert client.groups_of("ana@example.com") == {"G2", "G3"}
+    assert "G9" in str(results["ana@example.com"]["error"])
+    assert "not found" in str(results["nobody@example.com"]["error"])
+
+
+class FakeConsole:
+    def __init__(self, password):
+        self.password = password
+        self.issued = []
+
+    def issue_user_password(self, username):
+        self.issued.append(username)
+        return self.password
+
+
+def test_create_user_issues_the_password_through_the_console(client):
+    console = FakeConsole("one-time-password")
+    backend = IdentityStoreBackend(STORE_ID, client=client, console=console)
+    response = backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana"}]))
+    assert execution(response)["status"] == "complete"
+    assert console.issued == ["ana@example.com"]
+
+
+def test_create_user_reports_a_password_not_issued(client):
+    console = FakeConsole({"error": "modal not shown", "operation_status": "incomplete"})
+    backend = IdentityStoreBackend(STORE_ID, client=client, console=console)
+    result = user_results(backend.create_user(build_payload([{"email": "ana@example.com", "firstname": "Ana"}])))
+    assert result["ana@example.com"]["operation_name"] == "Create User - Get User Password"
+    assert result["ana@example.com"]["error"] == "modal not shown"
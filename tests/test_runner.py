@@ -0,0 +1,60 @@
+import io
+import json
+
+from backend import format_results
+from runner import JobRunner
+
+
+class FakeSession:
+    """Logged in backend whose create_user fails for the users named in `broken`"""
+
+    logged_in = True
+
+    def __init__(self, broken=()):
+        self.broken = set(broken)
+        self.created = []
+
+    def create_user(self, envelope):
+        email = envelope["body"]["services"][0]["input"]["users"][0]["email"]
+        if email in self.broken:
+            raise RuntimeError(f"{email} broke the backend")
+        self.created.append(email)
+        return format_results({"operation_name": "Create User", "operation_status": "complete", "data": email}, 0)
+
+
+def envelope(email, run_id="run-1", process_id="SSO.create_user"):
+    return json.dumps(
+        {
+            "source": {"run_id": run_id},
+            "target": {"process_id": process_id},
+            "body": {"services": [{"input": {"users": [{"email": email}]}}]},
+        }
+    )
+
+
+def read_results(path):
+    with open(path) as results_file:
+        return [json.loads(line) for line in results_file]
+
+
+def test_failing_lines_are_recorded_and_passed(tmp_path):
+    lines = [
+        envelope("ana@example.com"),
+        "{not json",
+        json.dumps({"source": {"run_id": "run-1"}, "target": None}),
+        envelope("bruno@example.com"),
+        envelope("carla@example.com"),
+    ]
+    output, checkpoint = str(tmp_path / "results.jsonl"), str(tmp_path / "checkpoint.json")
+    session = FakeSession(broken={"bruno@example.com"})
+    stats = JobRunner(session, output, checkpoint).run(io.StringIO("\n".join(lines)))
+    assert stats == {"done": 5, "skipped": 0, "incomplete": 3}
+    assert session.created == ["ana@example.com", "carla@example.com"]
+    statuses = [result["result"]["body"]["execution"]["status"] for result in read_results(output)]
+    assert statuses == ["complete", "incomplete", "incomplete", "incomplete", "complete"]
+
+    # a resumed run gets past the lines that failed instead of failing on them again
+    session = FakeSession()
+    stats = JobRunner(session, output, checkpoint).run(io.StringIO("\n".join(lines)))
+    assert stats["done"] == 0
+    assert session.created == []
@@ -0,0 +1,19 @@
+from store import ResultStore
+
+ANA = {"email": "ana@example.com", "groups": ["G1"]}
+
+
+def test_create_stays_done_after_other_tasks():
+    store = ResultStore(":memory:")
+    store.record("create", ANA, "complete", user=ANA["email"])
+    store.record("reconcile", {"email": ANA["email"], "groups": ["G1"]}, "complete", user=ANA["email"])
+    store.record("assign", {"email": ANA["email"], "groups": ["G2"]}, "complete", user=ANA["email"])
+    assert store.completed("create", ANA, ANA["email"]) is not None
+
+
+def test_create_runs_again_after_a_delete():
+    store = ResultStore(":memory:")
+    store.record("create", ANA, "complete", user=ANA["email"])
+    store.record("delete", {"email": ANA["email"]}, "complete", user=ANA["email"])
+    assert store.completed("create", ANA, ANA["email"]) is None
+    assert store.completed("delete", {"email": ANA["email"]}, ANA["email"]) is not None
@@ -0,0 +1,104 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from zendesk import ZendeskClient
+
+pytest.importorskip("requests")
+
+
+def failure(status):
+    return {"body": {"execution": {"jobs": {"status": status, "result": "Erros: boom"}}}}
+
+
+class FakeZendesk:
+    """Local tickets endpoint answering each POST with the next (status, headers) of `answers`, then 201"""
+
+    def __init__(self, answers=()):
+        self.answers = list(answers)
+        self.tickets = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake.tickets.append(json.loads(body))
+                status, headers = fake.answers.pop(0) if fake.answers else (201, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v2/tickets.json"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def client(zendesk, **options):
+    return ZendeskClient(url=zendesk.url, backoff=0.01, timeout=1, **options)
+
+
+def test_ticket_created():
+    with FakeZendesk() as zendesk:
+        tickets = client(zendesk)
+        tickets.submit(failure("Create User with ana@example.com"))
+        tickets.close()
+    assert tickets.stats == {"sent": 1, "failed": 0, "retries": 0}
+    assert zendesk.tickets[0]["ticket"]["subject"] == "SSO automation Failed"
+    assert "Create User with ana@example.com" in zendesk.tickets[0]["ticket"]["comment"]["body"]
+
+
+def test_retry_after_is_followed_up_to_the_timeout():
+    with FakeZendesk([(429, {"Retry-After": "60"})]) as zendesk:
+        tickets = client(zendesk)
+        start_time = time.monotonic()
+        assert tickets.send(tickets.build_ticket([failure("Delete User")]))
+        elapsed = time.monotonic() - start_time
+    assert tickets.stats == {"sent": 1, "failed": 0, "retries": 1}
+    assert len(zendesk.tickets) == 2
+    assert 1 <= elapsed < 10
+
+
+def test_client_error_is_not_retried():
+    with FakeZendesk([(400, {})]) as zendesk:
+        tickets = client(zendesk)
+        assert not tickets.send(tickets.build_ticket([failure("Update User")]))
+    assert tickets.stats == {"sent": 0, "failed": 1, "retries": 0}
+    assert len(zendesk.tickets) == 1
+
+
+def test_invalid_url_is_not_retried():
+    tickets = ZendeskClient(url="url", backoff=1, timeout=1)
+    start_time = time.monotonic()
+    assert not tickets.send(tickets.build_ticket([failure("Update User")]))
+    assert time.monotonic() - start_time < 1
+    assert tickets.stats["retries"] == 0
+
+
+def test_aggregate_sends_a_single_ticket_on_flush():
+    with FakeZendesk() as zendesk:
+        tickets = client(zendesk, aggregate=True)
+        for status in ("Create User with ana@example.com", "Create User with bruno@example.com"):
+            tickets.submit(failure(status))
+        assert zendesk.tickets == []
+        assert tickets.flush(timeout=10)
+        tickets.close()
+    assert len(zendesk.tickets) == 1
+    ticket = zendesk.tickets[0]["ticket"]
+    assert ticket["subject"] == "SSO automation Failed (2 operations)"
+    assert "ana@example.com" in ticket["comment"]["body"] and "bruno@example.com" in ticket["comment"]["body"]
@@ -0,0 +1,179 @@
+import json
+import time
+import threading
+import contextlib
+from collections import deque
+
+from selenium.webdriver.support.events import AbstractEventListener
+
+# upper bounds, in seconds, of the latency histogram buckets
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Tracer:
+    """Span based latency tracing of the browser steps, labelled by operation, step and user.
+
+    Spans are kept in a bounded buffer to be exported as JSON lines, and aggregated on the fly into
+    Prometheus style counters and histograms, so it can stay on in production.
+    """
+
+    def __init__(self, max_spans=10000, enabled=True):
+        """
+        Args:
+            max_spans (int): spans kept in memory until exported. Older ones are dropped, the metrics keep counting
+            enabled (bool): record spans at all
+        """
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)
+        self.metrics = {}
+        self._labels = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def current_labels(self):
+        if not hasattr(self._labels, "value"):
+            self._labels.value = {}
+        return self._labels.value
+
+    @contextlib.contextmanager
+    def labels(self, **labels):
+        """Label every span recorded inside the block, e.g. with the operation or the user"""
+        previous = self.current_labels
+        self._labels.value = dict(previous, **labels)
+        try:
+            yield
+        finally:
+            self._labels.value = previous
+
+    @contextlib.contextmanager
+    def span(self, kind, name=None):
+        """Time the block as a span of the given kind (navigation, wait, find, click, send_keys, ...)"""
+        start_time = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.record(kind, name, start_time, time.perf_counter() - start_time, error)
+
+    def record(self, kind, name, start_time, duration, error=None):
+        if not self.enabled:
+            return
+        labels = self.current_labels
+        key = (kind, labels.get("operation"), labels.get("step"))
+        with self._lock:
+            self.spans.append(
+                {
+                    "kind": kind,
+                    "name": name,
+                    "start": start_time,
+                    "duration": duration,
+                    "error": error,
+                    "labels": labels,
+                }
+            )
+            metric = self.metrics.get(key)
+            if metric is None:
+                metric = self.metrics[key] = {
+                    "count": 0,
+                    "errors": 0,
+                    "sum": 0.0,
+                    "buckets": [0] * len(BUCKETS),
+                }
+            metric["count"] += 1
+            metric["errors"] += int(error is not None)
+            metric["sum"] += duration
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    metric["buckets"][index] += 1
+
+    def export_jsonl(self, output):
+        """Write the buffered spans as JSON lines and empty the buffer
+
+        Args:
+            output (file): text file like object
+
+        Returns:
+            int: number of spans written
+        """
+        with self._lock:
+            spans, self.spans = self.spans, deque(maxlen=self.spans.maxlen)
+        for span in spans:
+            output.write(json.dumps(span) + "\n")
+        return len(spans)
+
+    def prometheus(self):
+        """
+        Returns:
+            string: counters and latency histograms in the Prometheus text format
+        """
+        lines = [
+            "# TYPE sso_span_total counter",
+            "# TYPE sso_span_errors_total counter",
+            "# TYPE sso_span_seconds histogram",
+        ]
+        with self._lock:
+            metrics = {key: dict(metric) for key, metric in self.metrics.items()}
+        for (kind, operation, step), metric in sorted(metrics.items(), key=str):
+            labels = f'kind="{kind}",operation="{operation or ""}",step="{step or ""}"'
+            lines.append(f"sso_span_total{{{labels}}} {metric['count']}")
+            lines.append(f"sso_span_errors_total{{{labels}}} {metric['errors']}")
+            for bound, count in zip(BUCKETS, metric["buckets"]):
+                lines.append(f'sso_span_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'sso_span_seconds_bucket{{{labels},le="+Inf"}} {metric["count"]}')
+            lines.append(f"sso_span_seconds_sum{{{labels}}} {metric['sum']}")
+            lines.append(f"sso_span_seconds_count{{{labels}}} {metric['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class TracingListener(AbstractEventListener):
+    """Selenium event listener turning every navigation, find, click, send_keys and script into a span"""
+
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.started = {}
+
+    def _start(self, kind):
+        self.started[kind] = time.perf_counter()
+
+    def _finish(self, kind, name=None, error=None):
+        start_time = self.started.pop(kind, None)
+        if start_time is not None:
+            self.tracer.record(kind, name, start_time, time.perf_counter() - start_time, error)
+
+    def before_navigate_to(self, url, driver):
+        self._start("navigation")
+
+    def after_navigate_to(self, url, driver):
+        self._finish("navigation", url)
+
+    def before_find(self, by, value, driver):
+        self._start("find")
+
+    def after_find(self, by, value, driver):
+        self._finish("find", f"{by}={value}")
+
+    def before_click(self, element, driver):
+        self._start("click")
+
+    def after_click(self, element, driver):
+        self._finish("click")
+
+    def before_change_value_of(self, element, driver):
+        self._start("send_keys")
+
+    def after_change_value_of(self, element, driver):
+        self._finish("send_keys")
+
+    def before_execute_script(self, script, driver):
+        self._start("script")
+
+    def after_execute_script(self, script, driver):
+        self._finish("script")
+
+    def on_exception(self, exception, driver):
+        # the step that raised never reaches its after_* event
+        for kind in list(self.started):
+            self._finish(kind, error=type(exception).__name__)
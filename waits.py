@@ -0,0 +1,191 @@
+import time
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+# keeps a counter of the XHR/fetch requests still running in the page
+XHR_TRACKER_SCRIPT = """
+(function () {
+    if (window.__ssoPendingRequests) { return; }
+    var tracker = window.__ssoPendingRequests = {count: 0};
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        tracker.count++;
+        this.addEventListener('loadend', function () { tracker.count--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function () {
+            tracker.count++;
+            return fetch.apply(this, arguments).finally(function () { tracker.count--; });
+        };
+    }
+})();
+"""
+
+WIZARD_STEP_LOCATOR = (By.XPATH, '//*[@id="add-user-wizard"]//h1')
+
+
+def install_xhr_tracker(driver):
+    """Inject the request tracker in every document the driver opens from now on
+
+    Args:
+        driver (WebDriver): chrome driver
+    """
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument", {"source": XHR_TRACKER_SCRIPT}
+    )
+
+
+class Rows(list):
+    """Rows of a table, truthy even when empty so a stable empty table still ends the wait"""
+
+    def __bool__(self):
+        return True
+
+
+class table_row_count_stable:
+    """Wait until the table body has the same number of rows for `stable_for` seconds
+
+    Returns the rows once they are stable
+    """
+
+    def __init__(self, tbody_locator, stable_for=0.5, min_rows=1):
+        self.rows_locator = (tbody_locator[0], f"{tbody_locator[1]}/tr")
+        self.stable_for = stable_for
+        self.min_rows = min_rows
+        self.last_count = None
+        self.stable_since = None
+
+    def __call__(self, driver):
+        rows = driver.find_elements(*self.rows_locator)
+        now = time.monotonic()
+        if len(rows) != self.last_count:
+            self.last_count = len(rows)
+            self.stable_since = now
+            return False
+        if len(rows) < self.min_rows or now - self.stable_since < self.stable_for:
+            return False
+        return Rows(rows)
+
+
+class button_enabled:
+    """Wait until the button is displayed and enabled, including aria-disabled ones
+
+    Returns the button
+    """
+
+    def __init__(self, locator):
+        self.locator = locator
+
+    def __call__(self, driver):
+        try:
+            button = driver.find_element(*self.locator)
+            if (
+                button.is_displayed()
+                and button.is_enabled()
+                and button.get_attribute("aria-disabled") != "true"
+            ):
+                return button
+        except StaleElementReferenceException:
+            pass
+        return False
+
+
+class wizard_step_changed:
+    """Wait until the wizard leaves the step it was on when the condition was created
+
+    Returns the title of the new step
+    """
+
+    def __init__(self, driver, locator=WIZARD_STEP_LOCATOR):
+        self.locator = locator
+        self.previous_step = self.current_step(driver)
+
+    def current_step(self, driver):
+        try:
+            return driver.find_element(*self.locator).text
+        except (NoSuchElementException, StaleElementReferenceException):
+            return None
+
+    def __call__(self, driver):
+        step = self.current_step(driver)
+        if step and step != self.previous_step:
+            return step
+        return False
+
+
+class no_pending_xhr:
+    """Wait until the page is loaded and has no XHR/fetch request running"""
+
+    def __call__(self, driver):
+        return driver.execute_script(
+            XHR_TRACKER_SCRIPT
+            + "return document.readyState === 'complete' && window.__ssoPendingRequests.count <= 0;"
+        )
+
+
+def describe(method):
+    """Name used to label a wait condition on the stats"""
+    name = getattr(method, "__qualname__", None) or type(method).__name__
+    return name.split(".<locals>")[0]
+
+
+class WaitStats:
+    """Accumulate how long the waits actually blocked, by label"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.waits = {}
+
+    def record(self, label, elapsed, timed_out=False):
+        stats = self.waits.setdefault(
+            label, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0}
+        )
+        stats["count"] += 1
+        stats["total"] += elapsed
+        stats["max"] = max(stats["max"], elapsed)
+        stats["timeouts"] += int(timed_out)
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, total, max and timeouts of every label, plus the total blocked time
+        """
+        return {
+            "blocked_time": sum(stats["total"] for stats in self.waits.values()),
+            "waits": {label: dict(stats) for label, stats in self.waits.items()},
+        }
+
+
+class TimedWait(WebDriverWait):
+    """WebDriverWait that records how long each `until` call blocked"""
+
+    def __init__(self, driver, timeout, stats=None, tracer=None, **kwargs):
+        super().__init__(driver, timeout, **kwargs)
+        self.stats = stats or WaitStats()
+        self.tracer = tracer
+
+    def until(self, method, message="", label=None):
+        start_time = time.perf_counter()
+        timed_out = False
+        try:
+            return super().until(method, message)
+        except TimeoutException:
+            timed_out = True
+            raise
+        finally:
+            label = label or describe(method)
+            elapsed = time.perf_counter() - start_time
+            self.stats.record(label, elapsed, timed_out)
+            if self.tracer is not None:
+                self.tracer.record(
+                    "wait", label, start_time, elapsed, "TimeoutException" if timed_out else None
+                )
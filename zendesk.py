@@ -0,0 +1,193 @@
+import json
+import time
+import queue
+import threading
+
+
+class ZendeskClient:
+    """Zendesk ticket client with a pooled keep-alive session and a background submission queue.
+
+    Tickets are sent by a worker thread, so the automation never waits on Zendesk. 429 and 5xx answers are
+    retried with exponential backoff. In aggregation mode every failure of a run is merged into a single ticket on `flush`.
+    """
+
+    def __init__(
+        self,
+        url="url",
+        user="user",
+        pwd="pwd",
+        aggregate=False,
+        max_retries=5,
+        backoff=1.0,
+        timeout=10,
+        queue_size=1000,
+        session=None,
+    ):
+        """
+        Args:
+            url (string): tickets endpoint, e.g. https://<subdomain>.zendesk.com/api/v2/tickets.json
+            user (string): zendesk user
+            pwd (string): zendesk password or token
+            aggregate (bool): keep the failures and open a single ticket with all of them on flush
+            max_retries (int): attempts for 429/5xx and connection errors
+            backoff (float): seconds of the first retry wait, doubled on each attempt
+            timeout (float): seconds to wait for each zendesk answer
+            queue_size (int): tickets waiting to be sent before submit blocks
+            session (requests.Session): session to reuse. One with a connection pool is created when not provided
+        """
+        if session is None:
+            import requests
+
+            session = requests.Session()
+            session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=4))
+            session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=4))
+        session.auth = (user, pwd)
+        session.headers.update({"content-type": "application/json"})
+        self.session = session
+        self.url = url
+        self.aggregate = aggregate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.failures = []
+        self.stats = {"sent": 0, "failed": 0, "retries": 0}
+        self._lock = threading.Lock()
+        self._worker = None
+
+    @staticmethod
+    def ticket_body(message):
+        """Text of the ticket for one execution result provided by the decorator"""
+        return (
+            " Erro na operação: \n"
+            + f"{message.get('body').get('execution').get('jobs').get('status')} \n"
+            + f"Com a mensagem :\n {message.get('body').get('execution').get('jobs').get('result')}"
+        )
+
+    def build_ticket(self, messages):
+        """
+        Args:
+            messages (list): execution results provided by the decorator
+
+        Returns:
+            dict: zendesk ticket with every message
+        """
+        subject = "SSO automation Failed"
+        if len(messages) > 1:
+            subject = f"SSO automation Failed ({len(messages)} operations)"
+        body = "\n\n".join(self.ticket_body(message) for message in messages)
+        return {"ticket": {"subject": subject, "comment": {"body": body}}}
+
+    def submit(self, message):
+        """Queue a ticket for the execution result, without waiting for zendesk
+
+        Args:
+            message (dict): containg the execution status data
+        """
+        if self.aggregate:
+            with self._lock:
+                self.failures.append(message)
+            return
+        self._start_worker()
+        self.queue.put(self.build_ticket([message]))
+
+    def flush(self, timeout=None):
+        """Send the aggregated ticket, if any, and wait until every queued ticket was handled
+
+        Args:
+            timeout (float): seconds to wait at most, the tickets left keep being sent in the background
+
+        Returns:
+            bool: True if every queued ticket was handled
+        """
+        with self._lock:
+            failures, self.failures = self.failures, []
+        if failures:
+            self._start_worker()
+            self.queue.put(self.build_ticket(failures))
+        if self._worker is None:
+            return True
+        if timeout is None:
+            self.queue.join()
+            return True
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    print(f"{self.queue.unfinished_tasks} tickets not sent after {timeout}s")
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """Flush the pending tickets and stop the worker"""
+        self.flush()
+        if self._worker is not None:
+            self.queue.put(None)
+            self._worker.join()
+            self._worker = None
+        self.session.close()
+
+    def _start_worker(self):
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="zendesk-tickets", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            ticket = self.queue.get()
+            try:
+                if ticket is None:
+                    return
+                self.send(ticket)
+            finally:
+                self.queue.task_done()
+
+    def _retry_wait(self, attempt, response=None):
+        """Seconds before the next attempt: zendesk's Retry-After or the backoff, never more than the timeout"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), self.timeout)
+        return min(self.backoff * 2 ** attempt, self.timeout)
+
+    def send(self, ticket):
+        """Post a ticket, retrying with backoff on 429, 5xx, connection errors and timeouts
+
+        Args:
+            ticket (dict): zendesk ticket
+
+        Returns:
+            bool: True if zendesk created the ticket
+        """
+        import requests
+
+        payload = json.dumps(ticket)
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.session.post(self.url, data=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                print(f"Problem with the request: {e}")
+            except requests.RequestException as e:
+                # a bad URL or request fails the same way every time
+                print(f"Problem with the request: {e}")
+                break
+            else:
+                if response.status_code == 201:
+                    print("Successfully created the ticket.")
+                    self.stats["sent"] += 1
+                    return True
+                if response.status_code != 429 and response.status_code < 500:
+                    break
+                print("Status:", response.status_code, "Retrying the ticket.")
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                time.sleep(self._retry_wait(attempt, response))
+        print("Status:", response.status_code if response is not None else None,
+              "Problem with the request. Ticket not created.")
+        self.stats["failed"] += 1
+        return False